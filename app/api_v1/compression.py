@@ -0,0 +1,171 @@
+"""HTTP responses compression.
+
+ASGI middleware negotiates response content encoding by `Accept-Encoding`
+header and compresses body messages as they are sent, so streamed rows
+are compressed batch by batch and reach client without waiting for the
+rest. Bodies smaller than threshold are sent as is: compressing them costs
+more than it saves.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import ENCODINGS, Compressor, compressor
+
+
+def negotiate_encoding(
+    accept_encoding: str | None,
+    offered: list[str],
+) -> str | None:
+    """Choose content encoding for Accept-Encoding header.
+
+    Returns the encoding of `offered` with the greatest weight, the first
+    one of equally weighted, or None if nothing offered is acceptable.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: dict[str, float] = {}
+    for coding in accept_encoding.split(','):
+        name, *params = coding.split(';')
+        weight = 1.0
+        for param in params:
+            param_name, _, param_value = param.strip().partition('=')
+            if param_name == 'q':
+                try:
+                    weight = float(param_value)
+                except ValueError:
+                    weight = 0
+        weights[name.strip().lower()] = weight
+
+    chosen = None
+    chosen_weight = 0.0
+    for encoding in offered:
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > chosen_weight:
+            chosen, chosen_weight = encoding, weight
+    return chosen
+
+
+class _CompressedResponse:
+    """Response messages compressed on the way to client."""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        level: int,
+        min_size: int,
+    ) -> None:
+        self.encoding = encoding
+        self.level = level
+        self.min_size = min_size
+        self._send = send
+        self._start: Message | None = None
+        self._compressor: Compressor | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self._passthrough:
+            await self._send(message)
+        elif message['type'] == 'http.response.start':
+            self._on_start(message)
+            if self._passthrough:
+                await self._send(message)
+        elif message['type'] == 'http.response.body':
+            await self._on_body(message)
+        else:
+            await self._send(message)
+
+    def _on_start(self, message: Message) -> None:
+        headers = Headers(raw=message.get('headers', []))
+        if 'content-encoding' in headers:
+            self._passthrough = True
+            return
+
+        MutableHeaders(scope=message).add_vary_header('Accept-Encoding')
+        content_length = headers.get('content-length')
+        if content_length and int(content_length) < self.min_size:
+            self._passthrough = True
+            return
+        self._start = message
+
+    async def _on_body(self, message: Message) -> None:
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if self._compressor is None:
+            if self._start is None:  # pragma: no cover
+                await self._send(message)
+                return
+            if not more_body and len(body) < self.min_size:
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            await self._send(self._compressed_start(self._start))
+            self._compressor = compressor(self.encoding, self.level)
+
+        compressed = self._compressor.compress(body)
+        if not more_body:
+            compressed += self._compressor.finish()
+        await self._send({
+            'type': 'http.response.body',
+            'body': compressed,
+            'more_body': more_body,
+        })
+
+    def _compressed_start(self, message: Message) -> Message:
+        headers = MutableHeaders(scope=message)
+        headers['Content-Encoding'] = self.encoding
+        if 'content-length' in headers:
+            del headers['Content-Length']  # noqa: WPS420
+        return message
+
+
+class CompressionMiddleware:
+    """Compress responses with encodings accepted by clients."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: list[str],
+        levels: dict[str, int],
+        min_size: int = 1024,
+    ) -> None:
+        """Wrap ASGI app.
+
+        `encodings` are offered in order of preference, the ones not
+        supported are skipped. Encodings not in `levels` are compressed
+        with level 3.
+        """
+        self.app = app
+        self.encodings = [
+            encoding for encoding in encodings if encoding in ENCODINGS
+        ]
+        self.levels = levels
+        self.min_size = min_size
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Process request."""
+        encoding = None
+        if scope['type'] == 'http' and self.encodings:
+            encoding = negotiate_encoding(
+                Headers(scope=scope).get('accept-encoding'),
+                self.encodings,
+            )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = _CompressedResponse(
+            send,
+            encoding,
+            self.levels.get(encoding, 3),
+            self.min_size,
+        )
+        await self.app(scope, receive, response.send)
@@ -1,19 +1,239 @@
 """API dependencies providers."""
 
-from typing import Any, AsyncGenerator
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import (
+    Annotated,
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    NamedTuple,
+    TypeAlias,
+)
 
+from fastapi import Depends, Header, Request
 from psycopg import AsyncConnection
+from psycopg_pool import PoolTimeout
 
-from app import config
+from app.api_v1.errors import InvalidLsn, Overloaded, PoolExhausted
+from app.api_v1.metrics import route_template
+from app.core.admission import Admission, AdmissionControl, Rejection
+from app.core.coalescing import InsertCoalescer
+from app.core.jobs import IngestJobs
+from app.core.metrics import (
+    ADMISSION_REJECTED,
+    POOL_ACQUIRE_SECONDS,
+    READS_ROUTED,
+)
+from app.core.pool import Connect, Pool
+from app.core.replicas import ReplicaSet, parse_lsn
+from app.core.timing import record_phase, timed_phase
 
+# Request timing phase of waiting for a pooled connection.
+ACQUIRE_PHASE = 'acquire'
 
-async def db_connection() -> AsyncGenerator[AsyncConnection[Any], None]:
-    """Provide asyncpg connection to Postgres database."""
-    async with await AsyncConnection.connect(
-        host=config.PG_HOST,
-        port=config.PG_PORT,
-        user=config.PG_USER,
-        password=config.PG_PASSWORD,
-        dbname=config.PG_DATABASE,
-    ) as conn:
+# Request timing phase of waiting for admission by limits.
+ADMISSION_PHASE = 'admission'
+
+# Routed reads counters by whether they are served by replica.
+_READS_ROUTED = {
+    False: READS_ROUTED.labels('primary'),
+    True: READS_ROUTED.labels('replica'),
+}
+
+
+async def db_pool(request: Request) -> Pool:
+    """Provide connections pool opened in the application lifespan."""
+    return request.app.state.pool  # type: ignore[no-any-return]
+
+
+PoolDep: TypeAlias = Annotated[Pool, Depends(db_pool)]
+
+
+async def ingest_jobs(request: Request) -> IngestJobs:
+    """Provide ingest jobs queue started in the application lifespan."""
+    return request.app.state.jobs  # type: ignore[no-any-return]
+
+
+JobsDep: TypeAlias = Annotated[IngestJobs, Depends(ingest_jobs)]
+
+
+async def insert_coalescer(request: Request) -> InsertCoalescer:
+    """Provide inserts coalescer created in the application lifespan."""
+    return request.app.state.coalescer  # type: ignore[no-any-return]
+
+
+CoalescerDep: TypeAlias = Annotated[InsertCoalescer, Depends(insert_coalescer)]
+
+
+async def db_replicas(request: Request) -> ReplicaSet:
+    """Provide read replicas opened in the application lifespan."""
+    return request.app.state.replicas  # type: ignore[no-any-return]
+
+
+ReplicasDep: TypeAlias = Annotated[ReplicaSet, Depends(db_replicas)]
+
+
+async def admission_control(request: Request) -> AdmissionControl:
+    """Provide admission control created in the application lifespan."""
+    return request.app.state.admission  # type: ignore[no-any-return]
+
+
+AdmissionControlDep: TypeAlias = Annotated[
+    AdmissionControl,
+    Depends(admission_control),
+]
+
+
+async def _admit(
+    admission_control: AdmissionControl,
+    route: str,
+    table_name: str | None,
+) -> Admission:
+    with timed_phase(ADMISSION_PHASE):
+        admission = await admission_control.admit(route, table_name)
+    if isinstance(admission, Rejection):
+        ADMISSION_REJECTED.labels(route, admission).inc()
+        raise Overloaded(admission_control.retry_after)
+    return admission
+
+
+async def admitted(
+    request: Request,
+    admission_control: AdmissionControlDep,
+) -> AsyncGenerator[Admission, None]:
+    """Admit request by limits of its route and table.
+
+    Rejected requests get `503` with `Retry-After` header.
+    """
+    admission = await _admit(
+        admission_control,
+        route_template(request.scope),
+        request.path_params.get('table_name'),
+    )
+    try:
+        yield admission
+    finally:
+        admission_control.release(admission)
+
+
+AdmittedDep: TypeAlias = Annotated[Admission, Depends(admitted)]
+
+
+async def _getconn(
+    pool: Pool,
+    admission: Admission,
+    retry_after: int,
+) -> AsyncConnection[Any]:
+    started = perf_counter()
+    try:
+        return await pool.getconn(timeout=min(
+            admission.remaining(),
+            pool.timeout,
+        ))
+    except PoolTimeout:
+        raise PoolExhausted(retry_after)
+    finally:
+        acquire_seconds = perf_counter() - started
+        POOL_ACQUIRE_SECONDS.observe(acquire_seconds)
+        record_phase(ACQUIRE_PHASE, acquire_seconds)
+
+
+async def db_connection(
+    pool: PoolDep,
+    admission: AdmittedDep,
+    admission_control: AdmissionControlDep,
+) -> AsyncGenerator[AsyncConnection[Any], None]:
+    """Provide pooled connection to Postgres database.
+
+    Request waits for connection until the admission deadline.
+    """
+    conn = await _getconn(pool, admission, admission_control.retry_after)
+    try:
         yield conn
+    finally:
+        await pool.putconn(conn)
+
+
+ConnectionDep: TypeAlias = Annotated[
+    AsyncConnection[Any],
+    Depends(db_connection),
+]
+
+
+async def db_connect(
+    request: Request,
+    pool: PoolDep,
+    admission_control: AdmissionControlDep,
+) -> Connect:
+    """Provide factory of admitted pooled connections.
+
+    Unlike `db_connection`, request is admitted and gets connection only
+    for the block using the factory, if any.
+    """
+    route = route_template(request.scope)
+    table_name = request.path_params.get('table_name')
+
+    @asynccontextmanager
+    async def connect() -> AsyncIterator[AsyncConnection[Any]]:  # noqa: WPS430
+        admission = await _admit(admission_control, route, table_name)
+        try:
+            conn = await _getconn(
+                pool,
+                admission,
+                admission_control.retry_after,
+            )
+            try:
+                yield conn
+            finally:
+                await pool.putconn(conn)
+        finally:
+            admission_control.release(admission)
+
+    return connect
+
+
+ConnectDep: TypeAlias = Annotated[Connect, Depends(db_connect)]
+
+
+class ReadConnection(NamedTuple):
+    """Connection for read-only operations."""
+
+    conn: AsyncConnection[Any]
+
+    # Whether connection is to replica, so reads may be stale.
+    replica: bool
+
+
+async def db_read_connection(
+    pool: PoolDep,
+    replicas: ReplicasDep,
+    admission: AdmittedDep,
+    admission_control: AdmissionControlDep,
+    x_min_lsn: Annotated[str | None, Header()] = None,
+) -> AsyncGenerator[ReadConnection, None]:
+    """Provide pooled connection to replica or, if none fits, primary.
+
+    Replica must replay WAL position passed in `X-Min-LSN` header, if any,
+    to read writes made up to it.
+    """
+    min_lsn = parse_lsn(x_min_lsn) if x_min_lsn is not None else 0
+    if min_lsn is None:
+        raise InvalidLsn(x_min_lsn or '')
+
+    replica = replicas.choose(min_lsn)
+    if replica is not None:
+        pool = replica.pool
+    _READS_ROUTED[replica is not None].inc()
+
+    conn = await _getconn(pool, admission, admission_control.retry_after)
+    try:
+        yield ReadConnection(conn=conn, replica=replica is not None)
+    finally:
+        await pool.putconn(conn)
+
+
+ReadConnectionDep: TypeAlias = Annotated[
+    ReadConnection,
+    Depends(db_read_connection),
+]
@@ -0,0 +1,382 @@
+"""Response bodies encoders.
+
+Rows are encoded batch by batch straight from cursor tuples, JSON is
+encoded with orjson. Encoders for MessagePack and Apache Arrow are
+available only if `msgpack` and `pyarrow` packages are installed.
+"""
+
+import csv
+import io
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, Iterable, TypeAlias
+
+import orjson
+from fastapi.responses import Response
+from psycopg import postgres
+
+from app.core.models import ColumnInfo
+from app.core.rows import RowBatch
+from app.core.timing import record_phase, timed_phase
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+Batches: TypeAlias = AsyncIterator[RowBatch]
+Encoder: TypeAlias = Callable[[Batches], AsyncIterator[bytes]]
+
+JSON_MEDIA_TYPE = 'application/json'
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+CSV_MEDIA_TYPE = 'text/csv'
+MSGPACK_MEDIA_TYPE = 'application/vnd.msgpack'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Request timing phase of encoding response body.
+SERIALIZE_PHASE = 'serialize'
+
+
+# Postgres types which values are not encoded by CSV and Arrow as is.
+_TEXT_OIDS = frozenset(
+    postgres.types[type_name].oid for type_name in ('json', 'jsonb', 'bytea')
+)
+
+
+def _type_oid(type_name: str) -> int:
+    type_info = postgres.types.get(type_name)
+    return type_info.oid if type_info is not None else 0
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (bytes, memoryview)):
+        return '\\x{0}'.format(bytes(value).hex())
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode value as JSON.
+
+    Dates, times and UUIDs are encoded as ISO strings, bytes as hex in
+    Postgres format, decimals and other values without JSON counterpart
+    as their string form.
+    """
+    return orjson.dumps(value, default=_json_default)
+
+
+def _to_text(value: Any) -> Any:
+    if value is None or isinstance(value, str):
+        return value
+    elif isinstance(value, (dict, list)):
+        return dumps(value).decode()
+    return _json_default(value)
+
+
+def _text_rows(batch: RowBatch) -> Iterable[Iterable[Any]]:
+    """Convert values that have no plain text form: JSON and bytes."""
+    if batch.types:
+        indices = [
+            index for index, oid in enumerate(batch.types) if oid in _TEXT_OIDS
+        ]
+        if not indices:
+            return batch.rows
+        return (
+            [
+                _to_text(value) if index in indices else value
+                for index, value in enumerate(row)
+            ]
+            for row in batch.rows
+        )
+
+    return (
+        [
+            _to_text(value)
+            if isinstance(value, (dict, list, bytes)) else value
+            for value in row
+        ]
+        for row in batch.rows
+    )
+
+
+async def encode_json(batches: Batches) -> AsyncIterator[bytes]:
+    """Encode rows as `TableData` JSON object, chunk per batch."""
+    yield b'{"rows":['
+    separator = b''
+    async for batch in batches:
+        if not batch.rows:
+            continue
+        # Batch is encoded as array in one call, brackets are stripped.
+        yield separator + dumps([
+            dict(zip(batch.columns, row)) for row in batch.rows
+        ])[1:-1]
+        separator = b','
+    yield b']}'
+
+
+async def encode_ndjson(batches: Batches) -> AsyncIterator[bytes]:
+    """Encode rows as newline delimited JSON objects, chunk per batch."""
+    async for batch in batches:
+        yield b''.join(
+            orjson.dumps(
+                dict(zip(batch.columns, row)),
+                default=_json_default,
+                option=orjson.OPT_APPEND_NEWLINE,
+            )
+            for row in batch.rows
+        )
+
+
+async def encode_csv(batches: Batches) -> AsyncIterator[bytes]:
+    """Encode rows as CSV with header, chunk per batch."""
+    header_written = False
+    async for batch in batches:
+        chunk = io.StringIO()
+        writer = csv.writer(chunk)
+        if not header_written:
+            writer.writerow(batch.columns)
+            header_written = True
+        writer.writerows(_text_rows(batch))
+        yield chunk.getvalue().encode()
+
+
+async def encode_msgpack(batches: Batches) -> AsyncIterator[bytes]:
+    """Encode rows as MessagePack objects stream.
+
+    The first object is columns names array, each next one is row values
+    array in columns order.
+    """
+    packer = msgpack.Packer(default=str)
+    columns_written = False
+    async for batch in batches:
+        chunk = bytearray()
+        if not columns_written:
+            chunk += packer.pack(batch.columns)
+            columns_written = True
+        for row in batch.rows:
+            chunk += packer.pack(row)
+        yield bytes(chunk)
+
+
+def _arrow_types() -> dict[int, Any]:
+    if pyarrow is None:  # pragma: no cover
+        return {}
+
+    pg_types = postgres.types
+    return {
+        pg_types['bool'].oid: pyarrow.bool_(),
+        pg_types['int2'].oid: pyarrow.int16(),
+        pg_types['int4'].oid: pyarrow.int32(),
+        pg_types['int8'].oid: pyarrow.int64(),
+        pg_types['float4'].oid: pyarrow.float32(),
+        pg_types['float8'].oid: pyarrow.float64(),
+        pg_types['text'].oid: pyarrow.string(),
+        pg_types['varchar'].oid: pyarrow.string(),
+        pg_types['bytea'].oid: pyarrow.binary(),
+        pg_types['date'].oid: pyarrow.date32(),
+        pg_types['timestamp'].oid: pyarrow.timestamp('us'),
+        pg_types['timestamptz'].oid: pyarrow.timestamp('us', tz='UTC'),
+    }
+
+
+# Arrow types for Postgres types oids. Other types are sent as strings.
+_ARROW_TYPES = _arrow_types()
+
+
+def _infer_arrow_type(values: Iterable[Any]) -> Any:
+    try:
+        arrow_type = pyarrow.array(values).type
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        return pyarrow.string()
+
+    if pyarrow.types.is_null(arrow_type):
+        return pyarrow.string()
+    elif pyarrow.types.is_nested(arrow_type):
+        return pyarrow.string()
+    return arrow_type
+
+
+def _arrow_schema(batch: RowBatch) -> Any:
+    if not batch.types:
+        # Types are unknown, infer them from the first batch values.
+        return pyarrow.schema([
+            (column, _infer_arrow_type(values))
+            for column, values in zip(batch.columns, zip(*batch.rows))
+        ])
+
+    return pyarrow.schema([
+        (column, _ARROW_TYPES.get(oid, pyarrow.string()))
+        for column, oid in zip(batch.columns, batch.types)
+    ])
+
+
+def _arrow_column(values: Iterable[Any], arrow_type: Any) -> Any:
+    if pyarrow.types.is_string(arrow_type):
+        values = map(_to_text, values)
+    return pyarrow.array(values, type=arrow_type)
+
+
+async def encode_arrow(batches: Batches) -> AsyncIterator[bytes]:
+    """Encode rows as Apache Arrow IPC stream, record batch per batch."""
+    sink = io.BytesIO()
+    writer = None
+    async for batch in batches:
+        if writer is None:
+            schema = _arrow_schema(batch)
+            writer = pyarrow.ipc.new_stream(sink, schema)
+        columns = zip(*batch.rows) if batch.rows else [[]] * len(schema)
+        writer.write_batch(pyarrow.RecordBatch.from_arrays(
+            [
+                _arrow_column(values, field.type)
+                for values, field in zip(columns, schema)
+            ],
+            schema=schema,
+        ))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+def _available_encoders() -> dict[str, Encoder]:
+    encoders: dict[str, Encoder] = {
+        JSON_MEDIA_TYPE: encode_json,
+        NDJSON_MEDIA_TYPE: encode_ndjson,
+        CSV_MEDIA_TYPE: encode_csv,
+    }
+    if msgpack is not None:
+        encoders[MSGPACK_MEDIA_TYPE] = encode_msgpack
+    if pyarrow is not None:
+        encoders[ARROW_MEDIA_TYPE] = encode_arrow
+    return encoders
+
+
+# Encoders by media type.
+ENCODERS = _available_encoders()
+
+
+def _accepted_media_types(accept: str) -> list[str]:
+    weighted: list[tuple[float, int, str]] = []
+    for position, media_range in enumerate(accept.split(',')):
+        media_type, *params = media_range.split(';')
+        weight = 1.0
+        for param in params:
+            name, _, param_value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    weight = float(param_value)
+                except ValueError:
+                    weight = 0
+        if weight > 0:
+            weighted.append((-weight, position, media_type.strip().lower()))
+
+    return [media_type for *_, media_type in sorted(weighted)]
+
+
+def negotiate(
+    accept: str | None,
+    default: str,
+    offered: Iterable[str] = (),
+) -> str | None:
+    """Choose response media type for Accept header.
+
+    Returns the most preferred of `offered` (all `ENCODERS` by default)
+    media types, `default` if header is missing or accepts anything, or
+    None if nothing offered is acceptable.
+    """
+    offered = list(offered) or list(ENCODERS)
+    if not accept:
+        return default
+
+    for media_type in _accepted_media_types(accept):
+        if media_type in {'*/*', default}:
+            return default
+        elif media_type in offered:
+            return media_type
+        elif media_type.endswith('/*'):
+            main_type = media_type[:-1]
+            for offer in offered:
+                if offer.startswith(main_type):
+                    return offer
+
+    return None
+
+
+async def encode_timed(
+    encoder: Encoder,
+    batches: Batches,
+) -> AsyncIterator[bytes]:
+    """Encode batches, recording encoding time as `serialize` phase.
+
+    Time of fetching batches from the database is left out.
+    """
+    fetch_seconds = 0.0
+
+    async def fetched() -> Batches:  # noqa: WPS430
+        nonlocal fetch_seconds
+        iterator = aiter(batches)
+        while True:  # noqa: WPS457
+            started = perf_counter()
+            batch = await anext(iterator, None)
+            fetch_seconds += perf_counter() - started
+            if batch is None:
+                return
+            yield batch
+
+    chunks = encoder(fetched())
+    while True:  # noqa: WPS457
+        started = perf_counter()
+        fetched_before = fetch_seconds
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            return
+        finally:
+            record_phase(
+                SERIALIZE_PHASE,
+                perf_counter() - started - (fetch_seconds - fetched_before),
+            )
+        yield chunk
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with `dumps`.
+
+    Content is not validated against response model, so values from
+    database are encoded as is.
+    """
+
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        """Encode content."""
+        with timed_phase(SERIALIZE_PHASE):
+            return dumps(content)
+
+
+async def single_batch(
+    rows: list[dict[str, Any]],
+    columns: list[ColumnInfo] | None = None,
+) -> AsyncIterator[RowBatch]:
+    """Make batches out of rows dicts with the same keys.
+
+    Without rows, an empty batch of `columns` is made, if they are passed:
+    formats with schema, like Arrow, need one even for no rows.
+    """
+    if rows:
+        yield RowBatch(
+            columns=list(rows[0]),
+            rows=[tuple(row.values()) for row in rows],
+        )
+    elif columns:
+        yield RowBatch(
+            columns=[column.name for column in columns],
+            rows=[],
+            types=[_type_oid(column.type) for column in columns],
+        )
@@ -30,6 +30,31 @@ class TableExists(HTTPException):
         )
 
 
+class IndexNotFound(HTTPException):
+    """Table index not found error."""
+
+    def __init__(self, table_name: str, index_name: str):
+        """Init HTTPException."""
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Table {0} has no index {1}'.format(table_name, index_name),
+        )
+
+
+class PartitionNotFound(HTTPException):
+    """Table partition not found error."""
+
+    def __init__(self, table_name: str, partition_name: str):
+        """Init HTTPException."""
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Table {0} has no partition {1}'.format(
+                table_name,
+                partition_name,
+            ),
+        )
+
+
 class PgError(HTTPException):
     """Database interaction error."""
 
@@ -39,3 +64,110 @@ class PgError(HTTPException):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail='Bad SQL query: {err}'.format(err=error),
         )
+
+
+class PoolExhausted(HTTPException):
+    """No free database connections error."""
+
+    def __init__(self, retry_after: int | None = None) -> None:
+        """Init HTTPException, advising to retry after seconds if passed."""
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='No free database connections',
+            headers=_retry_after_headers(retry_after),
+        )
+
+
+class Overloaded(HTTPException):
+    """Too many concurrent requests error."""
+
+    def __init__(self, retry_after: int) -> None:
+        """Init HTTPException, advising to retry after seconds."""
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many concurrent requests',
+            headers=_retry_after_headers(retry_after),
+        )
+
+
+def _retry_after_headers(retry_after: int | None) -> dict[str, str] | None:
+    if retry_after is None:
+        return None
+    return {'Retry-After': str(retry_after)}
+
+
+class UnsupportedMediaType(HTTPException):
+    """Request body format is not supported error."""
+
+    def __init__(self, media_type: str, supported: list[str]):
+        """Init HTTPException."""
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail='Unsupported media type {0}, expected {1}'.format(
+                media_type,
+                ', '.join(supported),
+            ),
+        )
+
+
+class UnsupportedEncoding(HTTPException):
+    """Request body content encoding is not supported error."""
+
+    def __init__(self, encoding: str, supported: list[str]):
+        """Init HTTPException."""
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail='Unsupported content encoding {0}, expected {1}'.format(
+                encoding,
+                ', '.join(supported),
+            ),
+        )
+
+
+class NotAcceptable(HTTPException):
+    """Response format requested by client is not supported error."""
+
+    def __init__(self, accept: str, supported: list[str]):
+        """Init HTTPException."""
+        super().__init__(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail='Can`t respond with {0}, available: {1}'.format(
+                accept,
+                ', '.join(supported),
+            ),
+        )
+
+
+class InvalidLsn(HTTPException):
+    """WAL position passed by client is malformed error."""
+
+    def __init__(self, lsn: str):
+        """Init HTTPException."""
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid WAL position {0}, expected like 0/16B3748'.format(
+                lsn,
+            ),
+        )
+
+
+class JobNotFound(HTTPException):
+    """Ingest job not found error."""
+
+    def __init__(self, job_id: str):
+        """Init HTTPException."""
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Job {0} doesn`t exist'.format(job_id),
+        )
+
+
+class JobsQueueFull(HTTPException):
+    """Too many queued ingest jobs error."""
+
+    def __init__(self) -> None:
+        """Init HTTPException."""
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many queued jobs',
+        )
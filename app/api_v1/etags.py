@@ -0,0 +1,43 @@
+"""Conditional requests.
+
+Read endpoints tag responses with ETag made of version of the data they
+are made of and request parameters. Clients sending it back in
+`If-None-Match` header get `304 Not Modified` while version is the same,
+without response being made. Tags are weak: compressed and plain bodies
+are equivalent.
+"""
+
+from hashlib import sha1
+
+from fastapi import Response, status
+
+
+def make_etag(version: str, *params: str) -> str:
+    """Make weak ETag of data version and response parameters."""
+    digest = sha1(
+        '\0'.join((version, *params)).encode(),
+        usedforsecurity=False,
+    )
+    return 'W/"{0}"'.format(digest.hexdigest())
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check whether `If-None-Match` header matches ETag, weakly."""
+    if not if_none_match:
+        return False
+    elif if_none_match.strip() == '*':
+        return True
+
+    opaque_tag = etag.removeprefix('W/')
+    return any(
+        tag.strip().removeprefix('W/') == opaque_tag
+        for tag in if_none_match.split(',')
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """Make `304 Not Modified` response."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={'ETag': etag},
+    )
@@ -1,16 +1,181 @@
 """FastAPI instances factory."""
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncGenerator
 
 from fastapi import APIRouter, FastAPI
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
 
+from app import config
+from app.api_v1.compression import CompressionMiddleware
+from app.api_v1.metrics import MetricsMiddleware
+from app.api_v1.routes.jobs import router as jobs_router
+from app.api_v1.routes.metrics import router as metrics_router
+from app.api_v1.routes.stats import router as stats_router
 from app.api_v1.routes.tables import router as tables_router
+from app.api_v1.timing import TimingMiddleware
+from app.core.admission import AdmissionControl
+from app.core.bulk import BulkOptions
+from app.core.cache import listen_table_changes, table_cache, table_info_cache
+from app.core.coalescing import InsertCoalescer
+from app.core.compression import GZIP_ENCODING, ZSTD_ENCODING
+from app.core.jobs import IngestJobs
+from app.core.partitions import maintain_partitions
+from app.core.pool import Pool, create_pool
+from app.core.queries import insert_statements
+from app.core.replicas import (
+    Replica,
+    ReplicaSet,
+    monitor_replicas,
+    replica_name,
+)
+
+
+def _create_pool(conninfo: str) -> Pool:
+    return create_pool(
+        conninfo,
+        min_size=config.PG_POOL_MIN_SIZE,
+        max_size=config.PG_POOL_MAX_SIZE,
+        max_idle=config.PG_POOL_MAX_IDLE,
+        max_lifetime=config.PG_POOL_MAX_LIFETIME,
+        timeout=config.PG_POOL_TIMEOUT,
+    )
+
+
+def _create_jobs_pool(conninfo: str) -> Pool:
+    # Jobs don't take connections of the requests pool, not to starve
+    # requests during bulk loads.
+    if config.JOBS_WORKERS >= config.PG_POOL_MAX_SIZE:
+        raise ValueError(
+            'JOBS_WORKERS must be less than POSTGRES_POOL_MAX_SIZE',
+        )
+    return create_pool(
+        conninfo,
+        min_size=0,
+        max_size=max(config.JOBS_WORKERS, 1),
+        max_idle=config.PG_POOL_MAX_IDLE,
+        max_lifetime=config.PG_POOL_MAX_LIFETIME,
+        timeout=config.PG_POOL_TIMEOUT,
+    )
+
+
+def _create_replicas(conninfo: str) -> ReplicaSet:
+    replicas = []
+    for dsn in config.PG_REPLICA_DSNS:
+        replica_conninfo = make_conninfo(conninfo, **conninfo_to_dict(dsn))
+        replicas.append(Replica(
+            replica_name(replica_conninfo),
+            _create_pool(replica_conninfo),
+        ))
+    return ReplicaSet(replicas, max_lag=config.PG_REPLICA_MAX_LAG)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """Open shared resources for the application lifetime."""
+    conninfo = make_conninfo(
+        host=config.PG_HOST,
+        port=config.PG_PORT,
+        user=config.PG_USER,
+        password=config.PG_PASSWORD,
+        dbname=config.PG_DATABASE,
+    )
+    jobs_pool = _create_jobs_pool(conninfo)
+    pool = _create_pool(conninfo)
+    await pool.open(wait=True)
+    app.state.pool = pool
+    await jobs_pool.open()
+
+    # Unavailable replicas don't prevent start, they are skipped until
+    # they get available.
+    replicas = _create_replicas(conninfo)
+    await replicas.open()
+    await replicas.check(timeout=config.PG_REPLICA_CHECK_INTERVAL)
+    app.state.replicas = replicas
+
+    app.state.admission = AdmissionControl(
+        route_limit=config.ADMISSION_ROUTE_LIMIT,
+        table_limit=config.ADMISSION_TABLE_LIMIT,
+        queue_size=config.ADMISSION_QUEUE_SIZE,
+        timeout=config.ADMISSION_TIMEOUT,
+        retry_after=config.ADMISSION_RETRY_AFTER,
+    )
+
+    table_cache.max_size = config.TABLE_CACHE_SIZE
+    table_cache.ttl = config.TABLE_CACHE_TTL
+    table_info_cache.max_size = config.TABLE_INFO_CACHE_SIZE
+    table_info_cache.ttl = config.TABLE_INFO_CACHE_TTL
+    insert_statements.max_size = config.INSERT_STATEMENT_CACHE_SIZE
+    bulk_options = BulkOptions(
+        values_threshold=config.INSERT_VALUES_THRESHOLD,
+        copy_threshold=config.INSERT_COPY_THRESHOLD,
+        values_chunk_size=config.INSERT_VALUES_CHUNK_SIZE,
+    )
+    app.state.coalescer = InsertCoalescer(
+        window=config.INSERT_COALESCE_WINDOW,
+        max_rows=config.INSERT_COALESCE_MAX_ROWS,
+        options=bulk_options,
+    )
+    jobs = IngestJobs(
+        workers=config.JOBS_WORKERS,
+        queue_size=config.JOBS_QUEUE_SIZE,
+        chunk_size=config.JOBS_CHUNK_SIZE,
+        history_size=config.JOBS_HISTORY_SIZE,
+        options=bulk_options,
+    )
+    jobs.start(jobs_pool)
+    app.state.jobs = jobs
+
+    tasks = [
+        asyncio.create_task(listen_table_changes(conninfo)),
+        asyncio.create_task(maintain_partitions(
+            pool,
+            config.PARTITIONS_CHECK_INTERVAL,
+        )),
+    ]
+    if replicas.replicas:
+        tasks.append(asyncio.create_task(monitor_replicas(
+            replicas,
+            config.PG_REPLICA_CHECK_INTERVAL,
+        )))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await jobs.stop()
+        await jobs_pool.close()
+        await replicas.close()
+        await pool.close()
 
 
 def create_app() -> FastAPI:
     """Create configured FastAPI instance."""
     root_router = APIRouter(prefix='/api/v1')
     root_router.include_router(tables_router)
+    root_router.include_router(stats_router)
+    root_router.include_router(jobs_router)
 
-    app = FastAPI(title='RestPG')
+    app = FastAPI(title='RestPG', lifespan=lifespan)
     app.include_router(root_router)
+    app.include_router(metrics_router)
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=config.COMPRESSION_ENCODINGS,
+        levels={
+            GZIP_ENCODING: config.COMPRESSION_GZIP_LEVEL,
+            ZSTD_ENCODING: config.COMPRESSION_ZSTD_LEVEL,
+        },
+        min_size=config.COMPRESSION_MIN_SIZE,
+    )
+    app.add_middleware(
+        TimingMiddleware,
+        server_timing=config.SERVER_TIMING,
+        slow_seconds=config.SLOW_REQUEST_SECONDS,
+        profile_rate=config.SLOW_REQUEST_PROFILE_RATE,
+    )
+    app.add_middleware(MetricsMiddleware)
     return app
@@ -0,0 +1,149 @@
+"""HTTP requests metrics.
+
+Requests are measured by ASGI middleware until the last body chunk is
+sent, so streamed responses are measured whole. Routes are labeled with
+their path templates to keep labels set bounded.
+"""
+
+from time import perf_counter
+
+from prometheus_client import Histogram
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import LATENCY_BUCKETS
+
+# Smallest payload size bucket, in bytes.
+_MIN_SIZE_BUCKET = 64
+
+# Payload size buckets count, each 4 times the previous one.
+_SIZE_BUCKETS_COUNT = 12
+
+# Payload size buckets, in bytes.
+SIZE_BUCKETS = tuple(
+    4 ** power * _MIN_SIZE_BUCKET for power in range(_SIZE_BUCKETS_COUNT)
+)
+
+# Route label of requests not matched by any route.
+UNMATCHED_ROUTE = '<unmatched>'
+
+REQUEST_SECONDS = Histogram(
+    'rest_pg_http_request_duration_seconds',
+    'HTTP requests processing time by route.',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+
+REQUEST_SIZE = Histogram(
+    'rest_pg_http_request_size_bytes',
+    'HTTP request bodies sizes by route.',
+    ['method', 'route'],
+    buckets=SIZE_BUCKETS,
+)
+
+RESPONSE_SIZE = Histogram(
+    'rest_pg_http_response_size_bytes',
+    'HTTP response bodies sizes by route.',
+    ['method', 'route'],
+    buckets=SIZE_BUCKETS,
+)
+
+
+def route_template(scope: Scope) -> str:
+    """Get path template of route that handled request."""
+    route = scope.get('route')
+    if route is None:
+        # Older Starlette doesn't keep route in scope.
+        for app_route in getattr(scope.get('app'), 'routes', ()):
+            match, _ = app_route.matches(scope)
+            if match == Match.FULL:
+                route = app_route
+                break
+
+    template = getattr(route, 'path_format', None)
+    if not isinstance(template, str):
+        return UNMATCHED_ROUTE
+    return template
+
+
+class _Exchange:
+    """Sizes and status of request being processed."""
+
+    def __init__(self, receive: Receive, send: Send) -> None:
+        """Wrap ASGI receive and send callables."""
+        self.request_size = 0
+        self.response_size = 0
+        self.status = 500
+        self._receive = receive
+        self._send = send
+
+    async def receive(self) -> Message:
+        """Receive message, counting request body size."""
+        message = await self._receive()
+        if message['type'] == 'http.request':
+            self.request_size += len(message.get('body', b''))
+        return message
+
+    async def send(self, message: Message) -> None:
+        """Send message, recording status and response body size."""
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message['type'] == 'http.response.body':
+            self.response_size += len(message.get('body', b''))
+        await self._send(message)
+
+
+# Request metrics children for method, route and status.
+_Observers = tuple[Histogram, Histogram, Histogram]
+
+
+class MetricsMiddleware:
+    """Measure HTTP requests latency and payloads sizes."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap ASGI app."""
+        self.app = app
+        self._observers: dict[tuple[str, str, int], _Observers] = {}
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Process request."""
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        exchange = _Exchange(receive, send)
+        started = perf_counter()
+        try:
+            await self.app(scope, exchange.receive, exchange.send)
+        finally:
+            seconds, request_size, response_size = self._get_observers(
+                scope['method'],
+                route_template(scope),
+                exchange.status,
+            )
+            seconds.observe(perf_counter() - started)
+            request_size.observe(exchange.request_size)
+            response_size.observe(exchange.response_size)
+
+    def _get_observers(
+        self,
+        method: str,
+        route: str,
+        status: int,
+    ) -> _Observers:
+        # Labeled children are cached, as labels lookup is relatively slow.
+        key = (method, route, status)
+        observers = self._observers.get(key)
+        if observers is None:
+            observers = (
+                REQUEST_SECONDS.labels(method, route, status),
+                REQUEST_SIZE.labels(method, route),
+                RESPONSE_SIZE.labels(method, route),
+            )
+            self._observers[key] = observers
+        return observers
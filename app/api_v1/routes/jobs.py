@@ -0,0 +1,24 @@
+"""Ingest jobs endpoints."""
+
+from fastapi import status
+from fastapi.routing import APIRouter
+
+from app.api_v1.dependencies import JobsDep
+from app.api_v1.errors import JobNotFound
+from app.api_v1.timing import TimedRoute
+from app.core.models import Job
+
+router = APIRouter(prefix='/jobs', route_class=TimedRoute)
+
+
+@router.get(
+    '/{job_id}',
+    status_code=status.HTTP_200_OK,
+)
+async def job_handler(job_id: str, jobs: JobsDep) -> Job:
+    """Get ingest job progress."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise JobNotFound(job_id)
+
+    return job
@@ -0,0 +1,18 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import Response, status
+from fastapi.routing import APIRouter
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter()
+
+
+@router.get(
+    '/metrics',
+    status_code=status.HTTP_200_OK,
+    response_class=Response,
+    include_in_schema=False,
+)
+async def metrics_handler() -> Response:
+    """Export metrics in Prometheus text format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,30 @@
+"""Service statistics endpoints."""
+
+from fastapi import status
+from fastapi.routing import APIRouter
+
+from app.api_v1.dependencies import PoolDep
+from app.api_v1.timing import TimedRoute
+from app.core.cache import table_cache
+from app.core.models import PoolStats, TableCacheStats
+from app.core.pool import pool_stats
+
+router = APIRouter(prefix='/stats', route_class=TimedRoute)
+
+
+@router.get(
+    '/pool',
+    status_code=status.HTTP_200_OK,
+)
+async def pool_stats_handler(pool: PoolDep) -> PoolStats:
+    """Get database connections pool statistics."""
+    return pool_stats(pool)
+
+
+@router.get(
+    '/table_cache',
+    status_code=status.HTTP_200_OK,
+)
+async def table_cache_stats_handler() -> TableCacheStats:
+    """Get tables metadata cache statistics."""
+    return table_cache.stats()
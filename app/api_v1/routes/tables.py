@@ -1,28 +1,146 @@
 """Tables API endpoints."""
 
-from typing import Annotated, Any, TypeAlias
+from typing import Annotated, Any, AsyncIterator
 
-from fastapi import Depends, status
+from fastapi import Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRouter
 from psycopg import AsyncConnection
+from psycopg_pool import PoolTimeout
 
-from app.api_v1.dependencies import db_connection
-from app.api_v1.errors import PgError, TableExists, TableNotFound
-from app.core.models import TableData, TableDef, TableInfo
+from app import config
+from app.api_v1.dependencies import (
+    CoalescerDep,
+    ConnectDep,
+    ConnectionDep,
+    JobsDep,
+    PoolDep,
+    ReadConnectionDep,
+    ReplicasDep,
+)
+from app.api_v1.encoders import (
+    CSV_MEDIA_TYPE,
+    ENCODERS,
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    FastJSONResponse,
+    encode_timed,
+    negotiate,
+    single_batch,
+)
+from app.api_v1.errors import (
+    IndexNotFound,
+    JobsQueueFull,
+    NotAcceptable,
+    PartitionNotFound,
+    PgError,
+    PoolExhausted,
+    TableExists,
+    TableNotFound,
+    UnsupportedEncoding,
+    UnsupportedMediaType,
+)
+from app.api_v1.etags import etag_matches, make_etag, not_modified
+from app.api_v1.timing import TimedRoute
+from app.core.cache import table_info_cache
+from app.core.compression import ENCODINGS, decompress
+from app.core.indexes import create_index, drop_index, get_indexes
+from app.core.ingest import ingest_csv, ingest_ndjson
+from app.core.models import (
+    ColumnInfo,
+    IndexDef,
+    IndexInfo,
+    IngestResult,
+    InsertedData,
+    Job,
+    PartitionInfo,
+    QueryPlan,
+    RowsCountMethod,
+    RowsQuery,
+    TableData,
+    TableDef,
+    TableInfo,
+    TablesInfo,
+    TablesInfoRequest,
+    UpsertResult,
+)
+from app.core.replicas import ReplicaSet, current_lsn, format_lsn
+from app.core.rows import (
+    explain_rows_query,
+    get_columns,
+    query_rows,
+    read_rows,
+)
 from app.core.tables import (
     DbError,
     create_table,
+    drop_partition,
     drop_table,
+    get_partitions,
     get_table_info,
-    insert_rows,
+    get_table_version,
+    get_tables_info,
+    is_table_exist,
 )
+from app.core.upsert import upsert_rows
+
+router = APIRouter(prefix='/tables', route_class=TimedRoute)
+
+_INGESTERS = {  # noqa: WPS407
+    NDJSON_MEDIA_TYPE: ingest_ndjson,
+    CSV_MEDIA_TYPE: ingest_csv,
+}
+
+# Header with WAL position of the request writes, to read them back from
+# replicas with `X-Min-LSN` header.
+WRITE_LSN_HEADER = 'X-Write-LSN'
+
+
+async def _write_lsn_headers(
+    replicas: ReplicaSet,
+    conn: AsyncConnection[Any],
+) -> dict[str, str]:
+    # Position is queried only if reads may be served by replicas.
+    if not replicas.replicas:
+        return {}
 
-router = APIRouter(prefix='/tables')
+    lsn = await current_lsn(conn)
+    if isinstance(lsn, DbError):
+        raise PgError(lsn.message)
+    return {WRITE_LSN_HEADER: format_lsn(lsn)}
+
+
+async def _table_columns(
+    table_name: str,
+    conn: AsyncConnection[Any],
+) -> list[ColumnInfo]:
+    columns = await get_columns(table_name, conn)
+    if columns is None:
+        raise TableNotFound(table_name)
+    elif isinstance(columns, DbError):
+        raise PgError(columns.message)
+    return columns
+
+
+# Registered before table creation, which would take it as table name.
+@router.post(
+    '/table_info:batch',
+    status_code=status.HTTP_200_OK,
+)
+async def tables_info_handler(
+    tables_request: TablesInfoRequest,
+    read: ReadConnectionDep,
+) -> TablesInfo:
+    """Get info of many tables at once, with estimated rows counts."""
+    tables_info = await get_tables_info(
+        tables_request.tables,
+        read.conn,
+        update_cache=not read.replica,
+    )
+    if isinstance(tables_info, DbError):
+        raise PgError(tables_info.message)
 
-ConnectionDep: TypeAlias = Annotated[
-    AsyncConnection[Any],
-    Depends(db_connection),
-]
+    return tables_info
 
 
 @router.post(
@@ -33,6 +151,8 @@ async def create_table_handler(
     table_name: str,
     table_def: TableDef,
     conn: ConnectionDep,
+    replicas: ReplicasDep,
+    response: Response,
 ) -> str:
     """Create new table in the database."""
     created = await create_table(table_name, table_def, conn)
@@ -41,26 +161,187 @@ async def create_table_handler(
     if isinstance(created, DbError):
         raise PgError(created.message)
 
+    response.headers.update(await _write_lsn_headers(replicas, conn))
     return created
 
 
 @router.put(
     '/{table_name}',
     status_code=status.HTTP_200_OK,
+    response_model=InsertedData,
+    responses={
+        status.HTTP_200_OK: {
+            'content': {media_type: {} for media_type in ENCODERS},
+        },
+    },
 )
 async def insert_rows_handler(
     table_name: str,
     table_data: TableData,
-    conn: ConnectionDep,
-) -> TableData:
-    """Insert new rows into table."""
-    inserted = await insert_rows(table_name, table_data, conn)
+    connect: ConnectDep,
+    pool: PoolDep,
+    replicas: ReplicasDep,
+    coalescer: CoalescerDep,
+    accept: Annotated[str | None, Header()] = None,
+) -> FastJSONResponse | StreamingResponse:
+    """Insert new rows into table.
+
+    Inserted rows are returned in format chosen by `Accept` header, the
+    strategy is passed in `X-Insert-Strategy` header for formats other
+    than JSON. Rows are encoded without validation against the response
+    model. Small inserts may be written along with concurrent ones, by
+    the connection of one of them.
+    """
+    media_type = negotiate(accept, JSON_MEDIA_TYPE)
+    if media_type is None:
+        raise NotAcceptable(accept or '', list(ENCODERS))
+
+    inserted = await coalescer.insert(table_name, table_data, connect)
     if inserted is None:
         raise TableNotFound(table_name)
     elif isinstance(inserted, DbError):
         raise PgError(inserted.message)
 
-    return inserted
+    headers: dict[str, str] = {}
+    columns: list[ColumnInfo] | None = None
+    written_lsn = bool(replicas.replicas)
+    empty_batch = media_type != JSON_MEDIA_TYPE and not inserted.rows
+    if written_lsn or empty_batch:
+        # Rows are written already: the connection isn't admitted again,
+        # not to reject the request after that.
+        try:
+            async with pool.connection() as conn:
+                headers = await _write_lsn_headers(replicas, conn)
+                if empty_batch:
+                    columns = await _table_columns(table_name, conn)
+        except PoolTimeout:
+            raise PoolExhausted(config.ADMISSION_RETRY_AFTER)
+
+    if media_type == JSON_MEDIA_TYPE:
+        return FastJSONResponse(
+            {'rows': inserted.rows, 'strategy': inserted.strategy},
+            headers=headers,
+        )
+
+    headers['X-Insert-Strategy'] = str(inserted.strategy or '')
+    return StreamingResponse(
+        encode_timed(
+            ENCODERS[media_type],
+            single_batch(inserted.rows, columns),
+        ),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+@router.post(
+    '/{table_name}/ingest',
+    status_code=status.HTTP_200_OK,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                media_type: {'schema': {'type': 'string'}}
+                for media_type in _INGESTERS
+            },
+        },
+    },
+)
+async def ingest_rows_handler(
+    table_name: str,
+    request: Request,
+    conn: ConnectionDep,
+    replicas: ReplicasDep,
+    response: Response,
+) -> IngestResult:
+    """Load rows streamed as NDJSON or CSV with header into table.
+
+    Body compressed with gzip or zstd is decompressed on the fly, as
+    specified by `Content-Encoding` header.
+    """
+    media_type = request.headers.get('content-type', '')
+    media_type = media_type.partition(';')[0].strip().lower()
+    ingester = _INGESTERS.get(media_type)
+    if ingester is None:
+        raise UnsupportedMediaType(media_type, list(_INGESTERS))
+
+    chunks: AsyncIterator[bytes] = request.stream()
+    encoding = request.headers.get('content-encoding', 'identity')
+    encoding = encoding.strip().lower()
+    if encoding in ENCODINGS:
+        chunks = decompress(chunks, encoding)
+    elif encoding != 'identity':
+        raise UnsupportedEncoding(encoding, ENCODINGS)
+
+    ingested = await ingester(table_name, chunks, conn)
+    if ingested is None:
+        raise TableNotFound(table_name)
+    elif isinstance(ingested, DbError):
+        raise PgError(ingested.message)
+
+    response.headers.update(await _write_lsn_headers(replicas, conn))
+    return ingested
+
+
+@router.post(
+    '/{table_name}/upsert',
+    status_code=status.HTTP_200_OK,
+)
+async def upsert_rows_handler(
+    table_name: str,
+    table_data: TableData,
+    conn: ConnectionDep,
+    replicas: ReplicasDep,
+    response: Response,
+    key: Annotated[list[str] | None, Query()] = None,
+) -> UpsertResult:
+    """Insert rows or update existing ones with the same key.
+
+    Key is the table primary key, unless columns of unique constraint are
+    passed in `key` parameters.
+    """
+    merged = await upsert_rows(table_name, table_data, conn, key)
+    if merged is None:
+        raise TableNotFound(table_name)
+    elif isinstance(merged, DbError):
+        raise PgError(merged.message)
+
+    response.headers.update(await _write_lsn_headers(replicas, conn))
+    return merged
+
+
+@router.post(
+    '/{table_name}/jobs',
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_job_handler(
+    table_name: str,
+    table_data: TableData,
+    conn: ConnectionDep,
+    jobs: JobsDep,
+    request: Request,
+    response: Response,
+) -> Job:
+    """Insert rows into table in background.
+
+    Rows are inserted and committed in chunks, progress is reported by
+    the job endpoint passed in `Location` header.
+    """
+    table_exists = await is_table_exist(table_name, conn)
+    if not table_exists:
+        raise TableNotFound(table_name)
+    elif isinstance(table_exists, DbError):
+        raise PgError(table_exists.message)
+
+    job = jobs.submit(table_name, table_data.rows)
+    if job is None:
+        raise JobsQueueFull()
+
+    response.headers['Location'] = str(request.url_for(
+        'job_handler',
+        job_id=job.id,
+    ))
+    return job
 
 
 @router.delete(
@@ -70,6 +351,8 @@ async def insert_rows_handler(
 async def drop_table_handler(
     table_name: str,
     conn: ConnectionDep,
+    replicas: ReplicasDep,
+    response: Response,
 ) -> str:
     """Remove table from database."""
     dropped = await drop_table(table_name, conn)
@@ -78,22 +361,285 @@ async def drop_table_handler(
     elif isinstance(dropped, DbError):
         raise PgError(dropped.message)
 
+    response.headers.update(await _write_lsn_headers(replicas, conn))
     return dropped
 
 
 @router.get(
     '/table_info/{table_name}',
     status_code=status.HTTP_200_OK,
+    response_model=TableInfo,
+    responses={status.HTTP_304_NOT_MODIFIED: {'model': None}},
 )
-async def table_info_handler(
+async def table_info_handler(  # noqa: WPS211
     table_name: str,
-    conn: ConnectionDep,
-) -> TableInfo:
-    """Get table metainfo."""
-    table_info = await get_table_info(table_name, conn)
-    if table_info is None:
+    read: ReadConnectionDep,
+    response: Response,
+    count: RowsCountMethod = RowsCountMethod.exact,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> TableInfo | Response:
+    """Get table metainfo, from replica if available.
+
+    Response is tagged with table version, `304 Not Modified` is returned
+    while the version matches `If-None-Match`. Info is cached for a short
+    time while the version is unchanged.
+    """
+    version = await get_table_version(table_name, read.conn)
+    if version is None:
         raise TableNotFound(table_name)
-    elif isinstance(table_info, DbError):
-        raise PgError(table_info.message)
+    elif isinstance(version, DbError):
+        raise PgError(version.message)
+
+    etag = make_etag(version, count.value)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    table_info = table_info_cache.get((table_name, count), version)
+    if table_info is None:
+        fetched = await get_table_info(
+            table_name,
+            read.conn,
+            count,
+            config.TABLE_INFO_EXACT_THRESHOLD,
+            update_cache=not read.replica,
+        )
+        if fetched is None:
+            raise TableNotFound(table_name)
+        elif isinstance(fetched, DbError):
+            raise PgError(fetched.message)
+        table_info = fetched
+        table_info_cache.put((table_name, count), version, table_info)
 
+    response.headers['ETag'] = etag
     return table_info
+
+
+@router.get(
+    '/{table_name}/rows',
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            'content': {media_type: {} for media_type in ENCODERS},
+        },
+    },
+)
+async def read_rows_handler(
+    table_name: str,
+    read: ReadConnectionDep,
+    after: Annotated[list[str] | None, Query()] = None,
+    limit: Annotated[int | None, Query(ge=1)] = None,
+    accept: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """Stream table rows ordered by primary key.
+
+    Rows are encoded in format chosen by `Accept` header, NDJSON by
+    default. Pass primary key values of the last received row in `after`
+    to get the next page. Rows are read from replica if available.
+    """
+    media_type = negotiate(accept, NDJSON_MEDIA_TYPE)
+    if media_type is None:
+        raise NotAcceptable(accept or '', list(ENCODERS))
+
+    batches = await read_rows(
+        table_name,
+        read.conn,
+        after=after,
+        limit=limit,
+        batch_size=config.ROWS_FETCH_SIZE,
+        update_cache=not read.replica,
+    )
+    if batches is None:
+        raise TableNotFound(table_name)
+    elif isinstance(batches, DbError):
+        raise PgError(batches.message)
+
+    return StreamingResponse(
+        encode_timed(ENCODERS[media_type], batches),
+        media_type=media_type,
+    )
+
+
+@router.post(
+    '/{table_name}/query',
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            'content': {media_type: {} for media_type in ENCODERS},
+        },
+    },
+)
+async def query_rows_handler(
+    table_name: str,
+    rows_query: RowsQuery,
+    read: ReadConnectionDep,
+    accept: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """Stream table rows matching filters, sorted and projected.
+
+    Rows are encoded in format chosen by `Accept` header, NDJSON by
+    default. Rows are read from replica if available.
+    """
+    media_type = negotiate(accept, NDJSON_MEDIA_TYPE)
+    if media_type is None:
+        raise NotAcceptable(accept or '', list(ENCODERS))
+
+    batches = await query_rows(
+        table_name,
+        rows_query,
+        read.conn,
+        batch_size=config.ROWS_FETCH_SIZE,
+        update_cache=not read.replica,
+    )
+    if batches is None:
+        raise TableNotFound(table_name)
+    elif isinstance(batches, DbError):
+        raise PgError(batches.message)
+
+    return StreamingResponse(
+        encode_timed(ENCODERS[media_type], batches),
+        media_type=media_type,
+    )
+
+
+@router.post(
+    '/{table_name}/query:explain',
+    status_code=status.HTTP_200_OK,
+)
+async def explain_query_handler(
+    table_name: str,
+    rows_query: RowsQuery,
+    read: ReadConnectionDep,
+    analyze: bool = False,
+) -> QueryPlan:
+    """Get rows query plan, executing the query with `analyze`."""
+    plan = await explain_rows_query(
+        table_name,
+        rows_query,
+        read.conn,
+        analyze,
+        update_cache=not read.replica,
+    )
+    if plan is None:
+        raise TableNotFound(table_name)
+    elif isinstance(plan, DbError):
+        raise PgError(plan.message)
+
+    return QueryPlan(plan=plan)
+
+
+@router.get(
+    '/{table_name}/indexes',
+    status_code=status.HTTP_200_OK,
+)
+async def indexes_handler(
+    table_name: str,
+    conn: ConnectionDep,
+) -> list[IndexInfo]:
+    """Get table indexes with sizes and usage statistics."""
+    indexes = await get_indexes(table_name, conn)
+    if indexes is None:
+        raise TableNotFound(table_name)
+    elif isinstance(indexes, DbError):
+        raise PgError(indexes.message)
+
+    return indexes
+
+
+@router.post(
+    '/{table_name}/indexes',
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_index_handler(  # noqa: WPS211
+    table_name: str,
+    index_def: IndexDef,
+    conn: ConnectionDep,
+    replicas: ReplicasDep,
+    response: Response,
+    concurrently: bool = True,
+) -> IndexInfo:
+    """Build table index.
+
+    Index is built `concurrently` by default, without blocking writes to
+    the table.
+    """
+    index = await create_index(table_name, index_def, conn, concurrently)
+    if index is None:
+        raise TableNotFound(table_name)
+    elif isinstance(index, DbError):
+        raise PgError(index.message)
+
+    response.headers.update(await _write_lsn_headers(replicas, conn))
+    return index
+
+
+@router.delete(
+    '/{table_name}/indexes/{index_name}',
+    status_code=status.HTTP_200_OK,
+)
+async def drop_index_handler(  # noqa: WPS211
+    table_name: str,
+    index_name: str,
+    conn: ConnectionDep,
+    replicas: ReplicasDep,
+    response: Response,
+    concurrently: bool = True,
+) -> str:
+    """Drop table index, `concurrently` by default."""
+    dropped = await drop_index(table_name, index_name, conn, concurrently)
+    if dropped is None:
+        raise IndexNotFound(table_name, index_name)
+    elif isinstance(dropped, DbError):
+        raise PgError(dropped.message)
+
+    response.headers.update(await _write_lsn_headers(replicas, conn))
+    return dropped
+
+
+@router.get(
+    '/{table_name}/partitions',
+    status_code=status.HTTP_200_OK,
+)
+async def partitions_handler(
+    table_name: str,
+    conn: ConnectionDep,
+) -> list[PartitionInfo]:
+    """Get table partitions with their bounds."""
+    partitions = await get_partitions(table_name, conn)
+    if partitions is None:
+        raise TableNotFound(table_name)
+    elif isinstance(partitions, DbError):
+        raise PgError(partitions.message)
+
+    return partitions
+
+
+@router.delete(
+    '/{table_name}/partitions/{partition_name}',
+    status_code=status.HTTP_200_OK,
+)
+async def drop_partition_handler(  # noqa: WPS211
+    table_name: str,
+    partition_name: str,
+    conn: ConnectionDep,
+    replicas: ReplicasDep,
+    response: Response,
+    detach_only: bool = False,
+    concurrently: bool = False,
+) -> str:
+    """Detach table partition and drop it, unless `detach_only` is set."""
+    dropped = await drop_partition(
+        table_name,
+        partition_name,
+        conn,
+        detach_only,
+        concurrently,
+    )
+    if dropped is None:
+        raise PartitionNotFound(table_name, partition_name)
+    elif isinstance(dropped, DbError):
+        raise PgError(dropped.message)
+
+    response.headers.update(await _write_lsn_headers(replicas, conn))
+    return dropped
@@ -0,0 +1,239 @@
+"""HTTP requests phases timing.
+
+ASGI middleware starts request timing, which pooled connections and
+database operations record their phases into, see `app.core.timing`.
+Phases finished before response headers are returned in `Server-Timing`
+header, along with `app` phase: time until headers. Routes of `TimedRoute`
+class record `parse` and `serialize` phases too. Requests slower than
+threshold are logged as JSON with all phases, including `response` phase
+of sending the body, and executed statements texts.
+
+A fraction of requests can be profiled with pyinstrument, profiles of the
+slow ones are logged too. One request is profiled at a time.
+"""
+
+import json
+import logging
+import random
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+from typing import Any, Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api_v1.encoders import SERIALIZE_PHASE
+from app.api_v1.metrics import route_template
+from app.core.timing import (
+    RequestTiming,
+    current_timing,
+    record_phase,
+    start_timing,
+    stop_timing,
+)
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover
+    _HAS_PYINSTRUMENT = False
+else:
+    _HAS_PYINSTRUMENT = True
+
+logger = logging.getLogger(__name__)
+
+# Phase of request handling until response headers.
+APP_PHASE = 'app'
+
+# Phase of sending response body.
+RESPONSE_PHASE = 'response'
+
+# Phase of reading and validating request parameters and body.
+PARSE_PHASE = 'parse'
+
+# Time by `perf_counter` the current request endpoint returned at.
+_endpoint_returned: ContextVar[float | None] = ContextVar(
+    'endpoint_returned',
+    default=None,
+)
+
+
+def server_timing(timing: RequestTiming, app_seconds: float) -> str:
+    """Format phases as `Server-Timing` header value, in milliseconds."""
+    metrics = [
+        '{0};dur={1:.2f}'.format(name, seconds * 1000)
+        for name, seconds in timing.phases.items()
+    ]
+    metrics.append('{0};dur={1:.2f}'.format(APP_PHASE, app_seconds * 1000))
+    return ', '.join(metrics)
+
+
+class TimingMiddleware:
+    """Time requests phases, report them and log slow requests."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = False,
+        slow_seconds: float = 0,
+        profile_rate: float = 0,
+    ) -> None:
+        """Wrap ASGI app.
+
+        Phases are returned in headers with `server_timing`, requests
+        slower than `slow_seconds` are logged, unless it is 0.
+        `profile_rate` of requests are profiled, if pyinstrument is
+        installed.
+        """
+        self.app = app
+        self.server_timing = server_timing
+        self.slow_seconds = slow_seconds
+        self.profile_rate = profile_rate if _HAS_PYINSTRUMENT else 0
+        self._profiling = False
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Process request."""
+        enabled = self.server_timing or self.slow_seconds
+        if scope['type'] != 'http' or not enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = self._start_profiler()
+        timing, token = start_timing()
+        response_started = 0.0
+        status = 500
+
+        async def send_timed(message: Message) -> None:  # noqa: WPS430
+            nonlocal response_started, status
+            if message['type'] == 'http.response.start':
+                response_started = timing.elapsed()
+                status = message['status']
+                if self.server_timing:
+                    message = _with_header(
+                        message,
+                        b'server-timing',
+                        server_timing(timing, response_started).encode(),
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            stop_timing(token)
+            total = timing.elapsed()
+            if profiler is not None:
+                profiler.stop()
+                self._profiling = False
+
+            if self.slow_seconds and total >= self.slow_seconds:
+                timing.add_phase(APP_PHASE, response_started or total)
+                if response_started:
+                    timing.add_phase(RESPONSE_PHASE, total - response_started)
+                self._log_slow(scope, status, total, timing, profiler)
+
+    def _start_profiler(self) -> Any:
+        sampled = random.random() < self.profile_rate  # noqa: S311
+        if self._profiling or not self.slow_seconds or not sampled:
+            return None
+
+        self._profiling = True
+        profiler = Profiler(async_mode='enabled')
+        profiler.start()
+        return profiler
+
+    def _log_slow(  # noqa: WPS211
+        self,
+        scope: Scope,
+        status: int,
+        total: float,
+        timing: RequestTiming,
+        profiler: Any,
+    ) -> None:
+        record = {
+            'event': 'slow_request',
+            'method': scope['method'],
+            'route': route_template(scope),
+            'path': scope['path'],
+            'status': status,
+            'total_ms': round(total * 1000, 2),
+            'phases_ms': {
+                name: round(seconds * 1000, 2)
+                for name, seconds in timing.phases.items()
+            },
+            'statements': timing.statement_shapes(),
+        }
+        if profiler is not None:
+            record['profile'] = profiler.output_text()
+        logger.warning(json.dumps(record))
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    if not iscoroutinefunction(endpoint):
+        return endpoint
+
+    @wraps(endpoint)
+    async def timed_endpoint(*args: Any, **kwargs: Any) -> Any:  # noqa: WPS430
+        timing = current_timing()
+        if timing is not None:
+            # Time until the endpoint not taken by other phases, like
+            # waiting for a connection, is spent parsing the request.
+            timing.add_phase(
+                PARSE_PHASE,
+                timing.elapsed() - sum(timing.phases.values()),
+            )
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            _endpoint_returned.set(perf_counter())
+
+    return timed_endpoint
+
+
+class TimedRoute(APIRoute):
+    """Route recording request parsing and response serialisation phases.
+
+    Parsing lasts until the endpoint is called, serialisation from the
+    endpoint return until the response is made: validation by response
+    model and rendering. Streamed bodies are timed by `encode_timed`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        endpoint: Callable[..., Any],
+        **kwargs: Any,
+    ) -> None:
+        """Init route of timed endpoint."""
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(
+        self,
+    ) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        """Get handler recording serialisation phase."""
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:  # noqa: WPS430
+            token = _endpoint_returned.set(None)
+            try:
+                response = await handler(request)
+                returned = _endpoint_returned.get()
+                if returned is not None:
+                    record_phase(SERIALIZE_PHASE, perf_counter() - returned)
+                return response
+            finally:
+                _endpoint_returned.reset(token)
+
+        return timed_handler
+
+
+def _with_header(message: Message, name: bytes, value: bytes) -> Message:
+    headers = list(message.get('headers', []))
+    headers.append((name, value))
+    return {**message, 'headers': headers}
@@ -18,3 +18,168 @@ PG_USER = environ['POSTGRES_USER']
 PG_PASSWORD = environ['POSTGRES_PASSWORD']
 
 PG_DATABASE = environ['POSTGRES_DB']
+
+# Connections pool settings
+
+PG_POOL_MIN_SIZE = int(environ.get('POSTGRES_POOL_MIN_SIZE', 2))
+
+PG_POOL_MAX_SIZE = int(environ.get('POSTGRES_POOL_MAX_SIZE', 10))
+
+# Seconds before an unused connection above `PG_POOL_MIN_SIZE` is closed
+PG_POOL_MAX_IDLE = float(environ.get('POSTGRES_POOL_MAX_IDLE', 600))
+
+# Seconds before a connection is recycled
+PG_POOL_MAX_LIFETIME = float(environ.get('POSTGRES_POOL_MAX_LIFETIME', 3600))
+
+# Seconds to wait for a free connection before giving up
+PG_POOL_TIMEOUT = float(environ.get('POSTGRES_POOL_TIMEOUT', 30))
+
+# Admission control settings
+
+# Requests of a route using database at once, 0 disables the limit
+ADMISSION_ROUTE_LIMIT = int(
+    environ.get('ADMISSION_ROUTE_LIMIT', PG_POOL_MAX_SIZE),
+)
+
+# Requests to a table using database at once, 0 disables the limit
+ADMISSION_TABLE_LIMIT = int(
+    environ.get('ADMISSION_TABLE_LIMIT', max(PG_POOL_MAX_SIZE // 2, 1)),
+)
+
+# Requests waiting for each limit, more are rejected at once
+ADMISSION_QUEUE_SIZE = int(environ.get('ADMISSION_QUEUE_SIZE', 100))
+
+# Seconds request waits for limits and a connection before rejection
+ADMISSION_TIMEOUT = float(environ.get('ADMISSION_TIMEOUT', 5))
+
+# Seconds rejected clients are advised to retry after
+ADMISSION_RETRY_AFTER = int(environ.get('ADMISSION_RETRY_AFTER', 1))
+
+# Read replicas settings
+
+# Replicas connection strings separated by `;`, unset parameters are taken
+# from the primary ones. Pools are sized as the primary pool.
+PG_REPLICA_DSNS = [
+    dsn
+    for dsn in environ.get('POSTGRES_REPLICA_DSNS', '').split(';')
+    if dsn.strip()
+]
+
+# Replicas lagging behind the primary for longer, in seconds, are skipped
+PG_REPLICA_MAX_LAG = float(environ.get('POSTGRES_REPLICA_MAX_LAG', 5))
+
+# Seconds between replicas lag checks
+PG_REPLICA_CHECK_INTERVAL = float(
+    environ.get('POSTGRES_REPLICA_CHECK_INTERVAL', 1),
+)
+
+# Rows insert settings
+
+# Batches with fewer rows are inserted row by row
+INSERT_VALUES_THRESHOLD = int(environ.get('INSERT_VALUES_THRESHOLD', 2))
+
+# Batches with at least that many rows are loaded with COPY
+INSERT_COPY_THRESHOLD = int(environ.get('INSERT_COPY_THRESHOLD', 100))
+
+# Rows per multi-row INSERT statement
+INSERT_VALUES_CHUNK_SIZE = int(environ.get('INSERT_VALUES_CHUNK_SIZE', 500))
+
+# Maximum cached rendered insert statements
+INSERT_STATEMENT_CACHE_SIZE = int(
+    environ.get('INSERT_STATEMENT_CACHE_SIZE', 1000),
+)
+
+# Seconds concurrent small inserts into the same table are collected to
+# be written together while the table is being written, 0 disables
+# coalescing
+INSERT_COALESCE_WINDOW = float(environ.get('INSERT_COALESCE_WINDOW', 0))
+
+# Coalesced inserts batch is written once it has that many rows, larger
+# inserts are written on their own
+INSERT_COALESCE_MAX_ROWS = int(environ.get('INSERT_COALESCE_MAX_ROWS', 1000))
+
+# Ingest jobs settings
+
+# Jobs run at once, each holds at most one connection of jobs own pool.
+# Must be less than `PG_POOL_MAX_SIZE`
+JOBS_WORKERS = int(environ.get('JOBS_WORKERS', 2))
+
+# Jobs waiting for a worker, more are rejected
+JOBS_QUEUE_SIZE = int(environ.get('JOBS_QUEUE_SIZE', 100))
+
+# Rows inserted and committed at once
+JOBS_CHUNK_SIZE = int(environ.get('JOBS_CHUNK_SIZE', 10000))
+
+# Finished jobs kept for progress requests
+JOBS_HISTORY_SIZE = int(environ.get('JOBS_HISTORY_SIZE', 1000))
+
+# Tables metadata cache settings
+
+# Maximum cached tables
+TABLE_CACHE_SIZE = int(environ.get('TABLE_CACHE_SIZE', 10000))
+
+# Seconds before cached table metadata is reloaded
+TABLE_CACHE_TTL = float(environ.get('TABLE_CACHE_TTL', 60))
+
+# Table info settings
+
+# Tables estimated to have fewer rows are counted exactly in `auto` mode
+TABLE_INFO_EXACT_THRESHOLD = int(
+    environ.get('TABLE_INFO_EXACT_THRESHOLD', 100000),
+)
+
+# Maximum cached table info responses
+TABLE_INFO_CACHE_SIZE = int(environ.get('TABLE_INFO_CACHE_SIZE', 1000))
+
+# Seconds table info is cached while table version is unchanged, 0
+# disables the cache
+TABLE_INFO_CACHE_TTL = float(environ.get('TABLE_INFO_CACHE_TTL', 5))
+
+# Partitioning settings
+
+# Seconds between creating upcoming range partitions
+PARTITIONS_CHECK_INTERVAL = float(
+    environ.get('PARTITIONS_CHECK_INTERVAL', 3600),
+)
+
+# Rows reading settings
+
+# Rows fetched from the server-side cursor at once
+ROWS_FETCH_SIZE = int(environ.get('ROWS_FETCH_SIZE', 1000))
+
+# Responses compression settings
+
+# Content encodings offered to clients separated by `,`, in order of
+# preference, empty disables compression. `zstd` requires zstandard.
+COMPRESSION_ENCODINGS = [
+    encoding.strip().lower()
+    for encoding in environ.get(
+        'COMPRESSION_ENCODINGS',
+        'zstd,gzip',
+    ).split(',')
+    if encoding.strip()
+]
+
+# Responses with fewer bytes are not compressed, streamed responses are
+# compressed unless the whole body fits into the first chunk
+COMPRESSION_MIN_SIZE = int(environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+# Compression levels: 1-9 for gzip and 1-22 for zstd
+COMPRESSION_GZIP_LEVEL = int(environ.get('COMPRESSION_GZIP_LEVEL', 6))
+
+COMPRESSION_ZSTD_LEVEL = int(environ.get('COMPRESSION_ZSTD_LEVEL', 3))
+
+# Requests timing settings
+
+# Return phases timing in `Server-Timing` response header
+SERVER_TIMING = environ.get('SERVER_TIMING', '').lower() in {'1', 'true'}
+
+# Requests taking longer, in seconds, are logged with phases timing, 0
+# disables the log
+SLOW_REQUEST_SECONDS = float(environ.get('SLOW_REQUEST_SECONDS', 1))
+
+# Fraction of requests profiled to log profiles of slow ones, requires
+# pyinstrument
+SLOW_REQUEST_PROFILE_RATE = float(
+    environ.get('SLOW_REQUEST_PROFILE_RATE', 0),
+)
@@ -0,0 +1,170 @@
+"""Admission control.
+
+Requests take slots of their table and route before getting a pooled
+connection. Each limit admits a fixed number of requests at once, the
+others wait in a bounded queue until the deadline, that also bounds
+waiting for a connection. Requests over the queue size are rejected
+right away: the service sheds load before Postgres gets overloaded and
+admitted requests keep their latency.
+"""
+
+import asyncio
+from enum import StrEnum
+from time import perf_counter
+from typing import NamedTuple
+
+from app.core.metrics import admission_waiting
+
+
+class Rejection(StrEnum):
+    """Reasons to reject request."""
+
+    # Too many requests wait for the limit.
+    queue_full = 'queue_full'
+
+    # Request waited until the deadline.
+    timeout = 'timeout'
+
+
+class Limiter:
+    """Concurrency limit with bounded wait queue."""
+
+    def __init__(self, limit: int, queue_size: int, name: str) -> None:
+        """Init limit admitting `limit` requests at once.
+
+        Waiting requests are counted in metrics by limit `name`.
+        """
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting_gauge = admission_waiting(name)
+
+    def full(self) -> bool:
+        """Check whether request would be rejected without waiting."""
+        return self._semaphore.locked() and self.waiting >= self.queue_size
+
+    async def acquire(self, timeout: float) -> bool:
+        """Take slot, waiting at most `timeout` seconds for it."""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            self.active += 1
+            return True
+
+        self.waiting += 1
+        self._waiting_gauge.inc()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+            self._waiting_gauge.dec()
+
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        """Free slot for the next request."""
+        self.active -= 1
+        self._semaphore.release()
+
+
+class Admission(NamedTuple):
+    """Slots taken by admitted request."""
+
+    limiters: tuple[Limiter, ...]
+
+    # Time by `perf_counter` the request must get connection by.
+    deadline: float
+
+    # Table the request is limited by, if any.
+    table_name: str | None = None
+
+    def remaining(self) -> float:
+        """Get seconds left until the deadline."""
+        return max(self.deadline - perf_counter(), 0)
+
+
+class AdmissionControl:
+    """Routes and tables concurrency limits."""
+
+    def __init__(  # noqa: WPS211
+        self,
+        route_limit: int = 0,
+        table_limit: int = 0,
+        queue_size: int = 100,
+        timeout: float = 5,
+        retry_after: int = 1,
+    ) -> None:
+        """Init limits, 0 limit disables it.
+
+        Rejected requests are advised to retry after `retry_after`
+        seconds.
+        """
+        self.route_limit = route_limit
+        self.table_limit = table_limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._routes: dict[str, Limiter] = {}
+        self._tables: dict[str, Limiter] = {}
+
+    async def admit(
+        self,
+        route: str,
+        table_name: str | None = None,
+    ) -> Admission | Rejection:
+        """Take slots of table and route, in this order."""
+        deadline = perf_counter() + self.timeout
+        limiters = self._limiters(route, table_name)
+        if any(limiter.full() for limiter in limiters):
+            self._forget_idle(table_name)
+            return Rejection.queue_full
+
+        acquired: list[Limiter] = []
+        for limiter in limiters:
+            if not await limiter.acquire(deadline - perf_counter()):
+                self.release(Admission(tuple(acquired), deadline, table_name))
+                return Rejection.timeout
+            acquired.append(limiter)
+
+        return Admission(tuple(acquired), deadline, table_name)
+
+    def release(self, admission: Admission) -> None:
+        """Free slots taken by request."""
+        for limiter in admission.limiters:
+            limiter.release()
+        self._forget_idle(admission.table_name)
+
+    def _limiters(self, route: str, table_name: str | None) -> list[Limiter]:
+        # Table slot is taken first: requests queued on a busy table must
+        # not hold route slots, blocking requests to other tables.
+        limiters = []
+        if self.table_limit and table_name is not None:
+            if table_name not in self._tables:
+                self._tables[table_name] = Limiter(
+                    self.table_limit,
+                    self.queue_size,
+                    'table',
+                )
+            limiters.append(self._tables[table_name])
+        if self.route_limit:
+            if route not in self._routes:
+                self._routes[route] = Limiter(
+                    self.route_limit,
+                    self.queue_size,
+                    'route',
+                )
+            limiters.append(self._routes[route])
+        return limiters
+
+    def _forget_idle(self, table_name: str | None) -> None:
+        # Tables limiters are created on demand and dropped once idle,
+        # so they don't pile up for every table ever requested.
+        if table_name is None:
+            return
+        limiter = self._tables.get(table_name)
+        if limiter is not None and not limiter.active + limiter.waiting:
+            del self._tables[table_name]  # noqa: WPS420
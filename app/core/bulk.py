@@ -0,0 +1,318 @@
+"""Bulk rows loading.
+
+Rows are grouped by their columns set and every group is written with one
+of the strategies, depending on the batch size:
+
+* `single` - statement per row, for tiny batches;
+* `values` - multi-row `INSERT ... VALUES` statements sent in pipeline mode;
+* `copy` - `COPY ... FROM STDIN` into a staging table, then moved into the
+  target table with a single `INSERT ... SELECT ... RETURNING *`.
+
+Callers are expected to run the load inside one transaction.
+"""
+
+import json
+from typing import Any, Callable
+
+from psycopg import AsyncConnection, AsyncCursor, postgres
+from psycopg.rows import dict_row
+from pydantic import BaseModel, Field
+
+from app.core.models import InsertStrategy
+from app.core.queries import (
+    MAX_PARAMETERS,
+    cached_insert_row_query,
+    copy_staging_query,
+    create_staging_query,
+    drop_staging_query,
+    insert_from_staging_query,
+    staging_types_query,
+    upsert_from_staging_query,
+)
+
+Row = dict[str, Any]
+
+_INT2_MAX = 2 ** 15
+_INT4_MAX = 2 ** 31
+_INT8_MAX = 2 ** 63
+
+
+def _is_int(bound: int) -> Callable[[Any], bool]:
+    def check(value: Any) -> bool:  # noqa: WPS430
+        return type(value) is int and -bound <= value < bound
+
+    return check
+
+
+def _is_instance(*types: type) -> Callable[[Any], bool]:
+    def check(value: Any) -> bool:  # noqa: WPS430
+        return type(value) in types
+
+    return check
+
+
+# Postgres types which binary format can be produced from JSON values.
+_BINARY_CHECKS: dict[int, Callable[[Any], bool]] = {
+    postgres.types['bool'].oid: _is_instance(bool),
+    postgres.types['int2'].oid: _is_int(_INT2_MAX),
+    postgres.types['int4'].oid: _is_int(_INT4_MAX),
+    postgres.types['int8'].oid: _is_int(_INT8_MAX),
+    postgres.types['float8'].oid: _is_instance(float, int),
+    postgres.types['text'].oid: _is_instance(str),
+    postgres.types['varchar'].oid: _is_instance(str),
+}
+
+_ORDINAL_OID = postgres.types['int8'].oid
+
+
+class RowsSkippedError(Exception):
+    """Fewer records were inserted than rows sent, like with triggers."""
+
+
+class BulkOptions(BaseModel):
+    """Bulk insert tuning."""
+
+    # Batches with fewer rows are inserted row by row.
+    values_threshold: int = Field(default=2, ge=1)
+
+    # Batches with at least that many rows are loaded with COPY.
+    copy_threshold: int = Field(default=100, ge=1)
+
+    # Rows per multi-row INSERT statement.
+    values_chunk_size: int = Field(default=500, ge=1)
+
+
+def choose_strategy(rows_count: int, options: BulkOptions) -> InsertStrategy:
+    """Choose the cheapest way to write `rows_count` rows."""
+    if rows_count >= options.copy_threshold:
+        return InsertStrategy.copy
+    elif rows_count >= options.values_threshold:
+        return InsertStrategy.values
+
+    return InsertStrategy.single
+
+
+def group_rows(rows: list[Row]) -> dict[frozenset[str], list[int]]:
+    """Group rows indices by rows columns set, keeping rows order."""
+    groups: dict[frozenset[str], list[int]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(frozenset(row), []).append(index)
+
+    return groups
+
+
+def last_rows(rows: list[Row], key_columns: list[str]) -> list[Row]:
+    """Keep only the last row of every key, keeping rows order."""
+    last_indices = {
+        json.dumps(
+            [row[column] for column in key_columns],
+            sort_keys=True,
+            default=str,
+        ): index
+        for index, row in enumerate(rows)
+    }
+    return [rows[index] for index in sorted(last_indices.values())]
+
+
+def _is_binary_compatible(
+    type_oids: list[int],
+    rows: list[tuple[Any, ...]],
+) -> bool:
+    checks = [_BINARY_CHECKS.get(oid) for oid in type_oids]
+    if None in checks:
+        return False
+
+    return all(
+        value is None or check(value)  # type: ignore[misc]
+        for row in rows
+        for value, check in zip(row, checks)
+    )
+
+
+async def stage_rows(
+    table_name: str,
+    column_names: list[str],
+    rows: list[tuple[Any, ...]],
+    curr: AsyncCursor[Any],
+) -> None:
+    """Load rows with COPY into staging table, numbering them in order.
+
+    Binary COPY is used when every value matches its column type,
+    otherwise values are sent as text and parsed by Postgres.
+    """
+    await curr.execute(create_staging_query(table_name, column_names))
+    await curr.execute(staging_types_query(column_names))
+    type_oids = [column.type_code for column in curr.description or []]
+
+    binary = _is_binary_compatible(type_oids, rows)
+    async with curr.copy(copy_staging_query(column_names, binary)) as copy:
+        if binary:
+            copy.set_types([*type_oids, _ORDINAL_OID])
+        for ordinal, row in enumerate(rows):
+            await copy.write_row((*row, ordinal))
+
+
+async def copy_rows(
+    table_name: str,
+    column_names: list[str],
+    rows: list[tuple[Any, ...]],
+    conn: AsyncConnection[Any],
+) -> list[Row]:
+    """Load rows with COPY and return inserted records in the same order."""
+    curr = conn.cursor(row_factory=dict_row)
+    await stage_rows(table_name, column_names, rows, curr)
+    await curr.execute(insert_from_staging_query(table_name, column_names))
+    inserted = await curr.fetchall()
+    await curr.execute(drop_staging_query())
+    return inserted
+
+
+async def values_rows(
+    table_name: str,
+    column_names: list[str],
+    rows: list[tuple[Any, ...]],
+    conn: AsyncConnection[Any],
+    chunk_size: int,
+) -> list[Row]:
+    """Insert rows with multi-row INSERT statements in pipeline mode.
+
+    Chunks are limited by Postgres bind parameters limit and sent without
+    waiting for each other results. Full chunks statements are prepared,
+    the last chunk of arbitrary size is prepared only if repeated often.
+    """
+    chunk_size = max(min(chunk_size, MAX_PARAMETERS // len(column_names)), 1)
+    cursors: list[AsyncCursor[Row]] = []
+    inserted: list[Row] = []
+    async with conn.pipeline():
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            curr = conn.cursor(row_factory=dict_row)
+            await curr.execute(
+                cached_insert_row_query(table_name, column_names, len(chunk)),
+                [value for row in chunk for value in row],
+                prepare=True if len(chunk) == chunk_size else None,
+            )
+            cursors.append(curr)
+
+        for curr in cursors:
+            inserted.extend(await curr.fetchall())
+
+    return inserted
+
+
+async def single_rows(
+    table_name: str,
+    column_names: list[str],
+    rows: list[tuple[Any, ...]],
+    conn: AsyncConnection[Any],
+) -> list[Row]:
+    """Insert rows one by one with prepared statement."""
+    curr = conn.cursor(row_factory=dict_row)
+    query = cached_insert_row_query(table_name, column_names)
+    inserted: list[Row] = []
+    for row in rows:
+        await curr.execute(query, row, prepare=True)
+        inserted.extend(await curr.fetchall())
+
+    return inserted
+
+
+async def _insert_group(
+    table_name: str,
+    column_names: list[str],
+    rows: list[tuple[Any, ...]],
+    conn: AsyncConnection[Any],
+    strategy: InsertStrategy,
+    options: BulkOptions,
+) -> list[Row]:
+    if not column_names or strategy == InsertStrategy.single:
+        # Rows without columns can only be inserted with DEFAULT VALUES.
+        return await single_rows(table_name, column_names, rows, conn)
+    elif strategy == InsertStrategy.values:
+        return await values_rows(
+            table_name,
+            column_names,
+            rows,
+            conn,
+            options.values_chunk_size,
+        )
+
+    return await copy_rows(table_name, column_names, rows, conn)
+
+
+async def insert_batch(
+    table_name: str,
+    rows: list[Row],
+    conn: AsyncConnection[Any],
+    strategy: InsertStrategy,
+    options: BulkOptions,
+) -> list[Row]:
+    """Insert rows into table and return inserted records in rows order.
+
+    Raises `RowsSkippedError` if any row was not inserted, as inserted records
+    can't be matched with rows then.
+    """
+    inserted: dict[int, Row] = {}
+    for indices in group_rows(rows).values():
+        column_names = list(rows[indices[0]])
+        group_inserted = await _insert_group(
+            table_name,
+            column_names,
+            [
+                tuple(rows[index][column] for column in column_names)
+                for index in indices
+            ],
+            conn,
+            strategy,
+            options,
+        )
+        if len(group_inserted) != len(indices):
+            raise RowsSkippedError('{0} of {1} rows were not inserted'.format(
+                len(indices) - len(group_inserted),
+                len(indices),
+            ))
+        inserted.update(zip(indices, group_inserted))
+
+    return [inserted[index] for index in range(len(rows))]
+
+
+async def upsert_batch(
+    table_name: str,
+    rows: list[Row],
+    key_columns: list[str],
+    conn: AsyncConnection[Any],
+) -> tuple[int, int]:
+    """Insert rows or update existing ones with the same key columns.
+
+    When several rows have the same key, only the last one is merged, even
+    if their columns differ. Then every group of rows with the same
+    columns is staged with COPY and merged with one statement. Rows must
+    contain all key columns. Returns inserted and updated rows counts.
+    """
+    inserted = 0
+    updated = 0
+    curr = conn.cursor()
+    rows = last_rows(rows, key_columns)
+    for indices in group_rows(rows).values():
+        column_names = list(rows[indices[0]])
+        await stage_rows(
+            table_name,
+            column_names,
+            [
+                tuple(rows[index][column] for column in column_names)
+                for index in indices
+            ],
+            curr,
+        )
+        await curr.execute(upsert_from_staging_query(
+            table_name,
+            column_names,
+            key_columns,
+        ))
+        counts: tuple[int, int] | None = await curr.fetchone()
+        if counts is not None:
+            inserted += counts[0]
+            updated += counts[1]
+        await curr.execute(drop_staging_query())
+
+    return inserted, updated
@@ -0,0 +1,218 @@
+"""Tables metadata cache.
+
+Catalog lookups are cached per table name in a bounded LRU. Entries are
+dropped when the table is created or dropped by any app instance: changes
+are broadcast with `NOTIFY` and received by `listen_table_changes`. Entries
+also expire after TTL to catch changes made outside of the service.
+
+Responses are cached by versions of data they are made of, see
+`VersionedCache`. Tables written by this process are marked with
+`table_written`, so their versions change and cached info is dropped
+right away, not once statistics reach the catalog.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import Generic, Hashable, TypeVar
+
+from psycopg import AsyncConnection
+from psycopg.errors import Error as PgError
+
+from app.core.models import (
+    RowsCountMethod,
+    TableCacheStats,
+    TableInfo,
+    TableMeta,
+)
+from app.core.queries import insert_statements, listen_tables_query
+
+logger = logging.getLogger(__name__)
+
+# Delay before listener reconnects after connection loss, in seconds.
+_RECONNECT_DELAY = 1
+
+_Value = TypeVar('_Value')
+
+
+class TableCache:
+    """LRU cache of tables metadata with TTL."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60) -> None:
+        """Init empty cache."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, TableMeta]] = (
+            OrderedDict()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, table_name: str) -> TableMeta | None:
+        """Get table metadata, if it is cached and not expired."""
+        entry = self._entries.get(table_name)
+        if entry is None or entry[0] < monotonic():
+            self._entries.pop(table_name, None)
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(table_name)
+        self._hits += 1
+        return entry[1]
+
+    def put(self, table_name: str, meta: TableMeta) -> None:
+        """Cache table metadata, evicting least recently used entries."""
+        self._entries[table_name] = (monotonic() + self.ttl, meta)
+        self._entries.move_to_end(table_name)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def update(self, table_name: str, meta: TableMeta) -> None:
+        """Cache fields set in `meta`, keeping other cached fields."""
+        entry = self._entries.get(table_name)
+        if entry is not None and entry[0] >= monotonic() and meta.exists:
+            meta = entry[1].model_copy(update={
+                field: getattr(meta, field) for field in meta.model_fields_set
+            })
+
+        self.put(table_name, meta)
+
+    def invalidate(self, table_name: str) -> None:
+        """Drop table metadata."""
+        if self._entries.pop(table_name, None) is not None:
+            self._invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> TableCacheStats:
+        """Collect cache usage statistics."""
+        return TableCacheStats(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            invalidations=self._invalidations,
+        )
+
+
+# Cache shared by tables operations.
+table_cache = TableCache()
+
+
+class VersionedCache(Generic[_Value]):
+    """LRU cache of values valid while their data version is unchanged.
+
+    Version is cheaper to get than the value, so a value is returned from
+    cache only if it was computed for the current version. Entries expire
+    after TTL anyway, as version may lag behind the data.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 5) -> None:
+        """Init empty cache, zero `ttl` disables it."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[
+            Hashable,
+            tuple[float, str, _Value],
+        ] = OrderedDict()
+
+    def get(self, key: Hashable, version: str) -> _Value | None:
+        """Get value computed for `version`, if it is not expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires, entry_version, cached_value = entry
+        if expires < monotonic() or entry_version != version:
+            del self._entries[key]  # noqa: WPS420
+            return None
+
+        self._entries.move_to_end(key)
+        return cached_value
+
+    def put(self, key: Hashable, version: str, cached_value: _Value) -> None:
+        """Cache value, evicting least recently used entries."""
+        if not self.ttl:
+            return
+
+        self._entries[key] = (monotonic() + self.ttl, version, cached_value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop value."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+# Table info responses cache.
+table_info_cache: VersionedCache[TableInfo] = VersionedCache()
+
+
+class WriteGenerations:
+    """Counters of tables writes made by this process."""
+
+    def __init__(self) -> None:
+        """Init counters of no writes."""
+        self._generations: dict[str, int] = {}
+
+    def get(self, table_name: str) -> int:
+        """Get number of table writes."""
+        return self._generations.get(table_name, 0)
+
+    def bump(self, table_name: str) -> None:
+        """Count table write."""
+        self._generations[table_name] = self.get(table_name) + 1
+
+
+# Writes counters mixed into tables versions.
+write_generations = WriteGenerations()
+
+
+def table_written(table_name: str) -> None:
+    """Mark table rows changed by this process.
+
+    Statistics counters reach the catalog seconds after commit, so table
+    version would lag behind writes made just now.
+    """
+    write_generations.bump(table_name)
+    for rows_method in RowsCountMethod:
+        table_info_cache.invalidate((table_name, rows_method))
+
+
+async def listen_table_changes(conninfo: str) -> None:
+    """Invalidate `table_cache` entries on tables changes notifications.
+
+    Runs until cancelled. Cache is cleared whenever the connection is
+    (re)established, as notifications may have been missed meanwhile.
+    Table `insert_statements` are dropped along with metadata.
+    """
+    while True:  # noqa: WPS457
+        try:
+            async with await AsyncConnection.connect(
+                conninfo,
+                autocommit=True,
+            ) as conn:
+                await conn.execute(listen_tables_query())
+                table_cache.clear()
+                insert_statements.clear()
+                async for notify in conn.notifies():
+                    table_cache.invalidate(notify.payload)
+                    insert_statements.invalidate(notify.payload)
+        except PgError as err:
+            logger.warning('Tables changes listener failed: %s', err)
+            table_cache.clear()
+            insert_statements.clear()
+            await asyncio.sleep(_RECONNECT_DELAY)
@@ -0,0 +1,185 @@
+"""Small inserts coalescing.
+
+Concurrent small inserts into the same table with the same columns are
+collected and written by one of them, the leader, in a single statement
+and transaction. Instead of a transaction commit per request, there is
+one per batch. Only the leader checks out a connection, the rest wait
+without holding any. Inserted rows are handed back to every request in
+order.
+
+Batch is written right away, unless another batch of the table is being
+written: then it collects inserts for a short window, so idle tables add
+no latency and busy ones get fewer, larger commits.
+
+A batch failing as a whole is retried request by request, so a bad row
+fails only the request that sent it.
+"""
+
+import asyncio
+from contextlib import suppress
+from typing import Any
+
+from psycopg import AsyncConnection
+
+from app.core.bulk import BulkOptions, Row
+from app.core.models import InsertedData, TableData
+from app.core.pool import Connect
+from app.core.tables import DbError, insert_rows
+
+InsertResult = InsertedData | None | DbError
+
+_Request = tuple[list[Row], asyncio.Future[InsertResult]]
+
+_BatchKey = tuple[str, frozenset[str]]
+
+
+class _Batch:
+    """Inserts waiting to be written together."""
+
+    def __init__(self) -> None:
+        self.requests: list[_Request] = []
+        self.rows_count = 0
+        self.full = asyncio.Event()
+
+    def add(self, rows: list[Row]) -> asyncio.Future[InsertResult]:
+        future = asyncio.get_running_loop().create_future()
+        self.requests.append((rows, future))
+        self.rows_count += len(rows)
+        return future
+
+
+class InsertCoalescer:
+    """Collects concurrent small inserts into batches."""
+
+    def __init__(
+        self,
+        window: float = 0,
+        max_rows: int = 1000,
+        options: BulkOptions | None = None,
+    ) -> None:
+        """Init coalescer waiting up to `window` seconds for a busy batch.
+
+        Batch is written once it has `max_rows` rows, inserts of that
+        many rows aren't coalesced. Zero `window` disables coalescing.
+        """
+        self.window = window
+        self.max_rows = max_rows
+        self.options = options or BulkOptions()
+        self._batches: dict[_BatchKey, _Batch] = {}
+        self._writing: dict[_BatchKey, int] = {}
+
+    async def insert(
+        self,
+        table_name: str,
+        table_data: TableData,
+        connect: Connect,
+    ) -> InsertResult:
+        """Insert rows, along with concurrent inserts if they are small.
+
+        Connection is taken by `connect` only to write the batch, errors
+        raised by it are raised for every request of the batch. Rows with
+        different columns sets are inserted on their own.
+        """
+        columns = {frozenset(row) for row in table_data.rows}
+        coalesced = (
+            self.window
+            and len(columns) == 1
+            and len(table_data.rows) < self.max_rows
+        )
+        if not coalesced:
+            async with connect() as conn:
+                return await insert_rows(
+                    table_name,
+                    table_data,
+                    conn,
+                    self.options,
+                )
+
+        key = (table_name, columns.pop())
+        batch = self._batches.get(key)
+        if batch is not None:
+            future = batch.add(table_data.rows)
+            if batch.rows_count >= self.max_rows:
+                batch.full.set()
+            # Request may be cancelled, the leader writes its rows anyway.
+            return await asyncio.shield(future)
+
+        batch = _Batch()
+        self._batches[key] = batch
+        future = batch.add(table_data.rows)
+        try:
+            await self._collect(key, batch)
+            if self._batches.get(key) is batch:
+                del self._batches[key]  # noqa: WPS420
+            await self._write(key, batch, connect)
+        except Exception as err:  # noqa: B902
+            for _, failed in batch.requests:
+                if not failed.done():
+                    failed.set_exception(err)
+            raise
+        finally:
+            # Leader is cancelled: fail the batch, rather than leave the
+            # rest waiting forever.
+            if self._batches.get(key) is batch:
+                del self._batches[key]  # noqa: WPS420
+            for _, pending in batch.requests:
+                if not pending.done():
+                    pending.set_result(DbError(message='Batch interrupted'))
+        return future.result()
+
+    async def _collect(self, key: _BatchKey, batch: _Batch) -> None:
+        # Inserts sent at the same moment join the batch anyway.
+        await asyncio.sleep(0)
+        if self._writing.get(key):
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(batch.full.wait(), self.window)
+
+    async def _write(
+        self,
+        key: _BatchKey,
+        batch: _Batch,
+        connect: Connect,
+    ) -> None:
+        self._writing[key] = self._writing.get(key, 0) + 1
+        try:
+            async with connect() as conn:
+                await self._write_batch(key[0], batch, conn)
+        finally:
+            self._writing[key] -= 1
+            if not self._writing[key]:
+                del self._writing[key]  # noqa: WPS420
+
+    async def _write_batch(
+        self,
+        table_name: str,
+        batch: _Batch,
+        conn: AsyncConnection[Any],
+    ) -> None:
+        inserted = await insert_rows(
+            table_name,
+            TableData.model_construct(rows=[
+                row for rows, _ in batch.requests for row in rows
+            ]),
+            conn,
+            self.options,
+        )
+        if isinstance(inserted, DbError) and len(batch.requests) > 1:
+            for rows, future in batch.requests:
+                future.set_result(await insert_rows(
+                    table_name,
+                    TableData.model_construct(rows=rows),
+                    conn,
+                    self.options,
+                ))
+            return
+
+        start = 0
+        for rows, future in batch.requests:  # noqa: WPS440
+            if isinstance(inserted, InsertedData):
+                future.set_result(InsertedData.model_construct(
+                    rows=inserted.rows[start:start + len(rows)],
+                    strategy=inserted.strategy,
+                ))
+            else:
+                future.set_result(inserted)
+            start += len(rows)
@@ -0,0 +1,122 @@
+"""Bodies compression.
+
+Bodies are compressed and decompressed chunk by chunk, so streamed
+responses and uploads are never held in memory as a whole. Every
+compressed chunk is flushed, for clients to decode rows as they arrive.
+Zstandard is available only if `zstandard` package is installed.
+"""
+
+import zlib
+from typing import AsyncIterator, Protocol
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    _HAS_ZSTANDARD = False
+else:
+    _HAS_ZSTANDARD = True
+
+GZIP_ENCODING = 'gzip'
+ZSTD_ENCODING = 'zstd'
+
+# Offset of zlib window bits selecting gzip container.
+_GZIP_CONTAINER = 16
+
+_GZIP_WBITS = _GZIP_CONTAINER + zlib.MAX_WBITS
+
+
+class CorruptedBody(Exception):
+    """Compressed body can't be decompressed."""
+
+
+class Compressor(Protocol):
+    """Stream compressor."""
+
+    def compress(self, chunk: bytes) -> bytes:
+        """Compress chunk, flushing everything compressed so far."""
+
+    def finish(self) -> bytes:
+        """End compressed stream."""
+
+
+class _Decompressor(Protocol):
+    """Stream decompressor."""
+
+    @property
+    def eof(self) -> bool:
+        """Check whether the end of compressed stream is reached."""
+
+    def decompress(self, chunk: bytes) -> bytes:
+        """Decompress chunk, as much as can be decompressed so far."""
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        compressed = self._compressor.compress(chunk)
+        return compressed + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        compressed = self._compressor.compress(chunk)
+        return compressed + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK,
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def _available_encodings() -> list[str]:
+    encodings = [GZIP_ENCODING]
+    if _HAS_ZSTANDARD:
+        encodings.insert(0, ZSTD_ENCODING)
+    return encodings
+
+
+# Supported encodings, the most preferred first.
+ENCODINGS = _available_encodings()
+
+
+def compressor(encoding: str, level: int) -> Compressor:
+    """Create compressor of one of `ENCODINGS`."""
+    if encoding == ZSTD_ENCODING:
+        return _ZstdCompressor(level)
+    return _GzipCompressor(level)
+
+
+async def decompress(
+    chunks: AsyncIterator[bytes],
+    encoding: str,
+) -> AsyncIterator[bytes]:
+    """Decompress chunks of body compressed with one of `ENCODINGS`.
+
+    Raises `CorruptedBody` on malformed or truncated data.
+    """
+    decompressor: _Decompressor
+    if encoding == ZSTD_ENCODING:
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        errors: tuple[type[Exception], ...] = (zstandard.ZstdError,)
+    else:
+        decompressor = zlib.decompressobj(_GZIP_WBITS)
+        errors = (zlib.error,)
+
+    try:
+        async for chunk in chunks:
+            decompressed = decompressor.decompress(chunk)
+            if decompressed:
+                yield decompressed
+    except errors as err:
+        raise CorruptedBody('Malformed {0} body: {1}'.format(encoding, err))
+
+    if not decompressor.eof:
+        raise CorruptedBody('Truncated {0} body'.format(encoding))
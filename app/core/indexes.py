@@ -0,0 +1,159 @@
+"""Table indexes management operations.
+
+Indexes can be built and dropped `CONCURRENTLY`, without blocking writes
+to the table, at the cost of two table scans. Concurrent build that fails
+leaves an invalid index behind, it is dropped right away. Postgres can't
+build and drop indexes of partitioned tables concurrently, they are built
+and dropped as usual.
+"""
+
+from typing import Any
+
+from psycopg import AsyncConnection
+from psycopg.errors import Error as PgError
+from psycopg.errors import UndefinedObject
+from psycopg.rows import class_row
+
+from app.core.metrics import DbOperation, track_db
+from app.core.models import IndexDef, IndexInfo
+from app.core.queries import (
+    create_index_query,
+    drop_index_query,
+    indexes_query,
+    table_partitioned_query,
+)
+from app.core.tables import DbError, is_table_exist
+
+
+async def _fetch_indexes(
+    table_name: str,
+    conn: AsyncConnection[Any],
+) -> list[IndexInfo]:
+    curr = conn.cursor(row_factory=class_row(IndexInfo))
+    with track_db(DbOperation.indexes):
+        await curr.execute(
+            indexes_query(),
+            {'table_name': table_name},
+            prepare=True,
+        )
+        return await curr.fetchall()
+
+
+async def get_indexes(
+    table_name: str,
+    conn: AsyncConnection[Any],
+) -> list[IndexInfo] | None | DbError:
+    """Get table indexes with sizes and usage statistics."""
+    table_exists = await is_table_exist(table_name, conn)
+    if not table_exists:
+        return None
+    elif isinstance(table_exists, DbError):
+        return table_exists
+
+    try:
+        return await _fetch_indexes(table_name, conn)
+    except PgError as err:
+        return DbError(message=str(err))
+
+
+async def _drop_invalid_index(
+    table_name: str,
+    index_name: str,
+    conn: AsyncConnection[Any],
+) -> None:
+    indexes = await _fetch_indexes(table_name, conn)
+    if any(
+        index.name == index_name and not index.valid for index in indexes
+    ):
+        await conn.execute(drop_index_query(index_name, concurrently=True))
+
+
+async def _is_partitioned(
+    table_name: str,
+    conn: AsyncConnection[Any],
+) -> bool:
+    curr = await conn.execute(
+        table_partitioned_query(),
+        {'table_name': table_name},
+        prepare=True,
+    )
+    partitioned: tuple[bool] | None = await curr.fetchone()
+    return partitioned is not None and partitioned[0]
+
+
+async def create_index(
+    table_name: str,
+    index_def: IndexDef,
+    conn: AsyncConnection[Any],
+    concurrently: bool = False,
+) -> IndexInfo | None | DbError:
+    """Build table index.
+
+    Conn must be in autocommit mode to build index `concurrently`.
+    Indexes of partitioned tables are built without it, blocking writes.
+    """
+    table_exists = await is_table_exist(table_name, conn)
+    if not table_exists:
+        return None
+    elif isinstance(table_exists, DbError):
+        return table_exists
+
+    try:
+        if concurrently and await _is_partitioned(table_name, conn):
+            concurrently = False
+        with track_db(DbOperation.create_index):
+            await conn.execute(
+                create_index_query(table_name, index_def, concurrently),
+            )
+    except PgError as err:
+        if concurrently:
+            try:
+                await _drop_invalid_index(table_name, index_def.name, conn)
+            except PgError:
+                pass  # noqa: WPS420
+        return DbError(message=str(err))
+
+    indexes = await get_indexes(table_name, conn)
+    if indexes is None or isinstance(indexes, DbError):
+        return indexes
+
+    index = next(
+        (index for index in indexes if index.name == index_def.name),
+        None,
+    )
+    if index is None:
+        # Built index may be gone, e.g. dropped concurrently, or got name
+        # truncated by Postgres.
+        return DbError(message='Index {0} is not found after build'.format(
+            index_def.name,
+        ))
+    return index
+
+
+async def drop_index(
+    table_name: str,
+    index_name: str,
+    conn: AsyncConnection[Any],
+    concurrently: bool = False,
+) -> str | None | DbError:
+    """Drop table index, None if table has no such index.
+
+    Indexes of partitioned tables are dropped without `concurrently`.
+    """
+    indexes = await get_indexes(table_name, conn)
+    if indexes is None or isinstance(indexes, DbError):
+        return indexes
+    elif all(index.name != index_name for index in indexes):
+        return None
+
+    try:
+        if concurrently and await _is_partitioned(table_name, conn):
+            concurrently = False
+        with track_db(DbOperation.drop_index):
+            await conn.execute(drop_index_query(index_name, concurrently))
+    except UndefinedObject:
+        return None
+    except PgError as err:
+        return DbError(message=str(err))
+
+    return index_name
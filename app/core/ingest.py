@@ -0,0 +1,197 @@
+"""Streamed rows loading.
+
+Request bodies are consumed chunk by chunk and forwarded into
+`COPY ... FROM STDIN` of the target table, so memory usage doesn't depend
+on the body size. Loaded rows are not returned.
+"""
+
+import csv
+import json
+from time import perf_counter
+from typing import Any, AsyncIterator
+
+from psycopg import AsyncConnection
+from psycopg.errors import Error as PgError
+from psycopg.errors import UndefinedTable
+from psycopg.types.json import Jsonb
+
+from app.core.cache import table_cache, table_written
+from app.core.compression import CorruptedBody
+from app.core.metrics import DbOperation, count_rows_written, track_db
+from app.core.models import IngestResult
+from app.core.queries import copy_table_query
+from app.core.tables import DbError, is_table_exist
+
+Chunks = AsyncIterator[bytes]
+
+
+class BadRow(Exception):
+    """Request body row can't be parsed."""
+
+
+async def split_lines(chunks: Chunks) -> Chunks:
+    """Split byte chunks into lines without line endings."""
+    tail = b''
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b'\n')
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip(b'\r')
+
+    if tail:
+        yield tail.rstrip(b'\r')
+
+
+async def _parse_ndjson(lines: Chunks) -> AsyncIterator[dict[str, Any]]:
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as err:
+            raise BadRow('Line {0}: {1}'.format(line_number, err))
+        if not isinstance(row, dict):
+            raise BadRow('Line {0}: row must be an object'.format(
+                line_number,
+            ))
+        yield row
+
+
+def _row_values(row: dict[str, Any], column_names: list[str]) -> list[Any]:
+    extra = row.keys() - set(column_names)
+    if extra:
+        raise BadRow('Unexpected columns: {0}'.format(', '.join(extra)))
+
+    return [
+        Jsonb(value) if isinstance(value, (dict, list)) else value
+        for value in map(row.get, column_names)
+    ]
+
+
+def _ingest_result(rows: int, started: float) -> IngestResult:
+    count_rows_written(DbOperation.ingest, rows)
+    seconds = perf_counter() - started
+    return IngestResult(
+        rows=rows,
+        seconds=seconds,
+        rows_per_second=rows / seconds if seconds else 0,
+    )
+
+
+async def ingest_ndjson(
+    table_name: str,
+    chunks: Chunks,
+    conn: AsyncConnection[Any],
+) -> IngestResult | None | DbError:
+    """Load newline delimited JSON objects into table.
+
+    Columns are taken from the first object, missing keys of other objects
+    are loaded as NULL. Everything is loaded in one transaction.
+    """
+    table_exists = await is_table_exist(table_name, conn)
+    if not table_exists:
+        return None
+    elif isinstance(table_exists, DbError):
+        return table_exists
+
+    started = perf_counter()
+    rows = _parse_ndjson(split_lines(chunks))
+    loaded = 0
+    try:
+        first_row = await anext(rows, None)
+        if first_row is None:
+            return _ingest_result(0, started)
+
+        column_names = list(first_row)
+        with track_db(DbOperation.ingest):
+            async with conn.transaction():
+                curr = conn.cursor()
+                query = copy_table_query(table_name, column_names)
+                async with curr.copy(query) as copy:
+                    await copy.write_row(
+                        _row_values(first_row, column_names),
+                    )
+                    loaded += 1
+                    async for row in rows:
+                        await copy.write_row(_row_values(row, column_names))
+                        loaded += 1
+    except (BadRow, CorruptedBody) as err:
+        return DbError(message=str(err))
+    except UndefinedTable:
+        table_cache.invalidate(table_name)
+        return None
+    except PgError as err:
+        return DbError(message=str(err))
+
+    table_written(table_name)
+    return _ingest_result(loaded, started)
+
+
+async def _read_csv_header(chunks: Chunks) -> tuple[list[str], Chunks]:
+    head = b''
+    async for chunk in chunks:
+        head += chunk
+        if b'\n' in head:
+            break
+
+    header_line, _, rest = head.partition(b'\n')
+
+    async def body() -> Chunks:  # noqa: WPS430
+        if rest:
+            yield rest
+        async for chunk in chunks:  # noqa: WPS440
+            yield chunk
+
+    try:
+        header_text = header_line.decode().rstrip('\r')
+    except UnicodeDecodeError as err:
+        raise BadRow('Header: {0}'.format(err))
+
+    return next(csv.reader([header_text]), []), body()
+
+
+async def ingest_csv(
+    table_name: str,
+    chunks: Chunks,
+    conn: AsyncConnection[Any],
+) -> IngestResult | None | DbError:
+    """Load CSV with header line into table.
+
+    Header names the columns, the rest is passed to COPY as is.
+    Everything is loaded in one transaction.
+    """
+    table_exists = await is_table_exist(table_name, conn)
+    if not table_exists:
+        return None
+    elif isinstance(table_exists, DbError):
+        return table_exists
+
+    started = perf_counter()
+    try:
+        column_names, body = await _read_csv_header(chunks)
+    except (BadRow, CorruptedBody) as err:
+        return DbError(message=str(err))
+
+    if not column_names:
+        return _ingest_result(0, started)
+
+    curr = conn.cursor()
+    try:
+        with track_db(DbOperation.ingest):
+            async with conn.transaction():
+                query = copy_table_query(table_name, column_names, csv=True)
+                async with curr.copy(query) as copy:
+                    async for chunk in body:
+                        await copy.write(chunk)
+    except CorruptedBody as err:
+        return DbError(message=str(err))
+    except UndefinedTable:
+        table_cache.invalidate(table_name)
+        return None
+    except PgError as err:
+        return DbError(message=str(err))
+
+    table_written(table_name)
+    return _ingest_result(max(curr.rowcount, 0), started)
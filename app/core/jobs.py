@@ -0,0 +1,158 @@
+"""Background rows ingest jobs.
+
+Submitted rows are queued and inserted by a fixed number of workers,
+chunk by chunk, every chunk in its own transaction. Workers take a pooled
+connection per chunk, so at most `workers` connections are used by jobs
+and interactive requests get connections between chunks.
+
+Jobs live in memory of the app instance: queued and running jobs are lost
+on shutdown, only recent finished jobs are kept.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any
+from uuid import uuid4
+
+from psycopg import AsyncConnection
+from psycopg_pool import PoolTimeout
+
+from app.core.bulk import BulkOptions, Row
+from app.core.models import Job, JobStatus, TableData
+from app.core.pool import Pool
+from app.core.tables import DbError, insert_rows
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class IngestJobs:
+    """Queue of ingest jobs run by bounded number of workers."""
+
+    def __init__(  # noqa: WPS211
+        self,
+        workers: int = 2,
+        queue_size: int = 100,
+        chunk_size: int = 10000,
+        history_size: int = 1000,
+        options: BulkOptions | None = None,
+    ) -> None:
+        """Init stopped jobs queue."""
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.history_size = history_size
+        self.options = options or BulkOptions()
+        self._queue: asyncio.Queue[tuple[Job, list[Row]]] = asyncio.Queue(
+            queue_size,
+        )
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def submit(self, table_name: str, rows: list[Row]) -> Job | None:
+        """Queue rows insert, None if the queue is full."""
+        job = Job(
+            id=uuid4().hex,
+            table_name=table_name,
+            rows_total=len(rows),
+            created_at=_now(),
+        )
+        try:
+            self._queue.put_nowait((job, rows))
+        except asyncio.QueueFull:
+            return None
+
+        self._jobs[job.id] = job
+        self._forget_finished()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Get job, None if it is unknown or forgotten."""
+        return self._jobs.get(job_id)
+
+    def start(self, pool: Pool) -> None:
+        """Start workers inserting rows with connections from `pool`."""
+        self._tasks = [
+            asyncio.create_task(self._work(pool))
+            for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop workers, interrupting running jobs."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _forget_finished(self) -> None:
+        finished = [
+            job.id
+            for job in self._jobs.values()
+            if job.finished_at is not None
+        ]
+        for job_id in finished[:max(len(finished) - self.history_size, 0)]:
+            del self._jobs[job_id]  # noqa: WPS420
+
+    async def _work(self, pool: Pool) -> None:
+        while True:  # noqa: WPS457
+            job, rows = await self._queue.get()
+            try:
+                await self._run(job, rows, pool)
+            except asyncio.CancelledError:
+                self._finish(job, 'Interrupted by shutdown')
+                raise
+            except Exception as err:  # noqa: B902
+                # Worker must survive unexpected failures, or jobs would
+                # wait for it forever.
+                logger.exception('Job %s failed', job.id)
+                self._finish(job, str(err) or type(err).__name__)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, rows: list[Row], pool: Pool) -> None:
+        job.status = JobStatus.running
+        job.started_at = _now()
+        started = perf_counter()
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = TableData.model_construct(
+                rows=rows[start:start + self.chunk_size],
+            )
+            try:
+                async with pool.connection() as conn:
+                    inserted = await self._insert(job, chunk, conn)
+            except PoolTimeout as err:
+                inserted = DbError(message=str(err))
+
+            if isinstance(inserted, DbError):
+                self._finish(job, inserted.message)
+                return
+
+            job.rows_done += inserted
+            job.rows_per_second = job.rows_done / (perf_counter() - started)
+
+        self._finish(job)
+
+    async def _insert(
+        self,
+        job: Job,
+        chunk: TableData,
+        conn: AsyncConnection[Any],
+    ) -> int | DbError:
+        inserted = await insert_rows(job.table_name, chunk, conn, self.options)
+        if inserted is None:
+            return DbError(message='Table {0} doesn`t exist'.format(
+                job.table_name,
+            ))
+        elif isinstance(inserted, DbError):
+            return inserted
+        return len(inserted.rows)
+
+    def _finish(self, job: Job, error: str | None = None) -> None:
+        job.status = JobStatus.failed if error else JobStatus.succeeded
+        job.error = error
+        job.finished_at = _now()
@@ -1,5 +1,6 @@
 """Data models."""
 
+from datetime import datetime
 from enum import StrEnum
 from typing import Any, Self
 
@@ -13,6 +14,7 @@ class ColumnTypes(StrEnum):
     integer = 'integer'
     text = 'text'
     boolean = 'boolean'
+    timestamptz = 'timestamptz'
 
 
 class ColumnDef(BaseModel):
@@ -43,12 +45,112 @@ class ColumnDef(BaseModel):
         return self
 
 
+class PartitionMethod(StrEnum):
+    """Ways to split table into partitions."""
+
+    # Partitions hold consecutive key ranges.
+    range = 'range'
+
+    # Partitions hold listed key values, the rest goes to default one.
+    list_ = 'list'
+
+    # Partitions hold keys with the same hash remainder.
+    hash = 'hash'
+
+
+class PartitionUnit(StrEnum):
+    """Calendar units of timestamp range partitions, in UTC."""
+
+    hour = 'hour'
+    day = 'day'
+    week = 'week'
+    month = 'month'
+    year = 'year'
+
+
+class PartitionDef(BaseModel):
+    """Data to partition new table."""
+
+    # Partitioning method.
+    method: PartitionMethod
+
+    # Partition key column.
+    column: str
+
+    # Width of `range` partitions of integer column.
+    step: int | None = Field(default=None, ge=1)
+
+    # Calendar unit of `range` partitions of timestamp column.
+    unit: PartitionUnit | None = None
+
+    # Upcoming `range` partitions kept created ahead of the current one.
+    premake: int = Field(default=3, ge=0, le=100)
+
+    # Number of `hash` partitions.
+    partitions: int | None = Field(default=None, ge=1, le=1024)
+
+    # Key values of `list` partitions, a list per partition.
+    values: list[list[str | int | bool]] = []
+
+    @model_validator(mode='after')
+    def check_method(self) -> Self:
+        """Check the method parameters are passed."""
+        if self.method == PartitionMethod.range:
+            if (self.step is None) == (self.unit is None):
+                raise ValueError('`range` partitioning takes `step` or `unit`')
+        elif self.method == PartitionMethod.hash:
+            if self.partitions is None:
+                raise ValueError('`hash` partitioning takes `partitions`')
+        elif not self.values or not all(self.values):
+            raise ValueError('`list` partitioning takes `values`')
+
+        return self
+
+
 class TableDef(BaseModel):
     """Data to define new table."""
 
     # Columns data.
     columns: list[ColumnDef]
 
+    # Partitioning, plain table if not set.
+    partition: PartitionDef | None = None
+
+    @model_validator(mode='after')
+    def check_partition(self) -> Self:
+        """Check partition key column fits range partitions."""
+        if self.partition is None:
+            return self
+
+        column_types = {column.name: column.type for column in self.columns}
+        key_type = column_types.get(self.partition.column)
+        if key_type is None:
+            raise ValueError('Partition key {0} is not a column'.format(
+                self.partition.column,
+            ))
+        elif self.partition.unit and key_type != ColumnTypes.timestamptz:
+            raise ValueError('`unit` partitions take timestamptz key')
+        elif self.partition.step and key_type not in {
+            ColumnTypes.serial,
+            ColumnTypes.integer,
+        }:
+            raise ValueError('`step` partitions take integer key')
+
+        return self
+
+
+class PartitionInfo(BaseModel):
+    """Table partition info."""
+
+    # Partition table name.
+    name: str
+
+    # Partition bound, like `FOR VALUES FROM (0) TO (1000)`.
+    bound: str
+
+    # Totals size in bytes.
+    size: int = Field(ge=0)
+
 
 class ColumnInfo(BaseModel):
     """Column info."""
@@ -60,6 +162,19 @@ class ColumnInfo(BaseModel):
     type: str
 
 
+class RowsCountMethod(StrEnum):
+    """Ways to count table rows."""
+
+    # Scan the whole table.
+    exact = 'exact'
+
+    # Take planner statistics.
+    estimate = 'estimate'
+
+    # Count exactly only if estimate is small.
+    auto = 'auto'
+
+
 class TableInfo(BaseModel):
     """Table info."""
 
@@ -72,11 +187,348 @@ class TableInfo(BaseModel):
     # Rows count
     rows: int = Field(ge=0)
 
+    # Method produced rows count: `exact` or `estimate`
+    rows_method: RowsCountMethod = RowsCountMethod.exact
+
     # Totals size in bytes
     size: int = Field(ge=0)
 
 
+# Tables in one table info request, at most.
+MAX_INFO_TABLES = 10000
+
+
+class TablesInfoRequest(BaseModel):
+    """Names of tables to get info of."""
+
+    # Tables names, at most `MAX_INFO_TABLES`.
+    tables: list[str] = Field(max_length=MAX_INFO_TABLES)
+
+
+class TablesInfo(BaseModel):
+    """Info of many tables."""
+
+    # Found tables info by requested names, in request order.
+    tables: dict[str, TableInfo]
+
+    # Requested tables that don't exist.
+    missing: list[str]
+
+
 class TableData(BaseModel):
     """Unstructured table data."""
 
     rows: list[dict[str, Any]]
+
+
+class InsertStrategy(StrEnum):
+    """Ways to write a batch of rows."""
+
+    # Statement per row.
+    single = 'single'
+
+    # Multi-row INSERT statements sent in pipeline mode.
+    values = 'values'
+
+    # COPY into staging table.
+    copy = 'copy'
+
+
+class InsertedData(TableData):
+    """Inserted rows."""
+
+    # Strategy used to write rows. Absent if there was nothing to insert.
+    strategy: InsertStrategy | None = None
+
+
+class UpsertResult(BaseModel):
+    """Merged rows summary."""
+
+    # Rows with new keys.
+    inserted: int = Field(ge=0)
+
+    # Existing rows changed.
+    updated: int = Field(ge=0)
+
+    # Existing rows equal to sent ones and rows overridden by later rows
+    # with the same key.
+    unchanged: int = Field(ge=0)
+
+
+class FilterOperator(StrEnum):
+    """Rows filter comparisons."""
+
+    eq = 'eq'
+    ne = 'ne'
+    lt = 'lt'
+    le = 'le'
+    gt = 'gt'
+    ge = 'ge'
+
+    # Column value is any of list values.
+    in_ = 'in'
+
+    # Column value is NULL if filter value is true, not NULL if false.
+    is_null = 'is_null'
+
+
+# Filter value types.
+Scalar = str | int | float | bool
+
+# Values in `in` filter, at most.
+MAX_IN_VALUES = 1000
+
+
+class RowsFilter(BaseModel):
+    """Condition on column value."""
+
+    # Column name.
+    column: str
+
+    # Comparison.
+    op: FilterOperator = FilterOperator.eq
+
+    # Value to compare with: list for `in`, boolean for `is_null`.
+    value: Scalar | list[Scalar]
+
+    @model_validator(mode='after')
+    def check_value(self) -> Self:
+        """Check value fits the operator."""
+        if self.op == FilterOperator.in_:
+            if not isinstance(self.value, list):
+                raise ValueError('`in` takes list of values')
+            elif not 0 < len(self.value) <= MAX_IN_VALUES:
+                raise ValueError('`in` takes 1 to {0} values'.format(
+                    MAX_IN_VALUES,
+                ))
+        elif self.op == FilterOperator.is_null:
+            if not isinstance(self.value, bool):
+                raise ValueError('`is_null` takes boolean value')
+        elif isinstance(self.value, list):
+            raise ValueError('`{0}` takes single value'.format(self.op))
+
+        return self
+
+
+class RowsOrder(BaseModel):
+    """Rows sort key."""
+
+    # Column name.
+    column: str
+
+    # Sort in descending order.
+    descending: bool = False
+
+
+class RowsQuery(BaseModel):
+    """Rows selection, executed by Postgres."""
+
+    # Columns to return, all if not set.
+    columns: list[str] | None = Field(default=None, min_length=1)
+
+    # Conditions that all rows must satisfy.
+    where: list[RowsFilter] = []
+
+    # Sort keys, storage order if empty.
+    order_by: list[RowsOrder] = []
+
+    # Rows to return, at most.
+    limit: int | None = Field(default=None, ge=1)
+
+
+class QueryPlan(BaseModel):
+    """Rows query execution plan."""
+
+    # `EXPLAIN (FORMAT JSON)` output.
+    plan: list[dict[str, Any]]
+
+
+class IndexMethod(StrEnum):
+    """Index access methods."""
+
+    btree = 'btree'
+    hash = 'hash'
+    gin = 'gin'
+    brin = 'brin'
+
+
+# Postgres identifier length, at most.
+MAX_IDENTIFIER_LENGTH = 63
+
+
+class IndexDef(BaseModel):
+    """Data to define new table index."""
+
+    # Index name.
+    name: str = Field(min_length=1, max_length=MAX_IDENTIFIER_LENGTH)
+
+    # Indexed columns, in order.
+    columns: list[str] = Field(min_length=1)
+
+    # Index access method.
+    method: IndexMethod = IndexMethod.btree
+
+    # Set UNIQUE constraint.
+    unique: bool = False
+
+    # Conditions of partial index: only rows matching all of them are
+    # indexed.
+    where: list[RowsFilter] = []
+
+
+class IndexInfo(BaseModel):
+    """Table index info and usage statistics."""
+
+    # Index name.
+    name: str
+
+    # Indexed columns, in order.
+    columns: list[str]
+
+    # Index access method.
+    method: str
+
+    # Whether index has UNIQUE constraint.
+    unique: bool
+
+    # Partial index condition.
+    predicate: str | None = None
+
+    # Whether index is used by queries: concurrent build may fail and
+    # leave an invalid index.
+    valid: bool
+
+    # Size in bytes.
+    size: int = Field(ge=0)
+
+    # Index scans since statistics reset.
+    scans: int = Field(ge=0)
+
+    # Index entries returned by scans.
+    tuples_read: int = Field(ge=0)
+
+    # Table rows fetched by simple index scans.
+    tuples_fetched: int = Field(ge=0)
+
+
+class PoolStats(BaseModel):
+    """Connections pool usage statistics."""
+
+    # Configured pool bounds.
+    min_size: int = Field(ge=0)
+    max_size: int = Field(ge=0)
+
+    # Currently opened connections.
+    size: int = Field(ge=0)
+
+    # Connections checked out by requests.
+    in_use: int = Field(ge=0)
+
+    # Requests waiting for a free connection.
+    waiting: int = Field(ge=0)
+
+    # Total connection requests served by the pool.
+    requests: int = Field(ge=0)
+
+    # Requests failed because of acquire timeout.
+    timeouts: int = Field(ge=0)
+
+    # Mean time spent waiting for a connection, in milliseconds.
+    acquire_ms: float = Field(ge=0)
+
+
+class TableMeta(BaseModel):
+    """Cached table metadata."""
+
+    # Whether table exists.
+    exists: bool
+
+    # Table name qualified with database and schema.
+    qualified_name: str | None = None
+
+    # Columns data.
+    columns: list[ColumnInfo] | None = None
+
+    # Primary key columns, empty if table has no primary key.
+    primary_key: list[str] | None = None
+
+
+class TableCacheStats(BaseModel):
+    """Table metadata cache statistics."""
+
+    # Cached tables.
+    size: int = Field(ge=0)
+
+    # Cache capacity.
+    max_size: int = Field(ge=0)
+
+    # Lookups served from the cache.
+    hits: int = Field(ge=0)
+
+    # Lookups that went to the database.
+    misses: int = Field(ge=0)
+
+    # Entries removed to keep the cache within capacity.
+    evictions: int = Field(ge=0)
+
+    # Entries removed because the table has changed.
+    invalidations: int = Field(ge=0)
+
+
+class IngestResult(BaseModel):
+    """Streamed rows load summary."""
+
+    # Rows loaded.
+    rows: int = Field(ge=0)
+
+    # Load duration in seconds.
+    seconds: float = Field(ge=0)
+
+    # Load throughput.
+    rows_per_second: float = Field(ge=0)
+
+
+class JobStatus(StrEnum):
+    """Ingest job states."""
+
+    # Waiting for a worker.
+    queued = 'queued'
+
+    # Rows are being inserted.
+    running = 'running'
+
+    # All rows are inserted.
+    succeeded = 'succeeded'
+
+    # Stopped by error, rows of committed chunks stay inserted.
+    failed = 'failed'
+
+
+class Job(BaseModel):
+    """Rows ingest job progress."""
+
+    # Job identifier.
+    id: str
+
+    # Target table name.
+    table_name: str
+
+    # Job state.
+    status: JobStatus = JobStatus.queued
+
+    # Rows submitted.
+    rows_total: int = Field(ge=0)
+
+    # Rows inserted and committed.
+    rows_done: int = Field(default=0, ge=0)
+
+    # Insert throughput since job start.
+    rows_per_second: float = Field(default=0, ge=0)
+
+    # Error stopped the job.
+    error: str | None = None
+
+    # Submission, start and finish moments.
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
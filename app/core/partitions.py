@@ -0,0 +1,255 @@
+"""Tables partitioning.
+
+Hash and list partitions are created along with the table. Range
+partitions are created ahead: the one holding the current key and
+`premake` upcoming ones. The current key is the current time for
+timestamp keys and the greatest stored key for integer ones. Ranges are
+aligned to `step` multiples or calendar units, so creating partitions is
+idempotent and can be repeated periodically. Partitioning definition is
+kept in the table comment for that.
+
+Range partitioned tables have no default partition: keys it held would
+block creating their range partition later, so rows with keys beyond
+the created partitions are rejected instead.
+
+Old range partitions are detached and dropped instead of deleting rows.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from hashlib import sha1
+from typing import Any
+
+from psycopg import AsyncConnection
+from psycopg.abc import Query
+from psycopg.errors import Error as PgError
+from psycopg_pool import PoolTimeout
+from pydantic import ValidationError
+
+from app.core.models import PartitionDef, PartitionMethod, PartitionUnit
+from app.core.pool import Pool
+from app.core.queries import (
+    DEFAULT_BOUND,
+    create_partition_query,
+    hash_bound,
+    list_bound,
+    max_key_query,
+    range_bound,
+    range_partitioned_tables_query,
+)
+
+logger = logging.getLogger(__name__)
+
+# Partitions names suffixes formats of range start.
+_UNIT_FORMATS = {
+    PartitionUnit.hour: '%Y%m%d%H',
+    PartitionUnit.day: '%Y%m%d',
+    PartitionUnit.week: '%Y%m%d',
+    PartitionUnit.month: '%Y%m',
+    PartitionUnit.year: '%Y',
+}
+
+_MONTHS_IN_YEAR = 12
+
+# Postgres truncates identifiers longer than that many bytes.
+_MAX_NAME_BYTES = 63
+
+
+def _truncate(moment: datetime, unit: PartitionUnit) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    if unit == PartitionUnit.hour:
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == PartitionUnit.day:
+        return day
+    elif unit == PartitionUnit.week:
+        return day - timedelta(days=day.weekday())
+    elif unit == PartitionUnit.month:
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def _add_units(moment: datetime, unit: PartitionUnit, count: int) -> datetime:
+    if unit == PartitionUnit.hour:
+        return moment + timedelta(hours=count)
+    elif unit == PartitionUnit.day:
+        return moment + timedelta(days=count)
+    elif unit == PartitionUnit.week:
+        return moment + timedelta(weeks=count)
+
+    months = count * (_MONTHS_IN_YEAR if unit == PartitionUnit.year else 1)
+    months += moment.month - 1
+    return moment.replace(
+        year=moment.year + months // _MONTHS_IN_YEAR,
+        month=months % _MONTHS_IN_YEAR + 1,
+    )
+
+
+def partition_name(table_name: str, suffix: str) -> str:
+    """Get name of the table partition.
+
+    Table name is shortened and followed by its hash if partition name
+    would be truncated by Postgres, so partitions names don't collide.
+    """
+    name = '{0}_{1}'.format(table_name, suffix)
+    if len(name.encode()) <= _MAX_NAME_BYTES:
+        return name
+
+    digest = sha1(table_name.encode(), usedforsecurity=False).hexdigest()
+    tail = '_{0}_{1}'.format(digest[:8], suffix)
+    prefix = table_name.encode()[:_MAX_NAME_BYTES - len(tail.encode())]
+    return prefix.decode(errors='ignore') + tail
+
+
+def _time_partitions(
+    table_name: str,
+    unit: PartitionUnit,
+    premake: int,
+    current: datetime,
+) -> list[Query]:
+    start = _truncate(current, unit)
+    queries = []
+    for index in range(premake + 1):
+        lower = _add_units(start, unit, index)
+        queries.append(create_partition_query(
+            table_name,
+            partition_name(
+                table_name,
+                'p{0}'.format(lower.strftime(_UNIT_FORMATS[unit])),
+            ),
+            range_bound(lower, _add_units(start, unit, index + 1)),
+        ))
+    return queries
+
+
+def _integer_partitions(
+    table_name: str,
+    step: int,
+    premake: int,
+    current: int,
+) -> list[Query]:
+    start = current // step * step
+    queries = []
+    for index in range(premake + 1):
+        lower = start + index * step
+        queries.append(create_partition_query(
+            table_name,
+            partition_name(table_name, 'p{0}'.format(lower)),
+            range_bound(lower, lower + step),
+        ))
+    return queries
+
+
+def range_partitions(
+    table_name: str,
+    partition_def: PartitionDef,
+    current: Any = None,
+) -> list[Query]:
+    """Create queries adding partitions of `current` key and upcoming ones.
+
+    Current key defaults to the current time or 0.
+    """
+    if partition_def.unit is not None:
+        return _time_partitions(
+            table_name,
+            partition_def.unit,
+            partition_def.premake,
+            current or datetime.now(timezone.utc),
+        )
+    elif partition_def.step is not None:
+        return _integer_partitions(
+            table_name,
+            partition_def.step,
+            partition_def.premake,
+            current or 0,
+        )
+    return []
+
+
+def partition_queries(
+    table_name: str,
+    partition_def: PartitionDef,
+) -> list[Query]:
+    """Create queries adding partitions of new table.
+
+    List partitioned table gets default partition for keys not listed.
+    """
+    if partition_def.method == PartitionMethod.range:
+        return range_partitions(table_name, partition_def)
+    elif partition_def.method == PartitionMethod.hash:
+        modulus = partition_def.partitions or 1
+        return [
+            create_partition_query(
+                table_name,
+                partition_name(table_name, 'h{0}'.format(remainder)),
+                hash_bound(modulus, remainder),
+            )
+            for remainder in range(modulus)
+        ]
+
+    queries = [
+        create_partition_query(
+            table_name,
+            partition_name(table_name, 'l{0}'.format(index)),
+            list_bound(key_values),
+        )
+        for index, key_values in enumerate(partition_def.values)
+    ]
+    queries.append(create_partition_query(
+        table_name,
+        partition_name(table_name, 'default'),
+        DEFAULT_BOUND,
+    ))
+    return queries
+
+
+async def premake_partitions(
+    table_name: str,
+    partition_def: PartitionDef,
+    conn: AsyncConnection[Any],
+) -> None:
+    """Create missing range partitions of current and upcoming keys."""
+    current = None
+    if partition_def.step is not None:
+        curr = await conn.execute(max_key_query(
+            table_name,
+            partition_def.column,
+        ))
+        max_key: tuple[int | None] | None = await curr.fetchone()
+        current = max_key[0] if max_key is not None else None
+
+    for query in range_partitions(table_name, partition_def, current):
+        await conn.execute(query)
+
+
+async def _premake_all(conn: AsyncConnection[Any]) -> None:
+    curr = await conn.execute(range_partitioned_tables_query())
+    tables: list[tuple[str, str | None]] = await curr.fetchall()
+    for table_name, comment in tables:
+        try:
+            partition_def = PartitionDef.model_validate_json(comment or '')
+        except ValidationError:
+            # Partitioned outside of the service.
+            continue
+
+        try:
+            await premake_partitions(table_name, partition_def, conn)
+        except PgError as err:
+            logger.warning(
+                'Partitions of %s are not created: %s',
+                table_name,
+                err,
+            )
+
+
+async def maintain_partitions(pool: Pool, interval: float) -> None:
+    """Premake partitions every `interval` seconds, runs until cancelled."""
+    while True:  # noqa: WPS457
+        try:
+            async with pool.connection() as conn:
+                await _premake_all(conn)
+        except (PgError, PoolTimeout) as err:
+            logger.warning('Partitions are not maintained: %s', err)
+        await asyncio.sleep(interval)
@@ -0,0 +1,70 @@
+"""Database connections pool."""
+
+from contextlib import AbstractAsyncContextManager
+from typing import Any, Callable, TypeAlias
+
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+
+from app.core.models import PoolStats
+from app.core.timing import TimedCursor, TimedServerCursor
+
+Pool: TypeAlias = AsyncConnectionPool[AsyncConnection[Any]]
+
+# Factory of context managers checking out connection for their block.
+Connect: TypeAlias = Callable[
+    [],
+    AbstractAsyncContextManager[AsyncConnection[Any]],
+]
+
+
+async def configure_connection(conn: AsyncConnection[Any]) -> None:
+    """Make connection record statements into requests timings."""
+    conn.cursor_factory = TimedCursor
+    conn.server_cursor_factory = TimedServerCursor
+
+
+def create_pool(
+    conninfo: str,
+    min_size: int,
+    max_size: int,
+    max_idle: float,
+    max_lifetime: float,
+    timeout: float,
+) -> Pool:
+    """Create closed connections pool.
+
+    Connections are in autocommit mode: operations manage transactions
+    themselves. Each connection is checked before it is handed out.
+    Statements are recorded into requests timings.
+    """
+    return AsyncConnectionPool(
+        conninfo,
+        min_size=min_size,
+        max_size=max_size,
+        max_idle=max_idle,
+        max_lifetime=max_lifetime,
+        timeout=timeout,
+        kwargs={'autocommit': True},
+        check=AsyncConnectionPool.check_connection,
+        configure=configure_connection,
+        open=False,
+    )
+
+
+def pool_stats(pool: Pool) -> PoolStats:
+    """Collect pool usage statistics."""
+    stats = pool.get_stats()
+    size = stats.get('pool_size', 0)
+    requests = stats.get('requests_num', 0)
+    wait_ms = stats.get('requests_wait_ms', 0)
+    return PoolStats(
+        min_size=pool.min_size,
+        max_size=pool.max_size,
+        size=size,
+        in_use=max(size - stats.get('pool_available', 0), 0),
+        waiting=stats.get('requests_waiting', 0),
+        requests=requests,
+        timeouts=stats.get('requests_errors', 0),
+        acquire_ms=wait_ms / requests if requests else 0,
+    )
@@ -1,24 +1,74 @@
 """SQL queries helpers."""
 
 
+from collections import OrderedDict
+from typing import Any, Callable
+
 from psycopg.abc import Query
-from psycopg.sql import SQL, Composed, Identifier, Placeholder
-from pydantic import BaseModel
+from psycopg.sql import (
+    SQL,
+    Composable,
+    Composed,
+    Identifier,
+    Literal,
+    Placeholder,
+)
+
+from app.core.models import (
+    FilterOperator,
+    IndexDef,
+    PartitionDef,
+    RowsCountMethod,
+    RowsFilter,
+    RowsQuery,
+    Scalar,
+    TableDef,
+)
 
-from app.core.models import TableDef
+# Tables are looked up in `pg_catalog` by name resolved with search_path.
+# Queries take `table_name` parameter so they can be prepared once per
+# connection and reused for any table.
 
 _TABLE_EXIST_QUERY = SQL("""
 SELECT EXISTS (
     SELECT 1
-    FROM information_schema.tables
-    WHERE table_name = {table_name}
+    FROM pg_class
+    WHERE
+        oid = to_regclass(quote_ident(%(table_name)s))
+        AND relkind IN ('r', 'p')
 );
 """)
 
 
-def table_exist_query(table_name: str) -> Query:
-    """Create SQL query for table declaration."""
-    return _TABLE_EXIST_QUERY.format(table_name=table_name)
+def table_exist_query() -> Query:
+    """Create SQL query that checks `table_name` table existence."""
+    return _TABLE_EXIST_QUERY
+
+
+_PRIMARY_KEY_QUERY = SQL("""
+SELECT
+    ARRAY(
+        SELECT a.attname
+        FROM
+            pg_index i
+            JOIN pg_attribute a
+                ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE
+            i.indrelid = c.oid
+            AND i.indisprimary
+        ORDER BY array_position(i.indkey::int2[], a.attnum)
+    ) as primary_key
+FROM
+    pg_class c
+WHERE
+    c.oid = to_regclass(quote_ident(%(table_name)s))
+    AND c.relkind IN ('r', 'p');
+""")
+
+
+def primary_key_query() -> Query:
+    """Create SQL query that gets `table_name` table primary key columns."""
+    return _PRIMARY_KEY_QUERY
 
 
 # Constraints
@@ -30,7 +80,11 @@ _PRIMARY_KEY = 'PRIMARY KEY'
 _COLUMN_DEF_QUERY = SQL('{name} {type} {constraints}')
 
 # Template for create table query.
-_TABLE_DEF_QUERY = SQL('CREATE TABLE {table_name} ({column_defs});')
+_TABLE_DEF_QUERY = SQL(
+    'CREATE TABLE {table_name} ({column_defs}){partition_by};',
+)
+
+_PARTITION_BY = SQL(' PARTITION BY {method} ({column})')
 
 
 def create_table_query(
@@ -56,61 +110,361 @@ def create_table_query(
         )
         column_defs.append(column_def)
 
+    partition_by: Composable = SQL('')
+    if table_def.partition is not None:
+        partition_by = _PARTITION_BY.format(
+            method=SQL(table_def.partition.method.value.upper()),
+            column=Identifier(table_def.partition.column),
+        )
+
     return _TABLE_DEF_QUERY.format(
         table_name=Identifier(table_name),
         column_defs=SQL(', ').join(column_defs),
+        partition_by=partition_by,
     )
 
 
-class TableInfoResult(BaseModel):
-    """Table metanfo."""
+# Partitioning definition is kept in the table comment, to create
+# upcoming range partitions later.
+_PARTITION_COMMENT_QUERY = SQL('COMMENT ON TABLE {table_name} IS {comment};')
+
 
-    qualified_name: str
+def partition_comment_query(
+    table_name: str,
+    partition_def: PartitionDef,
+) -> Query:
+    """Create query that saves partitioning definition of the table."""
+    return _PARTITION_COMMENT_QUERY.format(
+        table_name=Identifier(table_name),
+        comment=Literal(partition_def.model_dump_json()),
+    )
 
-    rows: int
 
-    size: int
+_RANGE_PARTITIONED_TABLES_QUERY = SQL("""
+SELECT
+    c.relname AS table_name,
+    obj_description(c.oid, 'pg_class') AS partition_def
+FROM
+    pg_partitioned_table p
+    JOIN pg_class c ON c.oid = p.partrelid
+WHERE
+    c.relnamespace = current_schema()::regnamespace
+    AND p.partstrat = 'r';
+""")
+
+
+def range_partitioned_tables_query() -> Query:
+    """Create SQL query that gets range partitioned tables definitions."""
+    return _RANGE_PARTITIONED_TABLES_QUERY
+
+
+_CREATE_PARTITION_QUERY = SQL("""
+CREATE TABLE IF NOT EXISTS {partition_name}
+PARTITION OF {table_name} {bound};
+""")
+
+
+def create_partition_query(
+    table_name: str,
+    partition_name: str,
+    bound: Composable,
+) -> Query:
+    """Create query that adds partition, unless it exists."""
+    return _CREATE_PARTITION_QUERY.format(
+        partition_name=Identifier(partition_name),
+        table_name=Identifier(table_name),
+        bound=bound,
+    )
+
+
+def range_bound(start: Any, end: Any) -> Composable:
+    """Create partition bound of keys from `start` until `end`."""
+    return SQL('FOR VALUES FROM ({start}) TO ({end})').format(
+        start=Literal(start),
+        end=Literal(end),
+    )
+
+
+def list_bound(key_values: list[Any]) -> Composable:
+    """Create partition bound of listed keys."""
+    return SQL('FOR VALUES IN ({key_values})').format(
+        key_values=SQL(', ').join(map(Literal, key_values)),
+    )
+
+
+_HASH_BOUND = SQL(
+    'FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})',
+)
+
+
+def hash_bound(modulus: int, remainder: int) -> Composable:
+    """Create partition bound of keys hashes with `remainder`."""
+    return _HASH_BOUND.format(
+        modulus=Literal(modulus),
+        remainder=Literal(remainder),
+    )
+
+
+DEFAULT_BOUND = SQL('DEFAULT')
+
+_MAX_KEY_QUERY = SQL('SELECT max({column}) FROM {table_name};')
+
+
+def max_key_query(table_name: str, column: str) -> Query:
+    """Create query that gets the greatest partition key in the table."""
+    return _MAX_KEY_QUERY.format(
+        column=Identifier(column),
+        table_name=Identifier(table_name),
+    )
+
+
+_PARTITIONS_QUERY = SQL("""
+SELECT
+    c.relname AS name,
+    pg_get_expr(c.relpartbound, c.oid) AS bound,
+    pg_total_relation_size(c.oid) AS size
+FROM
+    pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+WHERE
+    i.inhparent = to_regclass(quote_ident(%(table_name)s))
+ORDER BY c.relname;
+""")
+
+
+def partitions_query() -> Query:
+    """Create SQL query that gets `table_name` table partitions."""
+    return _PARTITIONS_QUERY
+
+
+_DETACH_PARTITION_QUERY = SQL("""
+ALTER TABLE {table_name} DETACH PARTITION {partition_name}{concurrently};
+""")
+
+
+def detach_partition_query(
+    table_name: str,
+    partition_name: str,
+    concurrently: bool = False,
+) -> Query:
+    """Create query that turns partition into standalone table.
+
+    `concurrently` detached partition doesn't block queries to the table,
+    but the query can't be run in transaction.
+    """
+    return _DETACH_PARTITION_QUERY.format(
+        table_name=Identifier(table_name),
+        partition_name=Identifier(partition_name),
+        concurrently=SQL(' CONCURRENTLY' if concurrently else ''),
+    )
 
 
 _TABLE_INFO_QUERY = SQL("""
 SELECT
-    quote_ident(table_catalog)
+    quote_ident(current_database())
     || '.'
-    || quote_ident(table_schema)
+    || quote_ident(n.nspname)
     || '.'
-    || quote_ident(table_name)
+    || quote_ident(c.relname)
     as qualified_name,
-    (SELECT count(*) FROM {table_name}) as rows,
-    pg_total_relation_size(quote_ident(table_name)) as size
+    (
+        SELECT
+            coalesce(
+                json_agg(
+                    json_build_object(
+                        'name', a.attname,
+                        'type', format_type(a.atttypid, NULL)
+                    )
+                    ORDER BY a.attnum
+                ),
+                '[]'
+            )
+        FROM
+            pg_attribute a
+        WHERE
+            a.attrelid = c.oid
+            AND a.attnum > 0
+            AND NOT a.attisdropped
+    ) as columns,
+    {rows} as rows,
+    {rows_method} as rows_method,
+    pg_total_relation_size(c.oid) as size
 FROM
-    information_schema.tables
+    pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    CROSS JOIN LATERAL (
+        SELECT
+            (CASE
+                WHEN c.reltuples < 0 OR c.relpages = 0
+                THEN coalesce(s.n_live_tup, 0)
+                ELSE c.reltuples / c.relpages * (
+                    pg_relation_size(c.oid)
+                    / current_setting('block_size')::int
+                )
+            END)::bigint as rows
+    ) as estimate
 WHERE
-    table_name = {table_name_str}
-    AND table_type = 'BASE TABLE';
+    c.oid = to_regclass(quote_ident(%(table_name)s))
+    AND c.relkind IN ('r', 'p');
 """)
 
+_EXACT_ROWS = SQL('(SELECT count(*) FROM {table_name})')
 
-def table_info_query(table_name: str) -> Query:
-    """Create query that retrieves information about a table."""
-    return _TABLE_INFO_QUERY.format(
-        table_name=Identifier(table_name),
-        table_name_str=table_name,
-    )
+_ESTIMATE_ROWS = SQL('estimate.rows')
+
+_AUTO_ROWS = SQL(
+    'CASE WHEN estimate.rows < {threshold} THEN {exact} ELSE {estimate} END',
+)
 
 
-_TABLE_COLUMNS_QUERY = SQL("""
+def table_info_query(
+    table_name: str,
+    rows_method: RowsCountMethod = RowsCountMethod.exact,
+    exact_threshold: int = 0,
+) -> Query:
+    """Create query that retrieves `table_name` table info and columns.
+
+    With `auto` rows method, rows are counted exactly only if estimated
+    rows count is below `exact_threshold`. Estimate query doesn't depend
+    on the table, exact count fails with `UndefinedTable` on missing table.
+    """
+    exact = _EXACT_ROWS.format(table_name=Identifier(table_name))
+    estimate = _ESTIMATE_ROWS
+    rows: Composable
+    method: Composable
+    if rows_method == RowsCountMethod.exact:
+        rows, method = exact, Literal(RowsCountMethod.exact.value)
+    elif rows_method == RowsCountMethod.estimate:
+        rows, method = estimate, Literal(RowsCountMethod.estimate.value)
+    else:
+        rows = _AUTO_ROWS.format(
+            threshold=exact_threshold,
+            exact=exact,
+            estimate=estimate,
+        )
+        method = _AUTO_ROWS.format(
+            threshold=exact_threshold,
+            exact=Literal(RowsCountMethod.exact.value),
+            estimate=Literal(RowsCountMethod.estimate.value),
+        )
+
+    return _TABLE_INFO_QUERY.format(rows=rows, rows_method=method)
+
+
+_TABLE_VERSION_QUERY = SQL("""
 SELECT
-    column_name as name, data_type as type
+    md5(concat_ws(
+        ';',
+        c.oid,
+        c.xmin,
+        (
+            SELECT
+                string_agg(a.xmin::text, ',' ORDER BY a.attnum)
+            FROM
+                pg_attribute a
+            WHERE
+                a.attrelid = c.oid
+                AND a.attnum > 0
+        ),
+        (
+            SELECT
+                string_agg(
+                    concat_ws(
+                        ':',
+                        p.oid,
+                        p.relfilenode,
+                        s.n_tup_ins,
+                        s.n_tup_upd,
+                        s.n_tup_del,
+                        pg_total_relation_size(p.oid)
+                    ),
+                    ',' ORDER BY p.oid
+                )
+            FROM
+                pg_class p
+                LEFT JOIN pg_stat_user_tables s ON s.relid = p.oid
+            WHERE
+                p.oid = c.oid
+                OR p.oid IN (SELECT relid FROM pg_partition_tree(c.oid))
+        ),
+        pg_last_wal_replay_lsn()
+    )) as version
 FROM
-    information_schema.columns
+    pg_class c
 WHERE
-    table_name = {table_name};
+    c.oid = to_regclass(quote_ident(%(table_name)s))
+    AND c.relkind IN ('r', 'p');
+""")
+
+
+def table_version_query() -> Query:
+    """Create query that retrieves `table_name` table version.
+
+    Version is a hash of cheap change indicators: catalog rows versions,
+    rows changes counters and sizes of the table and its partitions. It
+    changes along with table info, without reading the table. Statistics
+    counters aren't replayed by replicas, so there replay position is
+    taken instead: any replayed write changes version.
+    """
+    return _TABLE_VERSION_QUERY
+
+
+_TABLES_INFO_QUERY = SQL("""
+SELECT
+    t.table_name,
+    quote_ident(current_database())
+    || '.'
+    || quote_ident(n.nspname)
+    || '.'
+    || quote_ident(c.relname)
+    as qualified_name,
+    coalesce(columns.columns, '[]') as columns,
+    (CASE
+        WHEN c.reltuples < 0 OR c.relpages = 0
+        THEN coalesce(s.n_live_tup, 0)
+        ELSE c.reltuples / c.relpages * (
+            pg_relation_size(c.oid)
+            / current_setting('block_size')::int
+        )
+    END)::bigint as rows,
+    'estimate' as rows_method,
+    pg_total_relation_size(c.oid) as size
+FROM
+    unnest(%(table_names)s::text[]) WITH ORDINALITY AS t(table_name, ordinal)
+    JOIN pg_class c
+        ON c.oid = to_regclass(quote_ident(t.table_name))
+        AND c.relkind IN ('r', 'p')
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    LEFT JOIN LATERAL (
+        SELECT
+            json_agg(
+                json_build_object(
+                    'name', a.attname,
+                    'type', format_type(a.atttypid, NULL)
+                )
+                ORDER BY a.attnum
+            ) as columns
+        FROM
+            pg_attribute a
+        WHERE
+            a.attrelid = c.oid
+            AND a.attnum > 0
+            AND NOT a.attisdropped
+    ) as columns ON true
+ORDER BY t.ordinal;
 """)
 
 
-def table_columns_query(table_name: str) -> Query:
-    """Create query that get table columns info."""
-    return _TABLE_COLUMNS_QUERY.format(table_name=table_name)
+def tables_info_query() -> Query:
+    """Create query that retrieves info of `table_names` tables at once.
+
+    Rows are estimated from planner statistics. Missing tables are
+    skipped, found ones are returned in `table_names` order along with
+    `table_name` they were requested by.
+    """
+    return _TABLES_INFO_QUERY
 
 
 _INSERT_EMPTY_ROW_QUERY = SQL(
@@ -119,25 +473,539 @@ _INSERT_EMPTY_ROW_QUERY = SQL(
 _INSERT_ROW_QUERY = SQL("""
 INSERT INTO {table_name}
 ({column_names})
-VALUES ({placeholders})
+VALUES {values}
 RETURNING *;
 """)
 
+# Postgres limit of bind parameters in one statement.
+MAX_PARAMETERS = 65535
+
 
 def insert_row_query(
     table_name: str,
     column_names: list[str],
-) -> Query:
-    """Create insert query."""
+    rows_count: int = 1,
+) -> Composable:
+    """Create insert query for `rows_count` rows with the same columns."""
     if not column_names:
         return _INSERT_EMPTY_ROW_QUERY.format(
             table_name=Identifier(table_name),
         )
 
+    row_values = SQL('({placeholders})').format(
+        placeholders=SQL(', ').join(Placeholder() * len(column_names)),
+    )
     return _INSERT_ROW_QUERY.format(
         table_name=Identifier(table_name),
         column_names=SQL(', ').join(map(Identifier, column_names)),
-        placeholders=SQL(', ').join(Placeholder() * len(column_names)),
+        values=SQL(', ').join([row_values] * rows_count),
+    )
+
+
+StatementKey = tuple[str, tuple[str, ...], int]
+
+
+class StatementCache:
+    """LRU cache of rendered statements per table.
+
+    Statements are rendered to text once, so executing them skips SQL
+    composition, and Postgres gets the same text for the same shape to
+    reuse prepared statements. Text is marked with cache generation, which
+    changes when any table is invalidated: connections still have old
+    statements prepared, and those fail if the table was recreated with
+    other columns.
+    """
+
+    def __init__(self, max_size: int = 1000) -> None:
+        """Init empty cache."""
+        self.max_size = max_size
+        self._statements: OrderedDict[StatementKey, str] = OrderedDict()
+        self._generation = 0
+
+    def get(
+        self,
+        key: StatementKey,
+        build: Callable[[], Composable],
+    ) -> Query:
+        """Get statement, rendering it with `build` if not cached."""
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = '/* {0} */ {1}'.format(
+                self._generation,
+                build().as_string(),
+            )
+            self._statements[key] = statement
+            while len(self._statements) > self.max_size:
+                self._statements.popitem(last=False)
+
+        self._statements.move_to_end(key)
+        return statement
+
+    def invalidate(self, table_name: str) -> None:
+        """Drop table statements."""
+        self._generation += 1
+        for key in list(self._statements):
+            if key[0] == table_name:
+                del self._statements[key]  # noqa: WPS420
+
+    def clear(self) -> None:
+        """Drop all statements."""
+        self._generation += 1
+        self._statements.clear()
+
+    def __len__(self) -> int:
+        """Count cached statements."""
+        return len(self._statements)
+
+
+# Insert statements shared by connections.
+insert_statements = StatementCache()
+
+
+def cached_insert_row_query(
+    table_name: str,
+    column_names: list[str],
+    rows_count: int = 1,
+) -> Query:
+    """Get rendered `insert_row_query` from `insert_statements`."""
+    return insert_statements.get(
+        (table_name, tuple(column_names), rows_count),
+        lambda: insert_row_query(table_name, column_names, rows_count),
+    )
+
+
+_SELECT_ROWS_QUERY = SQL('SELECT * FROM {table_name}{after}{order}{limit};')
+
+_AFTER_KEY = SQL(' WHERE ({key_columns}) > ({placeholders})')
+
+_ORDER_BY_KEY = SQL(' ORDER BY {key_columns}')
+
+_LIMIT = SQL(' LIMIT {limit}')
+
+
+def select_rows_query(
+    table_name: str,
+    key_columns: list[str],
+    after: bool = False,
+    limit: bool = False,
+) -> Query:
+    """Create query that reads table rows ordered by key columns.
+
+    With `after`, query takes key columns values as parameters and selects
+    only rows after them. With `limit`, query takes rows limit as the last
+    parameter.
+    """
+    key_identifiers = SQL(', ').join(map(Identifier, key_columns))
+    return _SELECT_ROWS_QUERY.format(
+        table_name=Identifier(table_name),
+        after=_AFTER_KEY.format(
+            key_columns=key_identifiers,
+            placeholders=SQL(', ').join(Placeholder() * len(key_columns)),
+        ) if after else SQL(''),
+        order=_ORDER_BY_KEY.format(
+            key_columns=key_identifiers,
+        ) if key_columns else SQL(''),
+        limit=_LIMIT.format(limit=Placeholder()) if limit else SQL(''),
+    )
+
+
+_FILTER_ROWS_QUERY = SQL(
+    '{explain}SELECT {column_names} FROM {table_name}{where}{order}{limit};',
+)
+
+_EXPLAIN = SQL('EXPLAIN (FORMAT JSON) ')
+
+_EXPLAIN_ANALYZE = SQL('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ')
+
+_COMPARISONS = {
+    FilterOperator.eq: SQL('{column} = {value}'),
+    FilterOperator.ne: SQL('{column} <> {value}'),
+    FilterOperator.lt: SQL('{column} < {value}'),
+    FilterOperator.le: SQL('{column} <= {value}'),
+    FilterOperator.gt: SQL('{column} > {value}'),
+    FilterOperator.ge: SQL('{column} >= {value}'),
+}
+
+
+def _filter_condition(
+    rows_filter: RowsFilter,
+    literal: bool = False,
+) -> Composable:
+    """Create filter condition with values placeholders or `literal` ones.
+
+    Literal values are used where parameters aren't allowed, like index
+    predicates.
+    """
+    def value(filter_value: Scalar) -> Composable:  # noqa: WPS430
+        return Literal(filter_value) if literal else Placeholder()
+
+    column = Identifier(rows_filter.column)
+    if rows_filter.op == FilterOperator.is_null:
+        if rows_filter.value:
+            return SQL('{column} IS NULL').format(column=column)
+        return SQL('{column} IS NOT NULL').format(column=column)
+    elif isinstance(rows_filter.value, list):
+        return SQL('{column} IN ({values})').format(
+            column=column,
+            values=SQL(', ').join(map(value, rows_filter.value)),
+        )
+    return _COMPARISONS[rows_filter.op].format(
+        column=column,
+        value=value(rows_filter.value),
+    )
+
+
+def filter_rows_query(
+    table_name: str,
+    rows_query: RowsQuery,
+    explain: bool = False,
+    analyze: bool = False,
+) -> Query:
+    """Create query that selects rows matching all filters.
+
+    Filters values are passed as parameters, see `filter_rows_params`.
+    With `explain`, query returns its plan instead of rows, executed to
+    measure actual times with `analyze`.
+    """
+    explain_sql: Composable = SQL('')
+    if explain:
+        explain_sql = _EXPLAIN_ANALYZE if analyze else _EXPLAIN
+
+    where: Composable = SQL('')
+    if rows_query.where:
+        where = SQL(' WHERE ') + SQL(' AND ').join(
+            map(_filter_condition, rows_query.where),
+        )
+
+    order: Composable = SQL('')
+    if rows_query.order_by:
+        order = SQL(' ORDER BY ') + SQL(', ').join(
+            SQL('{column} DESC' if key.descending else '{column}').format(
+                column=Identifier(key.column),
+            )
+            for key in rows_query.order_by
+        )
+
+    limit: Composable = SQL('')
+    if rows_query.limit:
+        limit = _LIMIT.format(limit=Placeholder())
+
+    column_names: Composable = SQL('*')
+    if rows_query.columns:
+        column_names = SQL(', ').join(map(Identifier, rows_query.columns))
+
+    return _FILTER_ROWS_QUERY.format(
+        explain=explain_sql,
+        column_names=column_names,
+        table_name=Identifier(table_name),
+        where=where,
+        order=order,
+        limit=limit,
+    )
+
+
+def filter_rows_params(rows_query: RowsQuery) -> list[Any]:
+    """Get parameters of `filter_rows_query` in placeholders order."""
+    params: list[Any] = []
+    for rows_filter in rows_query.where:
+        if rows_filter.op == FilterOperator.is_null:
+            continue
+        elif isinstance(rows_filter.value, list):
+            params.extend(rows_filter.value)
+        else:
+            params.append(rows_filter.value)
+
+    if rows_query.limit:
+        params.append(rows_query.limit)
+    return params
+
+
+_INDEXES_QUERY = SQL("""
+SELECT
+    c.relname AS name,
+    ARRAY(
+        SELECT a.attname
+        FROM pg_attribute a
+        WHERE
+            a.attrelid = i.indrelid
+            AND a.attnum = ANY(i.indkey)
+        ORDER BY array_position(i.indkey::int2[], a.attnum)
+    ) AS columns,
+    am.amname AS method,
+    i.indisunique AS unique,
+    pg_get_expr(i.indpred, i.indrelid) AS predicate,
+    i.indisvalid AS valid,
+    pg_relation_size(i.indexrelid) AS size,
+    coalesce(s.idx_scan, 0) AS scans,
+    coalesce(s.idx_tup_read, 0) AS tuples_read,
+    coalesce(s.idx_tup_fetch, 0) AS tuples_fetched
+FROM
+    pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_am am ON am.oid = c.relam
+    LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = i.indexrelid
+WHERE
+    i.indrelid = to_regclass(quote_ident(%(table_name)s))
+ORDER BY c.relname;
+""")
+
+
+def indexes_query() -> Query:
+    """Create SQL query that gets `table_name` table indexes statistics."""
+    return _INDEXES_QUERY
+
+
+_TABLE_PARTITIONED_QUERY = SQL("""
+SELECT EXISTS (
+    SELECT 1
+    FROM pg_class
+    WHERE
+        oid = to_regclass(quote_ident(%(table_name)s))
+        AND relkind = 'p'
+);
+""")
+
+
+def table_partitioned_query() -> Query:
+    """Create SQL query that checks whether `table_name` is partitioned."""
+    return _TABLE_PARTITIONED_QUERY
+
+
+_CREATE_INDEX_QUERY = SQL("""
+CREATE {unique}INDEX {concurrently}{index_name}
+ON {table_name} USING {method} ({column_names}){where};
+""")
+
+_DROP_INDEX_QUERY = SQL('DROP INDEX {concurrently}{index_name};')
+
+_CONCURRENTLY = SQL('CONCURRENTLY ')
+
+
+def create_index_query(
+    table_name: str,
+    index_def: IndexDef,
+    concurrently: bool = False,
+) -> Query:
+    """Create query that builds table index.
+
+    `concurrently` built index doesn't block writes, but the query can't
+    be run in transaction.
+    """
+    where: Composable = SQL('')
+    if index_def.where:
+        where = SQL(' WHERE ') + SQL(' AND ').join(
+            _filter_condition(rows_filter, literal=True)
+            for rows_filter in index_def.where
+        )
+
+    return _CREATE_INDEX_QUERY.format(
+        unique=SQL('UNIQUE ' if index_def.unique else ''),
+        concurrently=_CONCURRENTLY if concurrently else SQL(''),
+        index_name=Identifier(index_def.name),
+        table_name=Identifier(table_name),
+        method=SQL(index_def.method.value),
+        column_names=SQL(', ').join(map(Identifier, index_def.columns)),
+        where=where,
+    )
+
+
+def drop_index_query(index_name: str, concurrently: bool = False) -> Query:
+    """Create query that drops index."""
+    return _DROP_INDEX_QUERY.format(
+        concurrently=_CONCURRENTLY if concurrently else SQL(''),
+        index_name=Identifier(index_name),
+    )
+
+
+_COPY_TABLE_QUERY = SQL("""
+COPY {table_name} ({column_names})
+FROM STDIN (FORMAT {copy_format});
+""")
+
+
+def copy_table_query(
+    table_name: str,
+    column_names: list[str],
+    csv: bool = False,
+) -> Query:
+    """Create query that loads rows straight into the table."""
+    return _COPY_TABLE_QUERY.format(
+        table_name=Identifier(table_name),
+        column_names=SQL(', ').join(map(Identifier, column_names)),
+        copy_format=SQL('CSV' if csv else 'TEXT'),
+    )
+
+
+# Staging table for bulk loads. Lives until the end of the transaction.
+_STAGING_TABLE = Identifier('_rest_pg_staging')
+
+# Staging column that keeps rows in the order they were sent.
+_STAGING_ORDINAL = Identifier('_rest_pg_ordinal')
+
+_CREATE_STAGING_QUERY = SQL("""
+CREATE TEMP TABLE {staging} ON COMMIT DROP AS
+SELECT {column_names}, NULL::bigint AS {ordinal}
+FROM {table_name}
+WITH NO DATA;
+""")
+
+
+def create_staging_query(
+    table_name: str,
+    column_names: list[str],
+) -> Query:
+    """Create query that declares staging table for given columns."""
+    return _CREATE_STAGING_QUERY.format(
+        staging=_STAGING_TABLE,
+        column_names=SQL(', ').join(map(Identifier, column_names)),
+        ordinal=_STAGING_ORDINAL,
+        table_name=Identifier(table_name),
+    )
+
+
+_STAGING_TYPES_QUERY = SQL('SELECT {column_names} FROM {staging} LIMIT 0;')
+
+
+def staging_types_query(column_names: list[str]) -> Query:
+    """Create query that describes staging table columns types."""
+    return _STAGING_TYPES_QUERY.format(
+        column_names=SQL(', ').join(map(Identifier, column_names)),
+        staging=_STAGING_TABLE,
+    )
+
+
+_COPY_STAGING_QUERY = SQL("""
+COPY {staging} ({column_names}, {ordinal})
+FROM STDIN (FORMAT {copy_format});
+""")
+
+
+def copy_staging_query(
+    column_names: list[str],
+    binary: bool,
+) -> Query:
+    """Create query that loads rows into staging table."""
+    return _COPY_STAGING_QUERY.format(
+        staging=_STAGING_TABLE,
+        column_names=SQL(', ').join(map(Identifier, column_names)),
+        ordinal=_STAGING_ORDINAL,
+        copy_format=SQL('BINARY' if binary else 'TEXT'),
+    )
+
+
+_INSERT_FROM_STAGING_QUERY = SQL("""
+INSERT INTO {table_name}
+({column_names})
+SELECT {column_names}
+FROM {staging}
+ORDER BY {ordinal}
+RETURNING *;
+""")
+
+
+def insert_from_staging_query(
+    table_name: str,
+    column_names: list[str],
+) -> Query:
+    """Create query that moves staged rows into the table."""
+    return _INSERT_FROM_STAGING_QUERY.format(
+        table_name=Identifier(table_name),
+        column_names=SQL(', ').join(map(Identifier, column_names)),
+        staging=_STAGING_TABLE,
+        ordinal=_STAGING_ORDINAL,
+    )
+
+
+_UPSERT_FROM_STAGING_QUERY = SQL("""
+WITH upserted AS (
+    INSERT INTO {table_name} AS {target}
+    ({column_names})
+    SELECT DISTINCT ON ({key_columns}) {column_names}
+    FROM {staging}
+    ORDER BY {key_columns}, {ordinal} DESC
+    ON CONFLICT ({key_columns}) {action}
+    RETURNING xmax = 0 AS inserted
+)
+SELECT
+    count(*) FILTER (WHERE inserted) AS inserted,
+    count(*) FILTER (WHERE NOT inserted) AS updated
+FROM upserted;
+""")
+
+_DO_UPDATE = SQL("""DO UPDATE
+    SET ({columns}) = ROW({excluded})
+    WHERE ROW({current}) IS DISTINCT FROM ROW({excluded})""")
+
+_DO_NOTHING = SQL('DO NOTHING')
+
+_UPSERT_TARGET = 'target'
+
+
+def upsert_from_staging_query(
+    table_name: str,
+    column_names: list[str],
+    key_columns: list[str],
+) -> Query:
+    """Create query that merges staged rows into the table by key columns.
+
+    Rows with the same key are merged in order, the last one wins. Rows
+    equal to existing ones are not updated. Query returns inserted and
+    updated rows counts.
+    """
+    update_columns = [
+        column for column in column_names if column not in key_columns
+    ]
+    action: Composable = _DO_NOTHING
+    if update_columns:
+        action = _DO_UPDATE.format(
+            columns=SQL(', ').join(map(Identifier, update_columns)),
+            excluded=SQL(', ').join(
+                Identifier('excluded', column) for column in update_columns
+            ),
+            current=SQL(', ').join(
+                Identifier(_UPSERT_TARGET, column)
+                for column in update_columns
+            ),
+        )
+
+    return _UPSERT_FROM_STAGING_QUERY.format(
+        table_name=Identifier(table_name),
+        target=Identifier(_UPSERT_TARGET),
+        column_names=SQL(', ').join(map(Identifier, column_names)),
+        key_columns=SQL(', ').join(map(Identifier, key_columns)),
+        staging=_STAGING_TABLE,
+        ordinal=_STAGING_ORDINAL,
+        action=action,
+    )
+
+
+_DROP_STAGING_QUERY = SQL('DROP TABLE {staging};')
+
+
+def drop_staging_query() -> Query:
+    """Create query that removes staging table."""
+    return _DROP_STAGING_QUERY.format(staging=_STAGING_TABLE)
+
+
+# Channel to notify app instances about tables creation and removal.
+TABLES_CHANNEL = 'rest_pg_tables'
+
+_LISTEN_TABLES_QUERY = SQL('LISTEN {channel};')
+
+
+def listen_tables_query() -> Query:
+    """Create query that subscribes to tables changes."""
+    return _LISTEN_TABLES_QUERY.format(channel=Identifier(TABLES_CHANNEL))
+
+
+_NOTIFY_TABLE_QUERY = SQL('SELECT pg_notify({channel}, {table_name});')
+
+
+def notify_table_query(table_name: str) -> Query:
+    """Create query that notifies about table change on commit."""
+    return _NOTIFY_TABLE_QUERY.format(
+        channel=TABLES_CHANNEL,
+        table_name=table_name,
     )
 
 
@@ -147,3 +1015,37 @@ _DROP_TABLE_QUERY = SQL('DROP TABLE {table_name}')
 def drop_table_query(table_name: str) -> Query:
     """Create drop table query."""
     return _DROP_TABLE_QUERY.format(table_name=Identifier(table_name))
+
+
+_REPLICA_STATUS_QUERY = SQL("""
+SELECT
+    CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(
+            extract(epoch FROM now() - pg_last_xact_replay_timestamp()),
+            'Infinity'
+        )
+    END::float8 AS lag,
+    CASE
+        WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn()
+        ELSE pg_current_wal_lsn()
+    END - '0/0'::pg_lsn AS replay_lsn;
+""")
+
+
+def replica_status_query() -> Query:
+    """Create query that gets replication lag and replayed WAL position.
+
+    Lag is 0 when all received WAL is replayed, or the server is not a
+    replica. Positions are returned as bytes offsets.
+    """
+    return _REPLICA_STATUS_QUERY
+
+
+_CURRENT_LSN_QUERY = SQL("SELECT pg_current_wal_lsn() - '0/0'::pg_lsn;")
+
+
+def current_lsn_query() -> Query:
+    """Create query that gets current WAL write position offset."""
+    return _CURRENT_LSN_QUERY
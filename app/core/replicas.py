@@ -0,0 +1,155 @@
+"""Read replicas routing.
+
+Read-only operations may be served by replicas, each with its own pool.
+Replicas are polled for replication lag and replayed WAL position:
+lagging and unreachable ones are skipped. Clients reading their own
+writes pass the write position, only replicas that replayed it are
+chosen then. Without suitable replica reads go to the primary.
+"""
+
+import asyncio
+import logging
+from decimal import Decimal
+from typing import Any
+
+from psycopg import AsyncConnection
+from psycopg.conninfo import conninfo_to_dict
+from psycopg.errors import Error as PgError
+from psycopg_pool import PoolTimeout
+
+from app.core.metrics import REPLICA_LAG_SECONDS
+from app.core.pool import Pool
+from app.core.queries import current_lsn_query, replica_status_query
+from app.core.tables import DbError
+
+logger = logging.getLogger(__name__)
+
+# Bits of WAL position offset below the `/` in text representation.
+_LSN_LOW_BITS = 32
+
+# WAL position parts are hexadecimal.
+_LSN_BASE = 16
+
+
+def parse_lsn(lsn: str) -> int | None:
+    """Parse WAL position in Postgres text format, like `16/B374D848`."""
+    high, sep, low = lsn.strip().partition('/')
+    if not sep:
+        return None
+    try:
+        return (int(high, _LSN_BASE) << _LSN_LOW_BITS) + int(low, _LSN_BASE)
+    except ValueError:
+        return None
+
+
+def format_lsn(lsn: int) -> str:
+    """Format WAL position offset in Postgres text format."""
+    return '{0:X}/{1:X}'.format(
+        lsn >> _LSN_LOW_BITS,
+        lsn & ((1 << _LSN_LOW_BITS) - 1),
+    )
+
+
+def replica_name(conninfo: str) -> str:
+    """Get replica name for logs and metrics: its host and port."""
+    params = conninfo_to_dict(conninfo)
+    return '{0}:{1}'.format(params.get('host', ''), params.get('port', ''))
+
+
+class Replica:
+    """Read replica pool and replication state."""
+
+    def __init__(self, name: str, pool: Pool) -> None:
+        """Init replica with unknown state, it is not used until checked."""
+        self.name = name
+        self.pool = pool
+        self.lag: float | None = None
+        self.replay_lsn = 0
+
+    def load(self) -> int:
+        """Get connections in use and requests waiting for them."""
+        stats = self.pool.get_stats()
+        in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+        return in_use + stats.get('requests_waiting', 0)
+
+    async def check(self, timeout: float) -> None:
+        """Update replication state, reset it if replica is unreachable."""
+        try:
+            async with self.pool.connection(timeout=timeout) as conn:
+                curr = await conn.execute(replica_status_query())
+                status: tuple[float, Decimal] | None = await curr.fetchone()
+        except (PgError, PoolTimeout) as err:
+            if self.lag is not None:
+                logger.warning('Replica %s is unavailable: %s', self.name, err)
+            self.lag = None
+            REPLICA_LAG_SECONDS.labels(self.name).set(float('nan'))
+            return
+
+        if status is not None:
+            self.lag = status[0]
+            self.replay_lsn = int(status[1])
+            REPLICA_LAG_SECONDS.labels(self.name).set(self.lag)
+
+
+class ReplicaSet:
+    """Replicas chosen for reads by load and replication state."""
+
+    def __init__(self, replicas: list[Replica], max_lag: float = 5) -> None:
+        """Init set of replicas skipped when lagging more than `max_lag`."""
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self._turn = 0
+
+    def choose(self, min_lsn: int = 0) -> Replica | None:
+        """Choose the least loaded replica that replayed `min_lsn`.
+
+        Equally loaded replicas take turns. None if no replica is fresh
+        enough.
+        """
+        candidates = [
+            replica
+            for replica in self.replicas
+            if replica.lag is not None
+            and replica.lag <= self.max_lag
+            and replica.replay_lsn >= min_lsn
+        ]
+        if not candidates:
+            return None
+
+        self._turn = (self._turn + 1) % len(candidates)
+        candidates = candidates[self._turn:] + candidates[:self._turn]
+        return min(candidates, key=Replica.load)
+
+    async def check(self, timeout: float) -> None:
+        """Update replication state of all replicas."""
+        await asyncio.gather(*(
+            replica.check(timeout) for replica in self.replicas
+        ))
+
+    async def open(self) -> None:
+        """Open replicas pools without waiting for connections."""
+        for replica in self.replicas:
+            await replica.pool.open(wait=False)
+
+    async def close(self) -> None:
+        """Close replicas pools."""
+        for replica in self.replicas:
+            await replica.pool.close()
+
+
+async def monitor_replicas(replicas: ReplicaSet, interval: float) -> None:
+    """Check replicas every `interval` seconds, runs until cancelled."""
+    while True:  # noqa: WPS457
+        await replicas.check(timeout=interval)
+        await asyncio.sleep(interval)
+
+
+async def current_lsn(conn: AsyncConnection[Any]) -> int | DbError:
+    """Get WAL position, that replicas must replay to see prior writes."""
+    try:
+        curr = await conn.execute(current_lsn_query(), prepare=True)
+        result: tuple[Decimal] | None = await curr.fetchone()
+    except PgError as err:
+        return DbError(message=str(err))
+
+    return int(result[0]) if result is not None else 0
@@ -0,0 +1,288 @@
+"""Rows reading operations.
+
+Rows are read through a named server-side cursor and handed out in
+batches, so memory usage doesn't depend on the table size. Queries
+filter, sort and project rows in Postgres, so indexes are used and only
+requested data is sent.
+"""
+
+from typing import Any, AsyncGenerator, AsyncIterator, NamedTuple
+
+from psycopg import AsyncConnection
+from psycopg.abc import Query
+from psycopg.errors import Error as PgError
+
+from app.core.cache import table_cache
+from app.core.metrics import DbOperation, track_db
+from app.core.models import ColumnInfo, RowsCountMethod, RowsQuery, TableMeta
+from app.core.queries import (
+    filter_rows_params,
+    filter_rows_query,
+    primary_key_query,
+    select_rows_query,
+)
+from app.core.tables import DbError, get_table_info
+
+# Name of server-side cursor used to read rows.
+_ROWS_CURSOR = 'rest_pg_rows'
+
+
+class RowBatch(NamedTuple):
+    """Rows fetched from cursor at once."""
+
+    # Columns names.
+    columns: list[str]
+
+    # Rows values in columns order.
+    rows: list[tuple[Any, ...]]
+
+    # Columns Postgres types oids, empty if unknown.
+    types: list[int] = []
+
+
+async def get_primary_key(
+    table_name: str,
+    conn: AsyncConnection[Any],
+    update_cache: bool = True,
+) -> list[str] | None | DbError:
+    """Get table primary key columns, empty if there is no primary key.
+
+    Result is cached in `table_cache`, unless `update_cache` is unset.
+    """
+    table_meta = table_cache.get(table_name)
+    if table_meta is not None:
+        if not table_meta.exists:
+            return None
+        elif table_meta.primary_key is not None:
+            return table_meta.primary_key
+
+    try:
+        with track_db(DbOperation.primary_key):
+            curr = await conn.execute(
+                primary_key_query(),
+                {'table_name': table_name},
+                prepare=True,
+            )
+            result: tuple[list[str]] | None = await curr.fetchone()
+    except PgError as err:
+        return DbError(message=str(err))
+
+    if not update_cache:
+        return result[0] if result is not None else None
+    elif result is None:
+        table_cache.put(table_name, TableMeta(exists=False))
+        return None
+
+    table_cache.update(
+        table_name,
+        TableMeta(exists=True, primary_key=result[0]),
+    )
+    return result[0]
+
+
+async def _fetch_batches(
+    conn: AsyncConnection[Any],
+    query: Query,
+    params: list[Any],
+    batch_size: int,
+) -> AsyncGenerator[RowBatch, None]:
+    async with conn.transaction():
+        async with conn.cursor(name=_ROWS_CURSOR) as curr:
+            await curr.execute(query, params)
+            description = curr.description or []
+            columns = [column.name for column in description]
+            types = [column.type_code for column in description]
+            # The first batch is sent even if empty to pass columns.
+            rows = await curr.fetchmany(batch_size)
+            yield RowBatch(columns=columns, rows=rows, types=types)
+            while rows := await curr.fetchmany(batch_size):
+                yield RowBatch(columns=columns, rows=rows, types=types)
+
+
+async def _prepend(
+    first_batch: RowBatch,
+    batches: AsyncGenerator[RowBatch, None],
+) -> AsyncIterator[RowBatch]:
+    try:
+        yield first_batch
+        async for batch in batches:
+            yield batch
+    finally:
+        await batches.aclose()
+
+
+async def _prefetch(
+    batches: AsyncGenerator[RowBatch, None],
+) -> AsyncIterator[RowBatch] | DbError:
+    # Invalid values and columns fail the query on the first fetch: report
+    # them as errors instead of breaking the response stream.
+    try:
+        first_batch = await anext(batches)
+    except PgError as err:
+        return DbError(message=str(err))
+    return _prepend(first_batch, batches)
+
+
+async def read_rows(
+    table_name: str,
+    conn: AsyncConnection[Any],
+    after: list[Any] | None = None,
+    limit: int | None = None,
+    batch_size: int = 1000,
+    update_cache: bool = True,
+) -> AsyncIterator[RowBatch] | None | DbError:
+    """Read table rows in primary key order.
+
+    Rows are paginated by keyset: `after` holds primary key values of the
+    last row of the previous page. Tables without primary key are read in
+    storage order and can't be paginated.
+
+    The first batch is fetched before returning, so invalid `after` values
+    result in error. Returned iterator holds transaction open on `conn`
+    until exhausted or closed. Database errors while reading the rest are
+    raised. Primary key is cached, unless `update_cache` is unset.
+    """
+    key_columns = await get_primary_key(table_name, conn, update_cache)
+    if key_columns is None or isinstance(key_columns, DbError):
+        return key_columns
+
+    if after and len(after) != len(key_columns):
+        return DbError(
+            message='Table {table_name} is paginated by {count} key columns, '
+            'got {after} values'.format(
+                table_name=table_name,
+                count=len(key_columns),
+                after=len(after),
+            ),
+        )
+
+    params: list[Any] = [*(after or []), *([limit] if limit else [])]
+    query = select_rows_query(
+        table_name,
+        key_columns,
+        after=bool(after),
+        limit=bool(limit),
+    )
+    return await _prefetch(_fetch_batches(conn, query, params, batch_size))
+
+
+async def get_columns(
+    table_name: str,
+    conn: AsyncConnection[Any],
+    update_cache: bool = True,
+    cached: bool = True,
+) -> list[ColumnInfo] | None | DbError:
+    """Get table columns, from `table_cache` if `cached`."""
+    table_meta = table_cache.get(table_name) if cached else None
+    if table_meta is not None:
+        if not table_meta.exists:
+            return None
+        elif table_meta.columns is not None:
+            return table_meta.columns
+
+    table_info = await get_table_info(
+        table_name,
+        conn,
+        RowsCountMethod.estimate,
+        update_cache=update_cache,
+    )
+    if table_info is None or isinstance(table_info, DbError):
+        return table_info
+    return table_info.columns
+
+
+def _unknown_columns(
+    rows_query: RowsQuery,
+    columns: list[ColumnInfo],
+) -> list[str]:
+    known = {column.name for column in columns}
+    referenced = [
+        *(rows_query.columns or []),
+        *(rows_filter.column for rows_filter in rows_query.where),
+        *(key.column for key in rows_query.order_by),
+    ]
+    return [
+        column for column in dict.fromkeys(referenced) if column not in known
+    ]
+
+
+async def _check_columns(
+    table_name: str,
+    rows_query: RowsQuery,
+    conn: AsyncConnection[Any],
+    update_cache: bool,
+) -> list[ColumnInfo] | None | DbError:
+    """Get table columns, error if query references unknown ones.
+
+    Columns are taken from `table_cache` and refetched when some are
+    unknown, as the table may be altered outside of the service.
+    """
+    columns = await get_columns(table_name, conn, update_cache)
+    if columns is None or isinstance(columns, DbError):
+        return columns
+    elif _unknown_columns(rows_query, columns):
+        columns = await get_columns(table_name, conn, update_cache, False)
+        if columns is None or isinstance(columns, DbError):
+            return columns
+
+    unknown = _unknown_columns(rows_query, columns)
+    if unknown:
+        return DbError(message='Table {0} has no columns {1}'.format(
+            table_name,
+            ', '.join(unknown),
+        ))
+    return columns
+
+
+async def query_rows(
+    table_name: str,
+    rows_query: RowsQuery,
+    conn: AsyncConnection[Any],
+    batch_size: int = 1000,
+    update_cache: bool = True,
+) -> AsyncIterator[RowBatch] | None | DbError:
+    """Read table rows matching the query.
+
+    Query columns are checked against table columns and the first batch
+    is fetched before returning, so invalid queries result in error.
+    Returned iterator holds transaction open on `conn` until exhausted
+    or closed, as `read_rows` one.
+    """
+    columns = await _check_columns(table_name, rows_query, conn, update_cache)
+    if columns is None or isinstance(columns, DbError):
+        return columns
+
+    return await _prefetch(_fetch_batches(
+        conn,
+        filter_rows_query(table_name, rows_query),
+        filter_rows_params(rows_query),
+        batch_size,
+    ))
+
+
+async def explain_rows_query(
+    table_name: str,
+    rows_query: RowsQuery,
+    conn: AsyncConnection[Any],
+    analyze: bool = False,
+    update_cache: bool = True,
+) -> list[dict[str, Any]] | None | DbError:
+    """Get rows query execution plan, as `EXPLAIN (FORMAT JSON)` returns.
+
+    With `analyze` the query is executed, the plan includes actual times
+    and buffers usage.
+    """
+    columns = await _check_columns(table_name, rows_query, conn, update_cache)
+    if columns is None or isinstance(columns, DbError):
+        return columns
+
+    try:
+        curr = await conn.execute(
+            filter_rows_query(table_name, rows_query, True, analyze),
+            filter_rows_params(rows_query),
+        )
+        result: tuple[list[dict[str, Any]]] | None = await curr.fetchone()
+    except PgError as err:
+        return DbError(message=str(err))
+
+    return result[0] if result is not None else []
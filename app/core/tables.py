@@ -5,18 +5,42 @@ from typing import Any
 
 from psycopg import AsyncConnection
 from psycopg.errors import Error as PgError
+from psycopg.errors import FeatureNotSupported, UndefinedTable
 from psycopg.rows import class_row, dict_row
 from pydantic import BaseModel
 
-from app.core.models import ColumnInfo, TableData, TableDef, TableInfo
+from app.core.bulk import (
+    BulkOptions,
+    RowsSkippedError,
+    choose_strategy,
+    insert_batch,
+)
+from app.core.cache import table_cache, table_written, write_generations
+from app.core.metrics import DbOperation, count_rows_written, track_db
+from app.core.models import (
+    InsertedData,
+    PartitionDef,
+    PartitionInfo,
+    RowsCountMethod,
+    TableData,
+    TableDef,
+    TableInfo,
+    TableMeta,
+    TablesInfo,
+)
+from app.core.partitions import partition_queries
 from app.core.queries import (
-    TableInfoResult,
     create_table_query,
+    detach_partition_query,
     drop_table_query,
-    insert_row_query,
-    table_columns_query,
+    insert_statements,
+    notify_table_query,
+    partition_comment_query,
+    partitions_query,
     table_exist_query,
     table_info_query,
+    table_version_query,
+    tables_info_query,
 )
 
 
@@ -30,126 +54,234 @@ async def is_table_exist(
     table_name: str,
     conn: AsyncConnection[Any],
 ) -> bool | DbError:
-    """Check that table exists in the database."""
-    try:
-        async with conn.transaction():
-            curr = await conn.execute(table_exist_query(table_name))
-            result: tuple[bool] | None = await curr.fetchone()
-            if result is None:
-                return False
+    """Check that table exists in the database.
 
-            return result[0]
+    Result is cached in `table_cache`.
+    """
+    table_meta = table_cache.get(table_name)
+    if table_meta is not None:
+        return table_meta.exists
+
+    try:
+        with track_db(DbOperation.exists):
+            async with conn.transaction():
+                curr = await conn.execute(
+                    table_exist_query(),
+                    {'table_name': table_name},
+                    prepare=True,
+                )
+                result: tuple[bool] | None = await curr.fetchone()
     except PgError as err:
         return DbError(message=str(err))
 
+    exists = result is not None and result[0]
+    table_cache.put(table_name, TableMeta(exists=exists))
+    return exists
+
 
 async def create_table(
     table_name: str,
     table_def: TableDef,
     conn: AsyncConnection[Any],
 ) -> str | None | DbError:
-    """Create new table in the database."""
+    """Create new table in the database.
+
+    Partitioned table is created with its partitions.
+    """
     table_exists = await is_table_exist(table_name, conn)
     if table_exists:
         return None
     elif isinstance(table_exists, DbError):
         return table_exists
     try:
-        async with conn.transaction():
-            await conn.execute(create_table_query(table_name, table_def))
+        with track_db(DbOperation.create):
+            async with conn.transaction():
+                await conn.execute(create_table_query(table_name, table_def))
+                if table_def.partition is not None:
+                    await _create_partitions(
+                        table_name,
+                        table_def.partition,
+                        conn,
+                    )
+                await conn.execute(notify_table_query(table_name))
     except PgError as err:
         return DbError(message=str(err))
+    finally:
+        table_cache.invalidate(table_name)
+        insert_statements.invalidate(table_name)
 
     return table_name
 
 
-async def _get_table_info(
+async def _create_partitions(
     table_name: str,
+    partition_def: PartitionDef,
     conn: AsyncConnection[Any],
-) -> TableInfoResult | None | DbError:
-    table_exists = await is_table_exist(table_name, conn)
-    if not table_exists:
-        return None
-    elif isinstance(table_exists, DbError):
-        return table_exists
+) -> None:
+    await conn.execute(partition_comment_query(table_name, partition_def))
+    for query in partition_queries(table_name, partition_def):
+        await conn.execute(query)
+
 
-    curr = conn.cursor(row_factory=class_row(TableInfoResult))
+async def get_table_info(
+    table_name: str,
+    conn: AsyncConnection[Any],
+    rows_method: RowsCountMethod = RowsCountMethod.exact,
+    exact_threshold: int = 0,
+    update_cache: bool = True,
+) -> TableInfo | None | DbError:
+    """Get table info from system catalog.
+
+    Existence, columns, rows and size are fetched with a single prepared
+    statement, i.e. one round trip. Rows are counted with `rows_method`.
+    Exact count scans the whole table, estimate is taken from planner
+    statistics. `auto` counts exactly only tables estimated to have less
+    than `exact_threshold` rows, configured by the caller.
+
+    Found metadata is cached, unless `update_cache` is unset: info read
+    from replica may be stale.
+    """
+    curr = conn.cursor(row_factory=class_row(TableInfo))
     try:
-        async with conn.transaction():
-            await curr.execute(table_info_query(table_name))
-            table_info_result = await curr.fetchone()
+        with track_db(DbOperation.info):
+            await curr.execute(
+                table_info_query(table_name, rows_method, exact_threshold),
+                {'table_name': table_name},
+                prepare=True,
+            )
+            table_info = await curr.fetchone()
+    except UndefinedTable:
+        table_info = None
     except PgError as err:
         return DbError(message=str(err))
 
-    return table_info_result
+    if not update_cache:
+        return table_info
+    elif table_info is None:
+        table_cache.put(table_name, TableMeta(exists=False))
+        return None
+
+    table_cache.update(table_name, TableMeta(
+        exists=True,
+        qualified_name=table_info.qualified_name,
+        columns=table_info.columns,
+    ))
+    return table_info
 
 
-async def _get_table_columns(
+async def get_table_version(
     table_name: str,
     conn: AsyncConnection[Any],
-) -> list[ColumnInfo] | DbError:
+) -> str | None | DbError:
+    """Get table version, changed whenever table info may change.
+
+    Version is computed from catalog and statistics without reading the
+    table. Statistics counters reach the catalog with a delay of up to a
+    few seconds, so writes made by this process are counted in version
+    apart, see `table_written`. Writes of other processes may be
+    reflected in version that late.
+    """
     try:
-        async with conn.cursor(
-            row_factory=class_row(ColumnInfo),
-        ) as curr:
-            await curr.execute(table_columns_query(table_name))
-            return await curr.fetchall()
+        with track_db(DbOperation.version):
+            curr = await conn.execute(
+                table_version_query(),
+                {'table_name': table_name},
+                prepare=True,
+            )
+            result: tuple[str] | None = await curr.fetchone()
     except PgError as err:
         return DbError(message=str(err))
 
+    if result is None:
+        return None
+    return '{0}.{1}'.format(result[0], write_generations.get(table_name))
 
-async def get_table_info(
-    table_name: str,
+
+async def get_tables_info(
+    table_names: list[str],
     conn: AsyncConnection[Any],
-) -> TableInfo | None | DbError:
-    """Get table info from system catalog."""
-    table_info = await _get_table_info(table_name, conn)
-    if table_info is None or isinstance(table_info, DbError):
-        return table_info
+    update_cache: bool = True,
+) -> TablesInfo | DbError:
+    """Get info of many tables with one catalog query.
+
+    Rows are estimated from planner statistics, so the query cost doesn't
+    depend on tables sizes. Found metadata is cached, unless
+    `update_cache` is unset.
+    """
+    curr = conn.cursor(row_factory=dict_row)
+    try:
+        with track_db(DbOperation.tables_info):
+            await curr.execute(
+                tables_info_query(),
+                {'table_names': table_names},
+                prepare=True,
+            )
+            rows = await curr.fetchall()
+    except PgError as err:
+        return DbError(message=str(err))
 
-    columns = await _get_table_columns(table_name, conn)
-    if isinstance(columns, DbError):
-        return columns
+    tables = {row.pop('table_name'): TableInfo(**row) for row in rows}
+    missing = [name for name in table_names if name not in tables]
+    if update_cache:
+        for table_name, table_info in tables.items():
+            table_cache.update(table_name, TableMeta(
+                exists=True,
+                qualified_name=table_info.qualified_name,
+                columns=table_info.columns,
+            ))
+        for missing_name in missing:
+            table_cache.put(missing_name, TableMeta(exists=False))
 
-    return TableInfo(
-        qualified_name=table_info.qualified_name,
-        columns=columns,
-        rows=table_info.rows,
-        size=table_info.size,
-    )
+    return TablesInfo(tables=tables, missing=missing)
 
 
 async def insert_rows(
     table_name: str,
     table_data: TableData,
     conn: AsyncConnection[Any],
-) -> TableData | None | DbError:
-    """Insert rows into table."""
+    options: BulkOptions | None = None,
+) -> InsertedData | None | DbError:
+    """Insert rows into table.
+
+    All rows are inserted in one transaction: either every row is written
+    or none of them. Insert strategy is chosen by the rows count.
+    """
     table_exists = await is_table_exist(table_name, conn)
     if not table_exists:
         return None
     elif isinstance(table_exists, DbError):
         return table_exists
 
-    inserted = TableData(rows=[])
     if not table_data.rows:
-        return inserted
+        return InsertedData(rows=[])
 
-    curr = conn.cursor(row_factory=dict_row)
-    for row in table_data.rows:
-        query = insert_row_query(table_name, column_names=list(row.keys()))
-        try:
+    options = options or BulkOptions()
+    strategy = choose_strategy(len(table_data.rows), options)
+    try:
+        with track_db(DbOperation.insert):
             async with conn.transaction():
-                await curr.execute(query, tuple(row.values()))
-                inserted_row = await curr.fetchone()
-                if inserted_row is None:
-                    return DbError(message='Failed to insert row')
-
-                inserted.rows.append(inserted_row)
-        except PgError as err:
-            return DbError(message=str(err))
+                inserted = await insert_batch(
+                    table_name,
+                    table_data.rows,
+                    conn,
+                    strategy,
+                    options,
+                )
+    except UndefinedTable:
+        table_cache.invalidate(table_name)
+        return None
+    except FeatureNotSupported as err:
+        # Table was recreated outside of the service and prepared
+        # statements are stale: the next insert uses new ones.
+        insert_statements.invalidate(table_name)
+        return DbError(message=str(err))
+    except (PgError, RowsSkippedError) as err:
+        return DbError(message=str(err))
 
-    return inserted
+    table_written(table_name)
+    count_rows_written(DbOperation.insert, len(inserted))
+    # Rows come from the database as is, validating them is a waste.
+    return InsertedData.model_construct(rows=inserted, strategy=strategy)
 
 
 async def drop_table(
@@ -164,9 +296,117 @@ async def drop_table(
         return table_exists
 
     try:
-        async with conn.transaction():
-            await conn.execute(drop_table_query(table_name))
+        with track_db(DbOperation.drop):
+            async with conn.transaction():
+                await conn.execute(drop_table_query(table_name))
+                await conn.execute(notify_table_query(table_name))
+    except UndefinedTable:
+        return None
     except PgError as err:
         return DbError(message=str(err))
+    finally:
+        table_cache.invalidate(table_name)
+        insert_statements.invalidate(table_name)
 
     return table_name
+
+
+async def get_partitions(
+    table_name: str,
+    conn: AsyncConnection[Any],
+) -> list[PartitionInfo] | None | DbError:
+    """Get table partitions, empty if table isn't partitioned."""
+    table_exists = await is_table_exist(table_name, conn)
+    if not table_exists:
+        return None
+    elif isinstance(table_exists, DbError):
+        return table_exists
+
+    curr = conn.cursor(row_factory=class_row(PartitionInfo))
+    try:
+        with track_db(DbOperation.partitions):
+            await curr.execute(
+                partitions_query(),
+                {'table_name': table_name},
+                prepare=True,
+            )
+            return await curr.fetchall()
+    except PgError as err:
+        return DbError(message=str(err))
+
+
+async def _drop_partition(
+    table_name: str,
+    partition_name: str,
+    conn: AsyncConnection[Any],
+    detach_only: bool,
+    concurrently: bool,
+) -> str | DbError:
+    try:
+        if not concurrently:
+            async with conn.transaction():
+                await conn.execute(detach_partition_query(
+                    table_name,
+                    partition_name,
+                ))
+                if not detach_only:
+                    await conn.execute(drop_table_query(partition_name))
+                await conn.execute(notify_table_query(table_name))
+                await conn.execute(notify_table_query(partition_name))
+            return partition_name
+        await conn.execute(detach_partition_query(
+            table_name,
+            partition_name,
+            concurrently,
+        ))
+        await conn.execute(notify_table_query(table_name))
+        await conn.execute(notify_table_query(partition_name))
+    except PgError as err:
+        return DbError(message=str(err))
+
+    if not detach_only:
+        try:
+            await conn.execute(drop_table_query(partition_name))
+            await conn.execute(notify_table_query(partition_name))
+        except PgError as err:  # noqa: WPS440
+            message = 'Partition {0} is detached, but not dropped: {1}'
+            return DbError(message=message.format(partition_name, err))
+    return partition_name
+
+
+async def drop_partition(
+    table_name: str,
+    partition_name: str,
+    conn: AsyncConnection[Any],
+    detach_only: bool = False,
+    concurrently: bool = False,
+) -> str | None | DbError:
+    """Detach table partition and drop it, unless `detach_only` is set.
+
+    Detached partition becomes standalone table. Partition is detached and
+    dropped in one transaction with tables changes notifications, unless
+    detached `concurrently`: that doesn't block queries to the table, but
+    can't run in transaction, so error of dropping it reports partition
+    left detached. Conn must be in autocommit mode for that, and it isn't
+    possible with default partition.
+    """
+    partitions = await get_partitions(table_name, conn)
+    if partitions is None or isinstance(partitions, DbError):
+        return partitions
+    elif all(partition.name != partition_name for partition in partitions):
+        return None
+
+    try:
+        with track_db(DbOperation.drop_partition):
+            return await _drop_partition(
+                table_name,
+                partition_name,
+                conn,
+                detach_only,
+                concurrently,
+            )
+    finally:
+        table_cache.invalidate(partition_name)
+        insert_statements.invalidate(table_name)
+        insert_statements.invalidate(partition_name)
+        table_written(table_name)
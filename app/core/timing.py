@@ -0,0 +1,129 @@
+"""Request-scoped phases timing.
+
+Request handling records how long its phases took and which statements it
+executed into `RequestTiming` of the current context. Recording does
+nothing when no timing is started, e.g. outside of requests.
+"""
+
+from contextlib import AbstractAsyncContextManager, contextmanager
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Any, Iterator, Self
+
+from psycopg import AsyncCopy, AsyncCursor, AsyncServerCursor
+from psycopg.abc import Query
+from psycopg.sql import Composable
+
+
+class RequestTiming:
+    """Phases durations and statements of one request."""
+
+    def __init__(self) -> None:
+        """Start timing at the current moment."""
+        self.started = perf_counter()
+        self.phases: dict[str, float] = {}
+        self.statements: list[Query] = []
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        """Add phase duration, summing up repeated phases."""
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def elapsed(self) -> float:
+        """Get seconds since timing start."""
+        return perf_counter() - self.started
+
+    def statement_shapes(self) -> list[str]:
+        """Get distinct executed statements texts, without parameters."""
+        shapes: dict[str, None] = {}
+        for statement in self.statements:
+            if isinstance(statement, Composable):
+                statement = statement.as_string()
+            elif isinstance(statement, bytes):
+                statement = statement.decode()
+            shape = ' '.join(str(statement).split())
+            if shape:
+                shapes[shape] = None
+        return list(shapes)
+
+
+_current_timing: ContextVar[RequestTiming | None] = ContextVar(
+    'current_timing',
+    default=None,
+)
+
+
+def start_timing() -> tuple[RequestTiming, Token[RequestTiming | None]]:
+    """Start timing of the current context."""
+    timing = RequestTiming()
+    return timing, _current_timing.set(timing)
+
+
+def stop_timing(token: Token[RequestTiming | None]) -> None:
+    """Stop timing started with `token`."""
+    _current_timing.reset(token)
+
+
+def current_timing() -> RequestTiming | None:
+    """Get timing of the current context."""
+    return _current_timing.get()
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Record phase duration into the current timing."""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.add_phase(name, seconds)
+
+
+@contextmanager
+def timed_phase(name: str) -> Iterator[None]:
+    """Record the block duration as phase of the current timing."""
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, perf_counter() - started)
+
+
+def _record_statement(statement: Query) -> None:
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.statements.append(statement)
+
+
+class TimedCursor(AsyncCursor[Any]):
+    """Cursor recording executed statements into the current timing."""
+
+    async def execute(
+        self,
+        query: Query,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Self:
+        """Execute query, recording its text."""
+        _record_statement(query)
+        return await super().execute(query, *args, **kwargs)
+
+    def copy(  # type: ignore[override]
+        self,
+        statement: Query,
+        *args: Any,
+        **kwargs: Any,
+    ) -> AbstractAsyncContextManager[AsyncCopy]:
+        """Start COPY operation, recording its text."""
+        _record_statement(statement)
+        return super().copy(statement, *args, **kwargs)
+
+
+class TimedServerCursor(AsyncServerCursor[Any]):
+    """Server-side cursor recording executed statements."""
+
+    async def execute(
+        self,
+        query: Query,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Self:
+        """Execute query, recording its text."""
+        _record_statement(query)
+        return await super().execute(query, *args, **kwargs)
@@ -0,0 +1,70 @@
+"""Rows merge operations.
+
+Rows are staged with COPY and merged into the table with one
+`INSERT ... ON CONFLICT DO UPDATE` statement per columns set, so syncing
+a dataset takes a single round trip per batch instead of
+select-then-insert-or-update per row.
+"""
+
+from typing import Any
+
+from psycopg import AsyncConnection
+from psycopg.errors import Error as PgError
+from psycopg.errors import UndefinedTable
+
+from app.core.bulk import upsert_batch
+from app.core.cache import table_cache, table_written
+from app.core.metrics import DbOperation, count_rows_written, track_db
+from app.core.models import TableData, UpsertResult
+from app.core.rows import get_primary_key
+from app.core.tables import DbError
+
+
+async def upsert_rows(
+    table_name: str,
+    table_data: TableData,
+    conn: AsyncConnection[Any],
+    key_columns: list[str] | None = None,
+) -> UpsertResult | None | DbError:
+    """Insert rows, updating existing rows with the same key instead.
+
+    Key defaults to the table primary key, other `key_columns` must form
+    unique constraint. All rows are merged in one transaction. When
+    several rows have the same key, the last one wins.
+    """
+    primary_key = await get_primary_key(table_name, conn)
+    if primary_key is None or isinstance(primary_key, DbError):
+        return primary_key
+
+    key_columns = key_columns or primary_key
+    if not key_columns:
+        return DbError(message='Table {0} has no primary key'.format(
+            table_name,
+        ))
+    elif any(not row.keys() >= set(key_columns) for row in table_data.rows):
+        return DbError(message='Every row must have key columns {0}'.format(
+            ', '.join(key_columns),
+        ))
+
+    try:
+        with track_db(DbOperation.upsert):
+            async with conn.transaction():
+                inserted, updated = await upsert_batch(
+                    table_name,
+                    table_data.rows,
+                    key_columns,
+                    conn,
+                )
+    except UndefinedTable:
+        table_cache.invalidate(table_name)
+        return None
+    except PgError as err:
+        return DbError(message=str(err))
+
+    table_written(table_name)
+    count_rows_written(DbOperation.upsert, inserted + updated)
+    return UpsertResult(
+        inserted=inserted,
+        updated=updated,
+        unchanged=len(table_data.rows) - inserted - updated,
+    )
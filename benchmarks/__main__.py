@@ -0,0 +1,223 @@
+"""Benchmark suite command line interface.
+
+Run scenarios against Postgres configured with `POSTGRES_*` environment
+variables, or against a throwaway test container:
+
+    python -m benchmarks run --output results.json [--container]
+
+Compare results with a stored baseline, exits with 1 on regressions:
+
+    python -m benchmarks compare baseline.json results.json
+"""
+
+import argparse
+import asyncio
+import platform
+import subprocess  # noqa: S404
+import sys
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+import psycopg
+
+from app import config
+from app.api_v1.factory import create_app
+from app.core.pool import Pool
+from benchmarks.compare import compare_reports
+from benchmarks.runner import Measurement, Report
+from benchmarks.scenarios import SCENARIOS, Bench
+
+_ROW_FORMAT = '{0:<72}{1:>12}{2:>12}{3:>10}{4:>10}{5:>10}'
+
+# Operations per measurement by default.
+_DEFAULT_OPERATIONS = 200
+
+
+def _int_list(argument: str) -> list[int]:
+    return [int(number) for number in argument.split(',')]
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(  # noqa: S603, S607
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+async def _environment(pool: Pool) -> dict[str, str]:
+    async with pool.connection() as conn:
+        server_version = conn.info.parameter_status('server_version') or ''
+
+    return {
+        'time': datetime.now(timezone.utc).isoformat(),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'psycopg': psycopg.__version__,
+        'postgres': server_version,
+        'platform': platform.platform(),
+    }
+
+
+def _print_measurement(measurement: Measurement) -> None:
+    print(_ROW_FORMAT.format(  # noqa: WPS421
+        measurement.key,
+        '{0:.1f}'.format(measurement.operations_per_second),
+        '{0:.0f}'.format(measurement.rows_per_second),
+        '{0:.2f}'.format(measurement.p50_ms),
+        '{0:.2f}'.format(measurement.p95_ms),
+        '{0:.2f}'.format(measurement.p99_ms),
+    ), flush=True)
+
+
+def _use_container(stack: AsyncExitStack) -> None:
+    from testcontainers.postgres import PostgresContainer  # noqa: WPS433
+
+    container = stack.enter_context(PostgresContainer())
+    config.PG_HOST = container.get_container_host_ip()
+    config.PG_PORT = int(container.get_exposed_port(container.port_to_expose))
+    config.PG_USER = container.POSTGRES_USER
+    config.PG_PASSWORD = container.POSTGRES_PASSWORD
+    config.PG_DATABASE = container.POSTGRES_DB
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run scenarios and save report."""
+    scenarios = args.scenario or list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        print('Unknown scenarios:', ', '.join(unknown))  # noqa: WPS421
+        return 2
+
+    config.PG_POOL_MAX_SIZE = max(args.concurrency)
+    app = create_app()
+    async with AsyncExitStack() as stack:
+        if args.container:
+            _use_container(stack)
+        await stack.enter_async_context(app.router.lifespan_context(app))
+        client = await stack.enter_async_context(httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),  # type: ignore[arg-type]
+            base_url='http://benchmark',
+            timeout=None,
+        ))
+        bench = Bench(
+            pool=app.state.pool,
+            client=client,
+            operations=args.operations,
+            concurrency=args.concurrency,
+            batch_sizes=args.batch_sizes,
+            table_sizes=args.table_sizes,
+            repeat=args.repeat,
+        )
+
+        print(_ROW_FORMAT.format(  # noqa: WPS421
+            'measurement', 'ops/s', 'rows/s', 'p50 ms', 'p95 ms', 'p99 ms',
+        ))
+        results: list[Measurement] = []
+        for name in scenarios:
+            async for measurement in SCENARIOS[name](bench):
+                _print_measurement(measurement)
+                results.append(measurement)
+
+        report = Report(
+            environment=await _environment(bench.pool),
+            results=results,
+        )
+
+    Path(args.output).write_text(report.model_dump_json(indent=2))
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    """Compare reports and print changes."""
+    baseline = Report.model_validate_json(Path(args.baseline).read_text())
+    current = Report.model_validate_json(Path(args.current).read_text())
+    changes, missing = compare_reports(baseline, current, args.threshold)
+
+    print('{0:<72}{1:>12}{2:>12}'.format(  # noqa: WPS421
+        'measurement', 'ops/s', 'p95',
+    ))
+    for change in changes:
+        print('{0:<72}{1:>+12.1%}{2:>+12.1%}{3}'.format(  # noqa: WPS421
+            change.key,
+            change.throughput,
+            change.p95,
+            '  REGRESSION' if change.regression else '',
+        ))
+    for key in missing:
+        print('{0:<72}{1:>24}'.format(key, 'missing'))  # noqa: WPS421
+
+    return 1 if any(change.regression for change in changes) else 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run scenarios')
+    run_parser.add_argument('--output', default='benchmark.json')
+    run_parser.add_argument(
+        '--container',
+        action='store_true',
+        help='start Postgres in test container',
+    )
+    run_parser.add_argument(
+        '--scenario',
+        action='append',
+        help='scenario to run, all by default: {0}'.format(
+            ', '.join(SCENARIOS),
+        ),
+    )
+    run_parser.add_argument(
+        '--operations',
+        type=int,
+        default=_DEFAULT_OPERATIONS,
+        help='operations per measurement, fewer for heavy operations',
+    )
+    run_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='runs per measurement, the median one is reported',
+    )
+    run_parser.add_argument('--concurrency', type=_int_list, default=[1, 8])
+    run_parser.add_argument(
+        '--batch-sizes',
+        type=_int_list,
+        default=[1, 10, 100, 1000],
+    )
+    run_parser.add_argument(
+        '--table-sizes',
+        type=_int_list,
+        default=[1000, 100000],
+    )
+
+    compare_parser = commands.add_parser('compare', help='compare reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='relative slowdown reported as regression',
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> Any:
+    """Run command."""
+    args = _parser().parse_args(argv)
+    if args.command == 'run':
+        return asyncio.run(run(args))
+    return compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Benchmark results comparison."""
+
+from pydantic import BaseModel
+
+from benchmarks.runner import Measurement, Report
+
+
+class Change(BaseModel):
+    """Measurement change against baseline."""
+
+    # Measurement key: scenario name and parameters.
+    key: str
+
+    # Relative throughput change, negative is slower.
+    throughput: float
+
+    # Relative p95 latency change, positive is slower.
+    p95: float
+
+    # Whether any change exceeds threshold in the slower direction.
+    regression: bool
+
+
+def _relative(baseline: float, current: float) -> float:
+    return (current - baseline) / baseline if baseline else 0
+
+
+def compare_measurements(
+    baseline: Measurement,
+    current: Measurement,
+    threshold: float,
+) -> Change:
+    """Compare measurement with the same measurement of baseline."""
+    throughput = _relative(
+        baseline.operations_per_second,
+        current.operations_per_second,
+    )
+    p95 = _relative(baseline.p95_ms, current.p95_ms)
+    return Change(
+        key=current.key,
+        throughput=throughput,
+        p95=p95,
+        regression=throughput < -threshold or p95 > threshold,
+    )
+
+
+def compare_reports(
+    baseline: Report,
+    current: Report,
+    threshold: float,
+) -> tuple[list[Change], list[str]]:
+    """Compare measurements present in both reports.
+
+    Returns changes and keys of baseline measurements missing in current
+    report.
+    """
+    current_results = {result.key: result for result in current.results}
+    changes: list[Change] = []
+    missing: list[str] = []
+    for baseline_result in baseline.results:
+        current_result = current_results.get(baseline_result.key)
+        if current_result is None:
+            missing.append(baseline_result.key)
+        else:
+            changes.append(compare_measurements(
+                baseline_result,
+                current_result,
+                threshold,
+            ))
+
+    return changes, missing
@@ -0,0 +1,96 @@
+"""Response encoders throughput benchmark.
+
+Encodes synthetic rows batches with every available encoder and reports
+rows per second, megabytes per second and encoded size per row.
+
+Run with `python -m benchmarks.encoders [rows] [batch_size]`.
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import AsyncIterator
+
+from psycopg import postgres
+
+from app.api_v1.encoders import ENCODERS, Encoder
+from app.core.rows import RowBatch
+
+_COLUMNS = ['id', 'name', 'score', 'active', 'created']
+
+_TYPES = [
+    postgres.types[type_name].oid
+    for type_name in ('int4', 'text', 'float8', 'bool', 'timestamp')
+]
+
+_EPOCH = datetime.fromisoformat('2024-01-01')
+
+_BYTES_IN_MEGABYTE = 1e6
+
+_DEFAULT_ROWS = 100000
+
+_DEFAULT_BATCH_SIZE = 1000
+
+
+def make_batches(rows_count: int, batch_size: int) -> list[RowBatch]:
+    """Make synthetic rows batches of typical table."""
+    rows = [
+        (
+            index,
+            'name {0}'.format(index),
+            index / 7,
+            index % 2 == 0,
+            _EPOCH + timedelta(seconds=index),
+        )
+        for index in range(rows_count)
+    ]
+    return [
+        RowBatch(
+            columns=_COLUMNS,
+            rows=rows[start:start + batch_size],
+            types=_TYPES,
+        )
+        for start in range(0, rows_count, batch_size)
+    ]
+
+
+async def _iterate(batches: list[RowBatch]) -> AsyncIterator[RowBatch]:
+    for batch in batches:
+        yield batch
+
+
+async def measure(
+    encoder: Encoder,
+    batches: list[RowBatch],
+) -> tuple[float, int]:
+    """Encode batches and return spent seconds and encoded size."""
+    started = perf_counter()
+    size = 0
+    async for chunk in encoder(_iterate(batches)):
+        size += len(chunk)
+
+    return perf_counter() - started, size
+
+
+async def main(rows_count: int, batch_size: int) -> None:
+    """Print encoders throughput table."""
+    batches = make_batches(rows_count, batch_size)
+    print('{0:<40}{1:>12}{2:>10}{3:>12}'.format(  # noqa: WPS421
+        'media type', 'rows/s', 'MB/s', 'bytes/row',
+    ))
+    for media_type, encoder in ENCODERS.items():
+        seconds, size = await measure(encoder, batches)
+        print('{0:<40}{1:>12.0f}{2:>10.1f}{3:>12.1f}'.format(  # noqa: WPS421
+            media_type,
+            rows_count / seconds,
+            size / seconds / _BYTES_IN_MEGABYTE,
+            size / rows_count,
+        ))
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else _DEFAULT_ROWS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else _DEFAULT_BATCH_SIZE,
+    ))
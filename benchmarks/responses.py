@@ -0,0 +1,106 @@
+"""Inserted rows responses serialization benchmark.
+
+Measures CPU time the app spends turning inserted rows into JSON response
+body: through `InsertedData` response model validation and serialization
+by FastAPI, as insert endpoint used to, and with `FastJSONResponse`.
+
+Run with `python -m benchmarks.responses [rows] [repeat]`.
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+from time import process_time
+from typing import Any
+from uuid import UUID
+
+import httpx
+from fastapi import FastAPI
+
+from app.api_v1.encoders import FastJSONResponse
+from app.core.models import InsertedData, InsertStrategy
+
+_EPOCH = datetime.fromisoformat('2024-01-01T00:00:00+00:00')
+
+# Rows per reported CPU time.
+_ROWS_UNIT = 10000
+
+_DEFAULT_ROWS = 10000
+
+_DEFAULT_REPEAT = 10
+
+
+def make_rows(rows_count: int) -> list[dict[str, Any]]:
+    """Make rows of typical table, as returned by database."""
+    return [
+        {
+            'id': index,
+            'name': 'name {0}'.format(index),
+            'price': Decimal(index) / 100,
+            'created': _EPOCH + timedelta(seconds=index),
+            'uid': UUID(int=index),
+            'payload': b'payload',
+        }
+        for index in range(rows_count)
+    ]
+
+
+def make_app(rows: list[dict[str, Any]]) -> FastAPI:
+    """Make app responding with rows through both serialization paths."""
+    app = FastAPI()
+
+    @app.get('/model', response_model=InsertedData)
+    async def model() -> InsertedData:
+        return InsertedData.model_construct(
+            rows=rows,
+            strategy=InsertStrategy.copy,
+        )
+
+    @app.get('/fast', response_model=InsertedData)
+    async def fast() -> FastJSONResponse:
+        return FastJSONResponse({
+            'rows': rows,
+            'strategy': InsertStrategy.copy,
+        })
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, repeat: int) -> float:
+    """Get the least CPU seconds spent by request."""
+    spent = []
+    for _ in range(repeat):
+        started = process_time()
+        response = await client.get(path)
+        spent.append(process_time() - started)
+        response.raise_for_status()
+
+    return min(spent)
+
+
+async def main(rows_count: int, repeat: int) -> None:
+    """Print CPU time per 10000 rows of serialization paths."""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(
+            app=make_app(make_rows(rows_count)),  # type: ignore[arg-type]
+        ),
+        base_url='http://benchmark',
+    ) as client:
+        print('{0:<12}{1:>20}'.format(  # noqa: WPS421
+            'path',
+            'CPU ms/10k rows',
+        ))
+        for path in ('/model', '/fast'):
+            seconds = await measure(client, path, repeat)
+            print('{0:<12}{1:>20.1f}'.format(  # noqa: WPS421
+                path,
+                seconds * 1000 * _ROWS_UNIT / rows_count,
+            ))
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else _DEFAULT_ROWS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else _DEFAULT_REPEAT,
+    ))
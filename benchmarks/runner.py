@@ -0,0 +1,128 @@
+"""Load generation and latency statistics."""
+
+import asyncio
+import math
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel
+
+# Operation under load, takes operation index.
+Operation = Callable[[int], Awaitable[Any]]
+
+# Reported latency percentiles.
+_P95 = 0.95
+
+_P99 = 0.99
+
+
+class Measurement(BaseModel):
+    """Scenario run results for one set of parameters."""
+
+    # Scenario name, like `core.insert_rows`.
+    name: str
+
+    # Scenario parameters: concurrency, batch size, table size etc.
+    params: dict[str, Any]
+
+    # Measured operations count.
+    operations: int
+
+    # Rows written or read by one operation.
+    rows_per_operation: int
+
+    # Wall clock time of the run.
+    seconds: float
+
+    operations_per_second: float
+
+    rows_per_second: float
+
+    # Operation latency percentiles, in milliseconds.
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+    @property
+    def key(self) -> str:
+        """Identify measurement among runs by name and parameters."""
+        params = ', '.join(
+            '{0}={1}'.format(name, param_value)
+            for name, param_value in sorted(self.params.items())
+        )
+        return '{0}({1})'.format(self.name, params)
+
+
+class Report(BaseModel):
+    """Benchmark suite run results."""
+
+    # Python, psycopg and Postgres versions, git revision, run time.
+    environment: dict[str, str]
+
+    results: list[Measurement]
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Get nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return 0
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+async def _measure(
+    operation: Operation,
+    operations: int,
+    concurrency: int,
+) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    indices = iter(range(operations))
+
+    async def worker() -> None:  # noqa: WPS430
+        for index in indices:
+            started = perf_counter()
+            await operation(index)
+            latencies.append(perf_counter() - started)
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return perf_counter() - started, sorted(latencies)
+
+
+async def run_load(  # noqa: WPS211
+    name: str,
+    params: dict[str, Any],
+    operation: Operation,
+    operations: int,
+    concurrency: int,
+    rows_per_operation: int = 1,
+    repeat: int = 1,
+) -> Measurement:
+    """Run `operations` operations by `concurrency` workers at once.
+
+    Every worker runs one operation untimed first to warm up connections
+    and caches. With `repeat`, the run of median throughput is reported.
+    """
+    await asyncio.gather(*(
+        operation(-index - 1) for index in range(concurrency)
+    ))
+
+    runs = sorted([
+        await _measure(operation, operations, concurrency)
+        for _ in range(repeat)
+    ])
+    seconds, latencies = runs[len(runs) // 2]
+    return Measurement(
+        name=name,
+        params={'concurrency': concurrency, **params},
+        operations=operations,
+        rows_per_operation=rows_per_operation,
+        seconds=seconds,
+        operations_per_second=operations / seconds,
+        rows_per_second=operations * rows_per_operation / seconds,
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p95_ms=percentile(latencies, _P95) * 1000,
+        p99_ms=percentile(latencies, _P99) * 1000,
+        max_ms=latencies[-1] * 1000 if latencies else 0,
+    )
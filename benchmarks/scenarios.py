@@ -0,0 +1,373 @@
+"""Benchmark scenarios.
+
+Every scenario prepares its tables and yields measurement per parameters
+combination. `core.*` scenarios call core functions with pooled
+connections, `http.*` ones send requests to the app through ASGI
+transport, so they include routing, validation and encoding, but not the
+network. Tables sizes must be positive.
+"""
+
+import json
+import random
+from functools import partial
+from typing import Any, AsyncIterator, Callable
+
+import httpx
+from psycopg import AsyncConnection
+from psycopg.sql import SQL, Identifier
+
+from app.core.ingest import ingest_ndjson
+from app.core.models import (
+    ColumnDef,
+    ColumnTypes,
+    RowsCountMethod,
+    TableData,
+    TableDef,
+)
+from app.core.pool import Pool
+from app.core.rows import read_rows
+from app.core.tables import (
+    DbError,
+    create_table,
+    drop_table,
+    get_table_info,
+    insert_rows,
+)
+from benchmarks.runner import Measurement, Operation, run_load
+
+_TABLE_DEF = TableDef(columns=[
+    ColumnDef(name='id', type=ColumnTypes.serial, primary_key=True),
+    ColumnDef(name='name', type=ColumnTypes.text),
+    ColumnDef(name='value', type=ColumnTypes.integer),
+])
+
+_FILL_TABLE_QUERY = SQL("""
+INSERT INTO {table_name} (name, value)
+SELECT 'name ' || i, i FROM generate_series(1, %s) AS i;
+""")
+
+_ANALYZE_QUERY = SQL('ANALYZE {table_name};')
+
+# Rows read by one rows reading operation.
+_PAGE_SIZE = 1000
+
+# Size of body chunks sent to ingest.
+_CHUNK_SIZE = 65536
+
+
+class Bench:
+    """Benchmark run settings and shared resources."""
+
+    def __init__(  # noqa: WPS211
+        self,
+        pool: Pool,
+        client: httpx.AsyncClient,
+        operations: int,
+        concurrency: list[int],
+        batch_sizes: list[int],
+        table_sizes: list[int],
+        repeat: int = 1,
+    ) -> None:
+        """Init run settings."""
+        self.pool = pool
+        self.client = client
+        self.operations = operations
+        self.concurrency = concurrency
+        self.batch_sizes = batch_sizes
+        self.table_sizes = table_sizes
+        self.repeat = repeat
+
+    def operations_for(self, rows_per_operation: int) -> int:
+        """Scale operations count down for heavy operations."""
+        return max(self.operations * 10 // max(rows_per_operation, 10), 10)
+
+
+Scenario = Callable[[Bench], AsyncIterator[Measurement]]
+
+
+def make_rows(count: int) -> list[dict[str, Any]]:
+    """Make rows for benchmark table."""
+    return [
+        {'name': 'name {0}'.format(index), 'value': index}
+        for index in range(count)
+    ]
+
+
+def make_ndjson(count: int) -> list[bytes]:
+    """Make NDJSON body chunks for benchmark table."""
+    body = ''.join(
+        json.dumps(row) + '\n' for row in make_rows(count)
+    ).encode()
+    return [
+        body[start:start + _CHUNK_SIZE]
+        for start in range(0, len(body), _CHUNK_SIZE)
+    ]
+
+
+async def _chunks(chunks: list[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def prepare_table(
+    table_name: str,
+    rows: int,
+    conn: AsyncConnection[Any],
+) -> None:
+    """Recreate benchmark table with `rows` rows and fresh statistics."""
+    await drop_table(table_name, conn)
+    await create_table(table_name, _TABLE_DEF, conn)
+    if rows:
+        await conn.execute(
+            _FILL_TABLE_QUERY.format(table_name=Identifier(table_name)),
+            [rows],
+        )
+    await conn.execute(
+        _ANALYZE_QUERY.format(table_name=Identifier(table_name)),
+    )
+
+
+def _check(result: Any) -> Any:
+    if result is None or isinstance(result, DbError):
+        raise RuntimeError('Benchmark operation failed: {0}'.format(result))
+    return result
+
+
+def _check_response(response: httpx.Response) -> None:
+    if response.is_error:
+        raise RuntimeError('Benchmark request failed: {0} {1}'.format(
+            response.status_code,
+            response.text,
+        ))
+
+
+def _random_after(table_size: int, page_size: int) -> int:
+    return random.randint(0, table_size - page_size)  # noqa: S311
+
+
+def _core_insert(bench: Bench, table_name: str, batch_size: int) -> Operation:
+    table_data = TableData(rows=make_rows(batch_size))
+
+    async def insert(index: int) -> None:  # noqa: WPS430
+        async with bench.pool.connection() as conn:
+            _check(await insert_rows(table_name, table_data, conn))
+
+    return insert
+
+
+def _core_info(
+    bench: Bench,
+    table_name: str,
+    rows_method: RowsCountMethod,
+) -> Operation:
+    async def info(index: int) -> None:  # noqa: WPS430
+        async with bench.pool.connection() as conn:
+            _check(await get_table_info(table_name, conn, rows_method))
+
+    return info
+
+
+def _core_read(bench: Bench, table_name: str, table_size: int) -> Operation:
+    page_size = min(_PAGE_SIZE, table_size)
+
+    async def read(index: int) -> None:  # noqa: WPS430
+        async with bench.pool.connection() as conn:
+            batches = _check(await read_rows(
+                table_name,
+                conn,
+                after=[str(_random_after(table_size, page_size))],
+                limit=page_size,
+            ))
+            async for _ in batches:  # noqa: WPS328
+                pass  # noqa: WPS420
+
+    return read
+
+
+def _core_ingest(bench: Bench, table_name: str, batch_size: int) -> Operation:
+    chunks = make_ndjson(batch_size)
+
+    async def ingest(index: int) -> None:  # noqa: WPS430
+        async with bench.pool.connection() as conn:
+            _check(await ingest_ndjson(table_name, _chunks(chunks), conn))
+
+    return ingest
+
+
+def _http_put(bench: Bench, table_name: str, batch_size: int) -> Operation:
+    body = TableData(rows=make_rows(batch_size)).model_dump()
+
+    async def put(index: int) -> None:  # noqa: WPS430
+        _check_response(await bench.client.put(
+            '/api/v1/tables/{0}'.format(table_name),
+            json=body,
+        ))
+
+    return put
+
+
+def _http_info(
+    bench: Bench,
+    table_name: str,
+    rows_method: RowsCountMethod,
+) -> Operation:
+    async def info(index: int) -> None:  # noqa: WPS430
+        _check_response(await bench.client.get(
+            '/api/v1/tables/table_info/{0}'.format(table_name),
+            params={'count': rows_method.value},
+        ))
+
+    return info
+
+
+def _http_read(bench: Bench, table_name: str, table_size: int) -> Operation:
+    page_size = min(_PAGE_SIZE, table_size)
+
+    async def read(index: int) -> None:  # noqa: WPS430
+        _check_response(await bench.client.get(
+            '/api/v1/tables/{0}/rows'.format(table_name),
+            params={
+                'after': _random_after(table_size, page_size),
+                'limit': page_size,
+            },
+        ))
+
+    return read
+
+
+def _http_ingest(bench: Bench, table_name: str, batch_size: int) -> Operation:
+    body = b''.join(make_ndjson(batch_size))
+
+    async def ingest(index: int) -> None:  # noqa: WPS430
+        _check_response(await bench.client.post(
+            '/api/v1/tables/{0}/ingest'.format(table_name),
+            content=body,
+            headers={'Content-Type': 'application/x-ndjson'},
+        ))
+
+    return ingest
+
+
+# Operation factory taking bench, table name and batch or table size.
+OperationFactory = Callable[[Bench, str, int], Operation]
+
+# Operation factory taking bench, table name and rows count method.
+InfoOperationFactory = Callable[[Bench, str, RowsCountMethod], Operation]
+
+
+async def _batches_scenario(
+    bench: Bench,
+    name: str,
+    make_operation: OperationFactory,
+) -> AsyncIterator[Measurement]:
+    """Write batches of rows of every size into empty table."""
+    table_name = 'bench {0}'.format(name)
+    async with bench.pool.connection() as conn:
+        await prepare_table(table_name, 0, conn)
+
+    for batch_size in bench.batch_sizes:
+        operation = make_operation(bench, table_name, batch_size)
+        for concurrency in bench.concurrency:
+            yield await run_load(
+                name,
+                {'batch_size': batch_size},
+                operation,
+                bench.operations_for(batch_size),
+                concurrency,
+                rows_per_operation=batch_size,
+                repeat=bench.repeat,
+            )
+
+
+async def _info_scenario(
+    bench: Bench,
+    name: str,
+    make_operation: InfoOperationFactory,
+) -> AsyncIterator[Measurement]:
+    """Get info of tables of every size with every rows count method."""
+    for table_size in bench.table_sizes:
+        table_name = 'bench info {0}'.format(table_size)
+        async with bench.pool.connection() as conn:
+            await prepare_table(table_name, table_size, conn)
+
+        for rows_method in (RowsCountMethod.exact, RowsCountMethod.estimate):
+            operation = make_operation(bench, table_name, rows_method)
+            for concurrency in bench.concurrency:
+                yield await run_load(
+                    name,
+                    {'table_size': table_size, 'count': rows_method.value},
+                    operation,
+                    bench.operations,
+                    concurrency,
+                    repeat=bench.repeat,
+                )
+
+
+async def _read_scenario(
+    bench: Bench,
+    name: str,
+    make_operation: OperationFactory,
+) -> AsyncIterator[Measurement]:
+    """Read pages of rows from random keys of tables of every size."""
+    for table_size in bench.table_sizes:
+        table_name = 'bench read {0}'.format(table_size)
+        async with bench.pool.connection() as conn:
+            await prepare_table(table_name, table_size, conn)
+
+        page_size = min(_PAGE_SIZE, table_size)
+        operation = make_operation(bench, table_name, table_size)
+        for concurrency in bench.concurrency:
+            yield await run_load(
+                name,
+                {'table_size': table_size},
+                operation,
+                bench.operations_for(page_size),
+                concurrency,
+                rows_per_operation=page_size,
+                repeat=bench.repeat,
+            )
+
+
+# Scenarios by name.
+SCENARIOS: dict[str, Scenario] = {
+    'core.insert_rows': partial(
+        _batches_scenario,
+        name='core.insert_rows',
+        make_operation=_core_insert,
+    ),
+    'core.get_table_info': partial(
+        _info_scenario,
+        name='core.get_table_info',
+        make_operation=_core_info,
+    ),
+    'core.read_rows': partial(
+        _read_scenario,
+        name='core.read_rows',
+        make_operation=_core_read,
+    ),
+    'core.ingest_ndjson': partial(
+        _batches_scenario,
+        name='core.ingest_ndjson',
+        make_operation=_core_ingest,
+    ),
+    'http.put_rows': partial(
+        _batches_scenario,
+        name='http.put_rows',
+        make_operation=_http_put,
+    ),
+    'http.table_info': partial(
+        _info_scenario,
+        name='http.table_info',
+        make_operation=_http_info,
+    ),
+    'http.read_rows': partial(
+        _read_scenario,
+        name='http.read_rows',
+        make_operation=_http_read,
+    ),
+    'http.ingest': partial(
+        _batches_scenario,
+        name='http.ingest',
+        make_operation=_http_ingest,
+    ),
+}
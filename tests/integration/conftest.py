@@ -7,6 +7,7 @@ import pytest
 from psycopg import AsyncConnection
 from testcontainers.postgres import PostgresContainer
 
+from app.core.cache import table_cache
 from app.core.models import (
     ColumnDef,
     ColumnInfo,
@@ -36,13 +37,17 @@ async def container() -> AsyncGenerator[PostgresContainer, None]:
 async def db_conn(
     container: PostgresContainer,
 ) -> AsyncGenerator[AsyncConnection[Any], None]:
-    """Create connection with Postgres in test container."""
+    """Create connection with Postgres in test container.
+
+    Connection is in autocommit mode, as connections from the app pool.
+    """
     async with await AsyncConnection.connect(
         host=container.get_container_host_ip(),
         port=container.get_exposed_port(container.port_to_expose),
         user=container.POSTGRES_USER,
         password=container.POSTGRES_PASSWORD,
         dbname=container.POSTGRES_DB,
+        autocommit=True,
     ) as conn:
         yield conn
 
@@ -52,6 +57,7 @@ async def drop_tables(db_conn: AsyncConnection[Any]) -> AsyncGenerator[None, Non
     """Remove all tables after each test."""
     yield
     await db_conn.execute('drop schema public cascade; create schema public;')
+    table_cache.clear()
 
 
 TEST_TABLE_NAME = 'Test Table'
@@ -0,0 +1,106 @@
+"""Admission control tests."""
+
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from app.api_v1.dependencies import AdmittedDep
+from app.core.admission import Admission, AdmissionControl, Rejection
+
+
+async def test_admit() -> None:
+    """Test requests over limit wait, over queue size are rejected."""
+    admission_control = AdmissionControl(
+        route_limit=1,
+        queue_size=1,
+        timeout=0.05,
+    )
+    first = await admission_control.admit('/route')
+    assert isinstance(first, Admission)
+
+    waiting = asyncio.create_task(admission_control.admit('/route'))
+    await asyncio.sleep(0)
+    assert await admission_control.admit('/route') == Rejection.queue_full
+    assert await admission_control.admit('/other') != Rejection.queue_full
+    assert await waiting == Rejection.timeout
+
+    waiting = asyncio.create_task(admission_control.admit('/route'))
+    await asyncio.sleep(0)
+    admission_control.release(first)
+    assert isinstance(await waiting, Admission)
+
+
+async def test_admit_table() -> None:
+    """Test tables limits are separate and dropped once idle."""
+    admission_control = AdmissionControl(table_limit=1, timeout=0)
+    first = await admission_control.admit('/route', 'first')
+    assert isinstance(first, Admission)
+    assert await admission_control.admit('/route', 'first') == (
+        Rejection.timeout
+    )
+    assert isinstance(
+        await admission_control.admit('/route', 'second'),
+        Admission,
+    )
+
+    admission_control.release(first)
+    assert 'first' not in admission_control._tables  # noqa: WPS437
+
+
+async def test_admit_busy_table() -> None:
+    """Test requests waiting for busy table don't block other tables."""
+    admission_control = AdmissionControl(
+        route_limit=2,
+        table_limit=1,
+        timeout=0.05,
+    )
+    first = await admission_control.admit('/route', 'first')
+    assert isinstance(first, Admission)
+
+    waiting = asyncio.create_task(admission_control.admit('/route', 'first'))
+    await asyncio.sleep(0)
+    assert isinstance(
+        await admission_control.admit('/route', 'second'),
+        Admission,
+    )
+    assert await waiting == Rejection.timeout
+
+
+async def test_overloaded_response() -> None:
+    """Test rejected requests get `503` with `Retry-After`."""
+    app = FastAPI()
+    app.state.admission = AdmissionControl(
+        route_limit=1,
+        queue_size=0,
+        retry_after=3,
+    )
+
+    @app.get('/slow/{table_name}')
+    async def slow(admission: AdmittedDep) -> None:  # noqa: WPS430
+        await asyncio.sleep(0.05)
+
+    rejected = REGISTRY.get_sample_value(
+        'rest_pg_admission_rejected_total',
+        {'route': '/slow/{table_name}', 'reason': 'queue_full'},
+    ) or 0
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),  # type: ignore[arg-type]
+        base_url='http://test',
+    ) as client:
+        responses = await asyncio.gather(
+            client.get('/slow/first'),
+            client.get('/slow/second'),
+        )
+
+    assert sorted(response.status_code for response in responses) == [
+        200,
+        503,
+    ]
+    assert responses[1].headers['Retry-After'] == '3'
+    assert REGISTRY.get_sample_value(
+        'rest_pg_admission_rejected_total',
+        {'route': '/slow/{table_name}', 'reason': 'queue_full'},
+    ) == rejected + 1
@@ -0,0 +1,133 @@
+"""Benchmark suite tests."""
+
+
+import httpx
+from psycopg.conninfo import make_conninfo
+from testcontainers.postgres import PostgresContainer
+
+from app.core.pool import create_pool
+from benchmarks.compare import compare_reports
+from benchmarks.runner import Measurement, Report, percentile
+from benchmarks.scenarios import SCENARIOS, Bench
+
+_SAMPLES = 100
+
+_P95 = 0.95
+
+_P99 = 0.99
+
+_OPERATIONS_PER_SECOND = 100
+
+_P95_MS = 10
+
+# Regression threshold and relative changes below and above it.
+_THRESHOLD = 0.1
+
+_NOISE = 1.05
+
+_SLOWDOWN = 1.25
+
+
+def _measurement(operations_per_second: float, p95_ms: float) -> Measurement:
+    return Measurement(
+        name='core.insert_rows',
+        params={'concurrency': 1, 'batch_size': 1},
+        operations=100,
+        rows_per_operation=1,
+        seconds=100 / operations_per_second,
+        operations_per_second=operations_per_second,
+        rows_per_second=operations_per_second,
+        p50_ms=p95_ms / 2,
+        p95_ms=p95_ms,
+        p99_ms=p95_ms,
+        max_ms=p95_ms,
+    )
+
+
+def test_percentile() -> None:
+    """Test nearest-rank percentiles."""
+    samples = [float(number) for number in range(1, _SAMPLES + 1)]
+    for quantile in (0.5, _P95, _P99):
+        assert percentile(samples, quantile) == quantile * _SAMPLES
+    assert percentile([1.0], _P99) == 1
+    assert percentile([], 0.5) == 0
+
+
+def test_compare_reports() -> None:
+    """Test slowdowns beyond threshold are flagged as regressions."""
+    baseline = Report(
+        environment={},
+        results=[_measurement(_OPERATIONS_PER_SECOND, _P95_MS)],
+    )
+    for current_result, regression in (
+        (
+            _measurement(
+                _OPERATIONS_PER_SECOND / _NOISE,
+                _P95_MS * _NOISE,
+            ),
+            False,
+        ),
+        (_measurement(_OPERATIONS_PER_SECOND / _SLOWDOWN, _P95_MS), True),
+        (_measurement(_OPERATIONS_PER_SECOND, _P95_MS * _SLOWDOWN), True),
+        (
+            _measurement(
+                _OPERATIONS_PER_SECOND * _SLOWDOWN,
+                _P95_MS / _SLOWDOWN,
+            ),
+            False,
+        ),
+    ):
+        changes, missing = compare_reports(
+            baseline,
+            Report(environment={}, results=[current_result]),
+            threshold=_THRESHOLD,
+        )
+        assert [change.regression for change in changes] == [regression]
+        assert not missing
+
+    changes, missing = compare_reports(
+        baseline,
+        Report(environment={}, results=[]),
+        threshold=_THRESHOLD,
+    )
+    assert not changes
+    assert missing == [baseline.results[0].key]
+
+
+async def test_scenario(container: PostgresContainer) -> None:
+    """Test scenario yields measurement per parameters combination."""
+    pool = create_pool(
+        make_conninfo(
+            host=container.get_container_host_ip(),
+            port=container.get_exposed_port(container.port_to_expose),
+            user=container.POSTGRES_USER,
+            password=container.POSTGRES_PASSWORD,
+            dbname=container.POSTGRES_DB,
+        ),
+        min_size=1,
+        max_size=2,
+        max_idle=60,
+        max_lifetime=60,
+        timeout=5,
+    )
+    async with pool, httpx.AsyncClient() as client:
+        bench = Bench(
+            pool=pool,
+            client=client,
+            operations=10,
+            concurrency=[1, 2],
+            batch_sizes=[1, 20],
+            table_sizes=[10],
+        )
+        measurements = [
+            measurement
+            async for measurement in SCENARIOS['core.insert_rows'](bench)
+        ]
+
+    assert [measurement.key for measurement in measurements] == [
+        'core.insert_rows(batch_size=1, concurrency=1)',
+        'core.insert_rows(batch_size=1, concurrency=2)',
+        'core.insert_rows(batch_size=20, concurrency=1)',
+        'core.insert_rows(batch_size=20, concurrency=2)',
+    ]
+    assert all(measurement.rows_per_second > 0 for measurement in measurements)
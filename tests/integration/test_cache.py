@@ -0,0 +1,92 @@
+"""Tables metadata cache tests."""
+
+
+import asyncio
+from typing import Any
+
+from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
+from testcontainers.postgres import PostgresContainer
+
+from app.core.cache import (
+    TableCache,
+    VersionedCache,
+    listen_table_changes,
+    table_cache,
+)
+from app.core.models import TableMeta
+from app.core.queries import notify_table_query
+from app.core.tables import create_table, drop_table, is_table_exist
+from tests.integration.conftest import TEST_TABLE_DEF, TEST_TABLE_NAME
+
+
+def test_table_cache_lru() -> None:
+    """Test `TableCache` evicts least recently used entries."""
+    cache = TableCache(max_size=2)
+    cache.put('a', TableMeta(exists=True))
+    cache.put('b', TableMeta(exists=True))
+    assert cache.get('a') is not None
+    cache.put('c', TableMeta(exists=True))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    stats = cache.stats()
+    assert (stats.size, stats.hits, stats.misses, stats.evictions) == (2, 3, 1, 1)
+
+
+def test_table_cache_ttl() -> None:
+    """Test `TableCache` entries expire."""
+    cache = TableCache(ttl=0)
+    cache.put('a', TableMeta(exists=True))
+    assert cache.get('a') is None
+
+
+def test_versioned_cache() -> None:
+    """Test `VersionedCache` returns values of the same version only."""
+    cache: VersionedCache[int] = VersionedCache(max_size=1)
+    cache.put('a', 'v1', 1)
+    assert cache.get('a', 'v2') is None
+    assert cache.get('a', 'v1') is None
+
+    cache.put('a', 'v1', 1)
+    assert cache.get('a', 'v1') == 1
+    cache.put('b', 'v1', 2)
+    assert cache.get('a', 'v1') is None
+
+    disabled: VersionedCache[int] = VersionedCache(ttl=0)
+    disabled.put('a', 'v1', 1)
+    assert disabled.get('a', 'v1') is None
+
+
+async def test_create_drop_invalidate(db_conn: AsyncConnection[Any]) -> None:
+    """Test `create_table` and `drop_table` keep cached existence actual."""
+    assert await is_table_exist(TEST_TABLE_NAME, db_conn) is False
+    await create_table(TEST_TABLE_NAME, TEST_TABLE_DEF, db_conn)
+    assert await is_table_exist(TEST_TABLE_NAME, db_conn) is True
+    await drop_table(TEST_TABLE_NAME, db_conn)
+    assert await is_table_exist(TEST_TABLE_NAME, db_conn) is False
+
+
+async def test_listen_table_changes(container: PostgresContainer) -> None:
+    """Test notifications from other instances invalidate cache."""
+    conninfo = make_conninfo(
+        host=container.get_container_host_ip(),
+        port=container.get_exposed_port(container.port_to_expose),
+        user=container.POSTGRES_USER,
+        password=container.POSTGRES_PASSWORD,
+        dbname=container.POSTGRES_DB,
+    )
+    listener = asyncio.create_task(listen_table_changes(conninfo))
+    await asyncio.sleep(0.5)
+    table_cache.put(TEST_TABLE_NAME, TableMeta(exists=False))
+
+    async with await AsyncConnection.connect(
+        conninfo,
+        autocommit=True,
+    ) as conn:
+        await conn.execute(notify_table_query(TEST_TABLE_NAME))
+    await asyncio.sleep(0.5)
+    listener.cancel()
+
+    assert table_cache.get(TEST_TABLE_NAME) is None
@@ -0,0 +1,208 @@
+"""Small inserts coalescing tests."""
+
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from psycopg import AsyncConnection
+
+from app.core.coalescing import InsertCoalescer
+from app.core.models import InsertedData, InsertStrategy, TableData
+from app.core.tables import DbError
+
+
+class _Connections:
+    """Connection factory counting checkouts."""
+
+    def __init__(self, conn: AsyncConnection[Any]) -> None:
+        self.conn = conn
+        self.checkouts = 0
+        self.released = asyncio.Event()
+        self.released.set()
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator[AsyncConnection[Any]]:
+        self.checkouts += 1
+        await self.released.wait()
+        yield self.conn
+
+
+async def test_insert_coalesced(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test concurrent inserts are written at once and rows handed back."""
+    coalescer = InsertCoalescer(window=0.05)
+    connections = _Connections(db_conn)
+    results = await asyncio.gather(*(
+        coalescer.insert(
+            empty_table,
+            TableData(rows=[{'col 2': 'test {0}'.format(index)}]),
+            connections.connect,
+        )
+        for index in range(3)
+    ))
+
+    assert connections.checkouts == 1
+
+    assert results == [
+        InsertedData(
+            rows=[{'col 1': index + 1, 'col 2': 'test {0}'.format(index)}],
+            strategy=InsertStrategy.values,
+        )
+        for index in range(3)
+    ]
+
+
+async def test_insert_coalesced_error(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test bad rows fail only the request that sent them."""
+    coalescer = InsertCoalescer(window=0.05)
+    results = await asyncio.gather(*(
+        coalescer.insert(
+            empty_table,
+            TableData(rows=[{'col 1': key, 'col 2': 'test'}]),
+            _Connections(db_conn).connect,
+        )
+        for key in (1, 1, 2)
+    ))
+
+    assert isinstance(results[0], InsertedData)
+    assert isinstance(results[1], DbError)
+    assert isinstance(results[2], InsertedData)
+    assert results[2].rows == [{'col 1': 2, 'col 2': 'test'}]
+
+
+async def test_insert_coalesced_full_batch(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test batch is written without waiting once it has enough rows."""
+    coalescer = InsertCoalescer(window=60, max_rows=2)
+    connect = _Connections(db_conn).connect
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            coalescer.insert(
+                empty_table,
+                TableData(rows=[{'col 2': 'first'}]),
+                connect,
+            ),
+            coalescer.insert(
+                empty_table,
+                TableData(rows=[{'col 2': 'second'}]),
+                connect,
+            ),
+        ),
+        timeout=1,
+    )
+
+    assert [
+        result.rows
+        for result in results
+        if isinstance(result, InsertedData)
+    ] == [
+        [{'col 1': 1, 'col 2': 'first'}],
+        [{'col 1': 2, 'col 2': 'second'}],
+    ]
+
+
+async def test_insert_not_coalesced(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test rows with different columns are inserted on their own."""
+    coalescer = InsertCoalescer(window=60)
+    inserted = await asyncio.wait_for(
+        coalescer.insert(
+            empty_table,
+            TableData(rows=[{'col 2': 'first'}, {'col 1': 10}]),
+            _Connections(db_conn).connect,
+        ),
+        timeout=1,
+    )
+
+    assert isinstance(inserted, InsertedData)
+    assert len(inserted.rows) == 2
+
+
+async def test_insert_lone(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test insert is written right away while table isn't being written."""
+    coalescer = InsertCoalescer(window=60)
+    inserted = await asyncio.wait_for(
+        coalescer.insert(
+            empty_table,
+            TableData(rows=[{'col 2': 'lone'}]),
+            _Connections(db_conn).connect,
+        ),
+        timeout=1,
+    )
+
+    assert isinstance(inserted, InsertedData)
+    assert inserted.rows == [{'col 1': 1, 'col 2': 'lone'}]
+
+
+async def test_insert_coalesced_busy(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test inserts are collected while table is being written."""
+    coalescer = InsertCoalescer(window=0.05)
+    connections = _Connections(db_conn)
+    connections.released.clear()
+    writing = asyncio.create_task(coalescer.insert(
+        empty_table,
+        TableData(rows=[{'col 2': 'first'}]),
+        connections.connect,
+    ))
+    await asyncio.sleep(0.01)
+    collected = asyncio.gather(*(
+        coalescer.insert(
+            empty_table,
+            TableData(rows=[{'col 2': 'next'}]),
+            connections.connect,
+        )
+        for _ in range(2)
+    ))
+    await asyncio.sleep(0.01)
+    connections.released.set()
+    await writing
+    results = await collected
+
+    assert connections.checkouts == 2
+    assert [
+        result.rows
+        for result in results
+        if isinstance(result, InsertedData)
+    ] == [
+        [{'col 1': 2, 'col 2': 'next'}],
+        [{'col 1': 3, 'col 2': 'next'}],
+    ]
+
+
+async def test_insert_coalesced_connect_error() -> None:
+    """Test error taking connection is raised for every batch request."""
+    @asynccontextmanager
+    async def connect() -> AsyncIterator[AsyncConnection[Any]]:  # noqa: WPS430
+        raise RuntimeError('No connections')
+        yield  # pragma: no cover  # noqa: WPS503
+
+    coalescer = InsertCoalescer(window=0.05)
+    results = await asyncio.gather(
+        *(
+            coalescer.insert(
+                'Test Table',
+                TableData(rows=[{'col 2': 'test'}]),
+                connect,
+            )
+            for _ in range(2)
+        ),
+        return_exceptions=True,
+    )
+
+    assert [type(result) for result in results] == [RuntimeError] * 2
@@ -0,0 +1,179 @@
+"""Bodies compression tests."""
+
+
+import asyncio
+import gzip
+import zlib
+from typing import Any, AsyncIterator
+
+import httpx
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from psycopg import AsyncConnection
+from starlette.datastructures import Headers
+from starlette.types import Message
+
+from app.api_v1.compression import CompressionMiddleware, negotiate_encoding
+from app.core.compression import CorruptedBody, decompress
+from app.core.ingest import ingest_csv, ingest_ndjson
+from app.core.models import IngestResult
+from app.core.tables import DbError
+
+_LINE = b'{"col 2": "compressed"}\n'
+
+
+async def _chunks(body: bytes, size: int = 7) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def _make_app(**options: Any) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/stream')
+    async def stream() -> StreamingResponse:  # noqa: WPS430
+        async def lines() -> AsyncIterator[bytes]:  # noqa: WPS430
+            for _ in range(3):
+                yield _LINE * 100
+
+        return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+    @app.get('/small')
+    async def small() -> PlainTextResponse:  # noqa: WPS430
+        return PlainTextResponse('small')
+
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=['zstd', 'gzip'],
+        levels={'gzip': 6, 'zstd': 3},
+        **options,
+    )
+    return app
+
+
+@pytest.mark.parametrize(('accept_encoding', 'expected'), (
+    (None, None),
+    ('gzip, deflate, br, zstd', 'zstd'),
+    ('gzip;q=1, zstd;q=0.5', 'gzip'),
+    ('*', 'zstd'),
+    ('*, zstd;q=0', 'gzip'),
+    ('br, identity', None),
+))
+def test_negotiate_encoding(
+    accept_encoding: str | None,
+    expected: str | None,
+) -> None:
+    """Test the most weighted encoding is chosen, ties by server order."""
+    assert negotiate_encoding(accept_encoding, ['zstd', 'gzip']) == expected
+
+
+@pytest.mark.parametrize('encoding', ('gzip', 'zstd'))
+async def test_compressed_stream(encoding: str) -> None:
+    """Test each streamed chunk is decodable as soon as it is sent."""
+    messages: list[Message] = []
+    requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive() -> Message:  # noqa: WPS430
+        if requests:
+            return requests.pop()
+        await asyncio.Event().wait()
+        return {'type': 'http.disconnect'}  # pragma: no cover
+
+    async def send(message: Message) -> None:  # noqa: WPS430
+        messages.append(message)
+
+    await _make_app()(
+        {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/stream',
+            'headers': [(b'accept-encoding', encoding.encode())],
+            'query_string': b'',
+        },
+        receive,
+        send,
+    )
+
+    start, *body = messages
+    headers = Headers(raw=start['headers'])
+    assert headers['content-encoding'] == encoding
+    assert headers['vary'] == 'Accept-Encoding'
+    assert 'content-length' not in headers
+
+    if encoding == 'gzip':
+        decompressor: Any = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    else:
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    chunks = [decompressor.decompress(message['body']) for message in body]
+    assert chunks[:3] == [_LINE * 100] * 3
+    assert not b''.join(chunks[3:])
+    assert decompressor.eof
+    assert sum(len(message['body']) for message in body) < len(_LINE) * 300
+
+
+async def test_not_compressed() -> None:
+    """Test small bodies and disabled encodings are sent as is."""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=_make_app()),  # type: ignore
+        base_url='http://test',
+    ) as client:
+        small = await client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        identity = await client.get(
+            '/stream',
+            headers={'Accept-Encoding': 'identity'},
+        )
+
+    assert 'content-encoding' not in small.headers
+    assert small.headers['vary'] == 'Accept-Encoding'
+    assert small.text == 'small'
+    assert 'content-encoding' not in identity.headers
+    assert identity.content == _LINE * 300
+
+
+@pytest.mark.parametrize(('ingest', 'body'), (
+    (ingest_ndjson, _LINE * 3),
+    (ingest_csv, b'col 1,col 2\n1,a\n2,b\n3,c\n'),
+))
+@pytest.mark.parametrize('encoding', ('gzip', 'zstd'))
+async def test_ingest_compressed(
+    ingest: Any,
+    body: bytes,
+    encoding: str,
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test compressed bodies are loaded as they are decompressed."""
+    if encoding == 'gzip':
+        compressed = gzip.compress(body)
+    else:
+        compressed = zstandard.ZstdCompressor().compress(body)
+    ingested = await ingest(
+        empty_table,
+        decompress(_chunks(compressed), encoding),
+        db_conn,
+    )
+    assert isinstance(ingested, IngestResult)
+    assert ingested.rows == 3
+
+
+@pytest.mark.parametrize('ingest', (ingest_ndjson, ingest_csv))
+async def test_ingest_corrupted(
+    ingest: Any,
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test malformed and truncated bodies fail the load."""
+    compressed = gzip.compress(b'col 1,col 2\n' + _LINE * 100)
+    for corrupted in (b'not gzip', compressed[:-10]):
+        ingested = await ingest(
+            empty_table,
+            decompress(_chunks(corrupted), 'gzip'),
+            db_conn,
+        )
+        assert isinstance(ingested, DbError)
+
+    with pytest.raises(CorruptedBody):
+        async for _ in decompress(_chunks(b'\x28\xb5\x2f\xfd'), 'zstd'):
+            pass  # noqa: WPS420
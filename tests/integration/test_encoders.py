@@ -0,0 +1,174 @@
+"""Response encoders tests."""
+
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, cast
+from uuid import UUID
+
+import msgpack
+import pyarrow
+import pytest
+from psycopg import AsyncConnection
+from psycopg.types.json import Jsonb
+
+from app.api_v1.encoders import (
+    ARROW_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    ENCODERS,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    dumps,
+    negotiate,
+    single_batch,
+)
+from app.core.models import ColumnInfo
+from app.core.rows import read_rows
+from app.core.tables import DbError, drop_table
+
+_ROWS: list[dict[str, Any]] = [
+    {'id': 1, 'name': 'first', 'data': {'a': [1, 2]}},
+    {'id': 2, 'name': None, 'data': None},
+]
+
+
+def _decode_json(body: bytes) -> list[dict[str, Any]]:
+    return cast(list[dict[str, Any]], json.loads(body)['rows'])
+
+
+def _decode_ndjson(body: bytes) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def _decode_csv(body: bytes) -> list[dict[str, Any]]:
+    return [
+        {
+            'id': int(row['id']),
+            'name': row['name'] or None,
+            'data': json.loads(row['data']) if row['data'] else None,
+        }
+        for row in csv.DictReader(io.StringIO(body.decode()))
+    ]
+
+
+def _decode_msgpack(body: bytes) -> list[dict[str, Any]]:
+    columns, *rows = msgpack.Unpacker(io.BytesIO(body))
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _decode_arrow(body: bytes) -> list[dict[str, Any]]:
+    rows = pyarrow.ipc.open_stream(body).read_all().to_pylist()
+    for row in rows:
+        row['data'] = json.loads(row['data']) if row['data'] else None
+    return cast(list[dict[str, Any]], rows)
+
+
+_DECODERS = {  # noqa: WPS407
+    JSON_MEDIA_TYPE: _decode_json,
+    NDJSON_MEDIA_TYPE: _decode_ndjson,
+    CSV_MEDIA_TYPE: _decode_csv,
+    MSGPACK_MEDIA_TYPE: _decode_msgpack,
+    ARROW_MEDIA_TYPE: _decode_arrow,
+}
+
+
+@pytest.fixture
+async def json_table(db_conn: AsyncConnection[Any]) -> Any:
+    """Create table with jsonb column."""
+    table_name = 'Encoded Table'
+    await db_conn.execute(
+        'CREATE TABLE "Encoded Table" '
+        '(id serial PRIMARY KEY, name text, data jsonb)',
+    )
+    await db_conn.cursor().executemany(
+        'INSERT INTO "Encoded Table" (name, data) VALUES (%s, %s)',
+        [
+            (row['name'], None if row['data'] is None else Jsonb(row['data']))
+            for row in _ROWS
+        ],
+    )
+    yield table_name
+    await drop_table(table_name, db_conn)
+
+
+@pytest.mark.parametrize('media_type', list(_DECODERS))
+async def test_encode_rows(
+    media_type: str,
+    json_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test rows read with server-side cursor survive encoding."""
+    batches = await read_rows(json_table, db_conn, batch_size=1)
+    assert batches is not None
+    assert not isinstance(batches, DbError)
+    body = b''.join([
+        chunk async for chunk in ENCODERS[media_type](batches)
+    ])
+    assert _DECODERS[media_type](body) == _ROWS
+
+
+@pytest.mark.parametrize('media_type', list(_DECODERS))
+async def test_encode_single_batch(media_type: str) -> None:
+    """Test rows dicts without known types survive encoding."""
+    body = b''.join([
+        chunk async for chunk in ENCODERS[media_type](single_batch(_ROWS))
+    ])
+    assert _DECODERS[media_type](body) == _ROWS
+
+
+async def test_encode_empty_arrow() -> None:
+    """Test Arrow stream of no rows carries columns schema."""
+    columns = [
+        ColumnInfo(name='id', type='integer'),
+        ColumnInfo(name='created', type='timestamp with time zone'),
+        ColumnInfo(name='custom', type='unknown type'),
+    ]
+    body = b''.join([
+        chunk
+        async for chunk in ENCODERS[ARROW_MEDIA_TYPE](
+            single_batch([], columns),
+        )
+    ])
+    table = pyarrow.ipc.open_stream(body).read_all()
+
+    assert table.num_rows == 0
+    assert table.schema == pyarrow.schema([
+        ('id', pyarrow.int32()),
+        ('created', pyarrow.timestamp('us', tz='UTC')),
+        ('custom', pyarrow.string()),
+    ])
+
+
+@pytest.mark.parametrize(('accept', 'expected'), (
+    (None, NDJSON_MEDIA_TYPE),
+    ('*/*', NDJSON_MEDIA_TYPE),
+    ('text/csv', CSV_MEDIA_TYPE),
+    ('text/*', CSV_MEDIA_TYPE),
+    ('text/html, application/vnd.msgpack;q=0.5', MSGPACK_MEDIA_TYPE),
+    ('text/csv;q=0.2, application/vnd.apache.arrow.stream', ARROW_MEDIA_TYPE),
+    ('application/json;q=0, text/html', None),
+))
+def test_negotiate(accept: str | None, expected: str | None) -> None:
+    """Test Accept header negotiation."""
+    assert negotiate(accept, NDJSON_MEDIA_TYPE) == expected
+
+
+def test_dumps() -> None:
+    """Test Postgres values without JSON counterpart are encoded as text."""
+    assert json.loads(dumps({
+        'numeric': Decimal('1.50'),
+        'timestamptz': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        'uuid': UUID(int=1),
+        'bytea': b'\x00\xff',
+        'memoryview': memoryview(b'\x01'),
+    })) == {
+        'numeric': '1.50',
+        'timestamptz': '2024-01-02T03:04:05+00:00',
+        'uuid': '00000000-0000-0000-0000-000000000001',
+        'bytea': '\\x00ff',
+        'memoryview': '\\x01',
+    }
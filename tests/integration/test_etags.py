@@ -0,0 +1,126 @@
+"""Conditional requests tests."""
+
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from psycopg import AsyncConnection
+
+from app.api_v1.dependencies import (
+    ReadConnection,
+    db_connect,
+    db_read_connection,
+)
+from app.api_v1.etags import etag_matches, make_etag
+from app.api_v1.routes.tables import router as tables_router
+from app.core.coalescing import InsertCoalescer
+from app.core.models import TableData
+from app.core.replicas import ReplicaSet
+from app.core.tables import get_table_version, insert_rows
+
+
+@pytest.mark.parametrize(('if_none_match', 'expected'), (
+    (None, False),
+    ('*', True),
+    ('W/"a"', True),
+    ('"a"', True),
+    ('"b", W/"a"', True),
+    ('"b"', False),
+))
+def test_etag_matches(if_none_match: str | None, expected: bool) -> None:
+    """Test tags are compared weakly, any tag of the list may match."""
+    assert etag_matches(if_none_match, 'W/"a"') == expected
+
+
+def test_make_etag() -> None:
+    """Test tag depends on version and parameters."""
+    etag = make_etag('v1', 'exact')
+    assert etag.startswith('W/"')
+    assert etag == make_etag('v1', 'exact')
+    assert etag != make_etag('v2', 'exact')
+    assert etag != make_etag('v1', 'estimate')
+
+
+async def test_table_version(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test version changes on rows and columns changes only.
+
+    Rows written by this process change version right away, before
+    statistics reach the catalog.
+    """
+    version = await get_table_version(empty_table, db_conn)
+    assert isinstance(version, str)
+    assert await get_table_version(empty_table, db_conn) == version
+
+    await insert_rows(empty_table, TableData(rows=[{'col 2': 'a'}]), db_conn)
+    inserted_version = await get_table_version(empty_table, db_conn)
+    assert inserted_version != version
+
+    await db_conn.execute(
+        'ALTER TABLE "{0}" RENAME COLUMN "col 2" TO "col 3"'.format(
+            empty_table,
+        ),
+    )
+    assert await get_table_version(empty_table, db_conn) != inserted_version
+    assert await get_table_version('Unexisted', db_conn) is None
+
+
+async def test_table_info_not_modified(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test unchanged table info is not sent again, written one is."""
+    @asynccontextmanager
+    async def connect() -> AsyncIterator[AsyncConnection[Any]]:  # noqa: WPS430
+        yield db_conn
+
+    app = FastAPI()
+    app.include_router(tables_router)
+    app.state.coalescer = InsertCoalescer()
+    app.state.replicas = ReplicaSet([])
+    # Inserts take connections from pool only to report write position.
+    app.state.pool = None
+    app.dependency_overrides[db_read_connection] = lambda: ReadConnection(
+        conn=db_conn,
+        replica=False,
+    )
+    app.dependency_overrides[db_connect] = lambda: connect
+    path = '/tables/table_info/{0}'.format(empty_table)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),  # type: ignore[arg-type]
+        base_url='http://test',
+    ) as client:
+        rows_path = '/tables/{0}'.format(empty_table)
+        await client.put(rows_path, json={'rows': [{'col 2': 'a'}]})
+        first = await client.get(path)
+        etag = first.headers['etag']
+        not_modified = await client.get(path, headers={'If-None-Match': etag})
+        other_count = await client.get(
+            path,
+            params={'count': 'estimate'},
+            headers={'If-None-Match': etag},
+        )
+
+        # Statistics are sent at most once a second, this write is not
+        # reflected in them yet.
+        inserted = await client.put(rows_path, json={'rows': [{'col 2': 'b'}]})
+        modified = await client.get(path, headers={'If-None-Match': etag})
+        written = await client.get(path)
+
+    assert first.status_code == 200
+    assert first.json()['rows'] == 1
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == etag
+    assert not not_modified.content
+    assert other_count.status_code == 200
+    assert inserted.status_code == 200
+    assert modified.status_code == 200
+    assert modified.headers['etag'] != etag
+    assert modified.json()['rows'] == 2
+    assert written.json()['rows'] == 2
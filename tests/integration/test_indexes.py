@@ -0,0 +1,160 @@
+"""Table indexes management tests."""
+
+
+from typing import Any
+
+import pytest
+from psycopg import AsyncConnection
+
+from app.core.indexes import create_index, drop_index, get_indexes
+from app.core.models import (
+    ColumnDef,
+    ColumnTypes,
+    FilterOperator,
+    IndexDef,
+    IndexInfo,
+    IndexMethod,
+    PartitionDef,
+    PartitionMethod,
+    RowsFilter,
+    TableData,
+    TableDef,
+)
+from app.core.tables import DbError, create_table, insert_rows
+
+
+@pytest.mark.parametrize('concurrently', (False, True))
+async def test_create_index(
+    concurrently: bool,
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `create_index` builds partial multi-column index."""
+    index = await create_index(
+        empty_table,
+        IndexDef(
+            name='Test Index',
+            columns=['col 2', 'col 1'],
+            where=[
+                RowsFilter(column='col 2', op=FilterOperator.is_null, value=False),
+                RowsFilter(column='col 1', op=FilterOperator.in_, value=[1, 2]),
+            ],
+        ),
+        db_conn,
+        concurrently,
+    )
+
+    assert isinstance(index, IndexInfo)
+    assert index.name == 'Test Index'
+    assert index.columns == ['col 2', 'col 1']
+    assert index.method == IndexMethod.btree
+    assert index.predicate == (
+        '(("col 2" IS NOT NULL) AND ("col 1" = ANY (ARRAY[1, 2])))'
+    )
+    assert index.valid
+    assert index.size > 0
+
+
+async def test_create_index_failed_concurrently(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test failed concurrent build leaves no invalid index."""
+    await insert_rows(
+        empty_table,
+        TableData(rows=[{'col 2': 'same'}, {'col 2': 'same'}]),
+        db_conn,
+    )
+
+    index = await create_index(
+        empty_table,
+        IndexDef(name='Unique Index', columns=['col 2'], unique=True),
+        db_conn,
+        concurrently=True,
+    )
+
+    assert isinstance(index, DbError)
+    indexes = await get_indexes(empty_table, db_conn)
+    assert isinstance(indexes, list)
+    assert [index.name for index in indexes] == ['Test Table_pkey']
+
+
+async def test_get_indexes_usage(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `get_indexes` reports index scans."""
+    await db_conn.execute(
+        'SELECT * FROM "{0}" WHERE "col 1" = 1'.format(empty_table),
+    )
+    await db_conn.execute('SELECT pg_stat_force_next_flush()')
+
+    indexes = await get_indexes(empty_table, db_conn)
+    assert isinstance(indexes, list)
+    assert indexes[0].name == 'Test Table_pkey'
+    assert indexes[0].unique
+    assert indexes[0].scans == 1
+    assert await get_indexes('Unexisted', db_conn) is None
+
+
+async def test_drop_index(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `drop_index` drops only indexes of the table."""
+    await create_index(
+        empty_table,
+        IndexDef(name='Brin', columns=['col 1'], method=IndexMethod.brin),
+        db_conn,
+    )
+
+    assert await drop_index('Other', 'Brin', db_conn) is None
+    assert await drop_index(empty_table, 'Missing', db_conn) is None
+    assert await drop_index(empty_table, 'Brin', db_conn, True) == 'Brin'
+    indexes = await get_indexes(empty_table, db_conn)
+    assert isinstance(indexes, list)
+    assert [index.name for index in indexes] == ['Test Table_pkey']
+
+
+async def test_partitioned_table_index(db_conn: AsyncConnection[Any]) -> None:
+    """Test partitioned table indexes are built and dropped as usual."""
+    await create_table(
+        'Events',
+        TableDef(
+            columns=[ColumnDef(name='id', type=ColumnTypes.integer)],
+            partition=PartitionDef(
+                method=PartitionMethod.hash,
+                column='id',
+                partitions=2,
+            ),
+        ),
+        db_conn,
+    )
+
+    index = await create_index(
+        'Events',
+        IndexDef(name='Events Id', columns=['id']),
+        db_conn,
+        concurrently=True,
+    )
+    assert isinstance(index, IndexInfo)
+    assert index.valid
+    assert await drop_index(
+        'Events',
+        'Events Id',
+        db_conn,
+        concurrently=True,
+    ) == 'Events Id'
+
+
+async def test_create_index_truncated_name(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test index got name truncated by Postgres is reported as error."""
+    created = await create_index(
+        empty_table,
+        IndexDef(name='\u0439' * 40, columns=['col 2']),
+        db_conn,
+    )
+    assert isinstance(created, DbError)
@@ -0,0 +1,74 @@
+"""Streamed rows loading tests."""
+
+
+from typing import Any, AsyncIterator
+
+import pytest
+from psycopg import AsyncConnection
+
+from app.core.ingest import ingest_csv, ingest_ndjson, split_lines
+from app.core.models import IngestResult, TableInfo
+from app.core.tables import DbError, get_table_info
+
+
+async def _chunks(body: bytes, size: int = 7) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+async def test_split_lines() -> None:
+    """Test `split_lines` joins lines split between chunks."""
+    lines = [
+        line async for line in split_lines(_chunks(b'first\r\nsecond\n\nlast'))
+    ]
+    assert lines == [b'first', b'second', b'', b'last']
+
+
+@pytest.mark.parametrize(('ingest', 'body', 'expected_rows'), (
+    (
+        ingest_ndjson,
+        b'{"col 2": "test 0"}\n\n{"col 1": 10, "col 2": "test 1"}\n',
+        None,
+    ),
+    (
+        ingest_ndjson,
+        b'{"col 1": 10, "col 2": "test 0"}\n{"col 1": 11}\n',
+        2,
+    ),
+    (ingest_ndjson, b'', 0),
+    (
+        ingest_csv,
+        b'col 1,col 2\r\n10,"test, 0"\r\n11,test 1\r\n',
+        2,
+    ),
+    (ingest_csv, b'col 1,col 2\n', 0),
+))
+async def test_ingest(
+    ingest: Any,
+    body: bytes,
+    expected_rows: int | None,
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test rows are loaded from NDJSON and CSV chunks.
+
+    NDJSON columns are taken from the first row: extra columns of the next
+    rows fail the whole load.
+    """
+    ingested = await ingest(empty_table, _chunks(body), db_conn)
+    table_info = await get_table_info(empty_table, db_conn)
+    assert isinstance(table_info, TableInfo)
+
+    if expected_rows is None:
+        assert isinstance(ingested, DbError)
+        assert table_info.rows == 0
+    else:
+        assert isinstance(ingested, IngestResult)
+        assert ingested.rows == expected_rows
+        assert table_info.rows == expected_rows
+
+
+async def test_ingest_missing_table(db_conn: AsyncConnection[Any]) -> None:
+    """Test loading into missing table."""
+    assert await ingest_ndjson('Unexisted', _chunks(b'{}'), db_conn) is None
+    assert await ingest_csv('Unexisted', _chunks(b'a\n1\n'), db_conn) is None
@@ -0,0 +1,180 @@
+"""Ingest jobs tests."""
+
+
+import asyncio
+from typing import Any, AsyncGenerator
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
+from testcontainers.postgres import PostgresContainer
+
+from app import config
+from app.api_v1.dependencies import db_connection
+from app.api_v1.factory import lifespan
+from app.api_v1.routes.jobs import router as jobs_router
+from app.api_v1.routes.tables import router as tables_router
+from app.core.jobs import IngestJobs
+from app.core.models import Job, JobStatus
+from app.core.pool import Pool, create_pool
+
+
+@pytest.fixture
+async def pool(container: PostgresContainer) -> AsyncGenerator[Pool, None]:
+    """Create connections pool to the test database."""
+    pool = create_pool(
+        make_conninfo(
+            host=container.get_container_host_ip(),
+            port=container.get_exposed_port(container.port_to_expose),
+            user=container.POSTGRES_USER,
+            password=container.POSTGRES_PASSWORD,
+            dbname=container.POSTGRES_DB,
+        ),
+        min_size=1,
+        max_size=2,
+        max_idle=60,
+        max_lifetime=60,
+        timeout=5,
+    )
+    async with pool:
+        yield pool
+
+
+async def _wait(job: Job) -> None:
+    while job.finished_at is None:  # noqa: WPS328
+        await asyncio.sleep(0.01)
+
+
+async def _count(table_name: str, conn: AsyncConnection[Any]) -> int:
+    curr = await conn.execute('SELECT count(*) FROM "{0}"'.format(table_name))
+    row: tuple[int] | None = await curr.fetchone()
+    return row[0] if row else 0
+
+
+@pytest.mark.parametrize(('rows', 'status', 'rows_done'), (
+    ([{'col 2': str(index)} for index in range(5)], JobStatus.succeeded, 5),
+    (
+        [{'col 2': 'a'}, {'col 2': 'b'}, {'col 2': 'c'}, {'col 3': 'd'}],
+        JobStatus.failed,
+        2,
+    ),
+))
+async def test_job(  # noqa: WPS211
+    rows: list[dict[str, Any]],
+    status: JobStatus,
+    rows_done: int,
+    empty_table: str,
+    pool: Pool,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test rows are inserted and committed chunk by chunk."""
+    jobs = IngestJobs(workers=1, chunk_size=2)
+    jobs.start(pool)
+    job = jobs.submit(empty_table, rows)
+    assert job is not None
+    await asyncio.wait_for(_wait(job), timeout=10)
+    await jobs.stop()
+
+    assert job.status == status
+    assert job.rows_total == len(rows)
+    assert job.rows_done == rows_done
+    assert (job.error is None) == (status == JobStatus.succeeded)
+    assert await _count(empty_table, db_conn) == rows_done
+    assert jobs.get(job.id) is job
+
+
+async def test_job_missing_table(pool: Pool) -> None:
+    """Test job inserting into missing table fails."""
+    jobs = IngestJobs()
+    jobs.start(pool)
+    job = jobs.submit('Unexisted', [{'col': 1}])
+    assert job is not None
+    await asyncio.wait_for(_wait(job), timeout=10)
+    await jobs.stop()
+
+    assert job.status == JobStatus.failed
+    assert job.error == 'Table Unexisted doesn`t exist'
+
+
+async def test_job_unexpected_error(
+    empty_table: str,
+    pool: Pool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test unexpected errors fail the job and keep the worker running."""
+    jobs = IngestJobs(workers=1)
+
+    async def failing_insert(*args: Any) -> int:  # noqa: WPS430
+        raise RuntimeError('Unexpected')
+
+    monkeypatch.setattr(jobs, '_insert', failing_insert)
+    jobs.start(pool)
+    failed = jobs.submit(empty_table, [{'col 2': 'a'}])
+    next_job = jobs.submit(empty_table, [{'col 2': 'b'}])
+    assert failed is not None
+    assert next_job is not None
+    await asyncio.wait_for(_wait(next_job), timeout=10)
+    await jobs.stop()
+
+    assert failed.status == JobStatus.failed
+    assert failed.error == 'Unexpected'
+    assert failed.finished_at is not None
+    assert next_job.status == JobStatus.failed
+
+
+def test_jobs_queue_full() -> None:
+    """Test jobs are rejected when queue is full."""
+    jobs = IngestJobs(queue_size=1)
+    assert jobs.submit('table', []) is not None
+    assert jobs.submit('table', []) is None
+
+
+async def test_job_api(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+    pool: Pool,
+) -> None:
+    """Test job is submitted and polled through API."""
+    root_router = APIRouter(prefix='/api')
+    root_router.include_router(tables_router)
+    root_router.include_router(jobs_router)
+    app = FastAPI()
+    app.include_router(root_router)
+    app.dependency_overrides[db_connection] = lambda: db_conn
+    app.state.jobs = IngestJobs()
+    app.state.jobs.start(pool)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),  # type: ignore[arg-type]
+        base_url='http://test',
+    ) as client:
+        response = await client.post(
+            '/api/tables/{0}/jobs'.format(empty_table),
+            json={'rows': [{'col 2': 'a'}]},
+        )
+        assert response.status_code == 202
+        location = response.headers['location']
+        assert location == 'http://test/api/jobs/{0}'.format(
+            response.json()['id'],
+        )
+
+        job = app.state.jobs.get(response.json()['id'])
+        assert job is not None
+        await _wait(job)
+        response = await client.get(location)
+        missing = await client.get('/api/jobs/unknown')
+    await app.state.jobs.stop()
+
+    assert response.json()['status'] == JobStatus.succeeded
+    assert response.json()['rows_done'] == 1
+    assert missing.status_code == 404
+
+
+async def test_jobs_workers_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test app doesn't start with workers taking every connection."""
+    monkeypatch.setattr(config, 'JOBS_WORKERS', config.PG_POOL_MAX_SIZE)
+    with pytest.raises(ValueError, match='JOBS_WORKERS'):
+        async with lifespan(FastAPI()):
+            pass  # pragma: no cover  # noqa: WPS420
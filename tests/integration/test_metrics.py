@@ -0,0 +1,133 @@
+"""Metrics tests."""
+
+
+from typing import Any
+
+import httpx
+from fastapi import APIRouter, FastAPI
+from prometheus_client import REGISTRY
+from psycopg import AsyncConnection
+
+from app.api_v1.metrics import UNMATCHED_ROUTE, MetricsMiddleware
+from app.core.models import TableData
+from app.core.tables import DbError, insert_rows
+
+
+def _sample(name: str, **labels: Any) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+async def test_db_metrics(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test database operations time, errors and written rows are counted."""
+    inserts = _sample(
+        'rest_pg_db_operation_seconds_count',
+        operation='insert',
+    )
+    rows = _sample('rest_pg_rows_written_total', operation='insert')
+    unique_errors = _sample(
+        'rest_pg_db_errors_total',
+        operation='insert',
+        sqlstate='23505',
+    )
+
+    table_data = TableData(rows=[{'col 1': 1}, {'col 1': 2}])
+    await insert_rows(empty_table, table_data, db_conn)
+    duplicate = await insert_rows(empty_table, table_data, db_conn)
+    assert isinstance(duplicate, DbError)
+
+    assert _sample(
+        'rest_pg_db_operation_seconds_count',
+        operation='insert',
+    ) == inserts + 2
+    assert _sample(
+        'rest_pg_rows_written_total',
+        operation='insert',
+    ) == rows + 2
+    assert _sample(
+        'rest_pg_db_errors_total',
+        operation='insert',
+        sqlstate='23505',
+    ) == unique_errors + 1
+
+
+async def test_metrics_middleware() -> None:
+    """Test requests are measured by route templates."""
+    router = APIRouter(prefix='/prefix')
+
+    @router.post('/items/{name}')
+    async def echo(name: str, body: dict[str, Any]) -> dict[str, Any]:
+        return body
+
+    @router.get('/files/{file_path:path}')
+    async def read_file(file_path: str) -> str:
+        return file_path
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(MetricsMiddleware)
+
+    route = '/prefix/items/{name}'
+    requests = _sample(
+        'rest_pg_http_request_duration_seconds_count',
+        method='POST',
+        route=route,
+        status='200',
+    )
+    request_bytes = _sample(
+        'rest_pg_http_request_size_bytes_sum',
+        method='POST',
+        route=route,
+    )
+    unmatched = _sample(
+        'rest_pg_http_request_duration_seconds_count',
+        method='GET',
+        route=UNMATCHED_ROUTE,
+        status='404',
+    )
+    file_route = '/prefix/files/{file_path}'
+    files = _sample(
+        'rest_pg_http_request_duration_seconds_count',
+        method='GET',
+        route=file_route,
+        status='200',
+    )
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),  # type: ignore[arg-type]
+        base_url='http://test',
+    ) as client:
+        for name in ('a', 'b'):
+            await client.post(
+                '/prefix/items/{0}'.format(name),
+                content=b'{"key": 1}',
+                headers={'Content-Type': 'application/json'},
+            )
+        await client.get('/missing')
+        await client.get('/prefix/files/dir/name')
+
+    assert _sample(
+        'rest_pg_http_request_duration_seconds_count',
+        method='POST',
+        route=route,
+        status='200',
+    ) == requests + 2
+    assert _sample(
+        'rest_pg_http_request_size_bytes_sum',
+        method='POST',
+        route=route,
+    ) == request_bytes + 20
+    assert _sample(
+        'rest_pg_http_request_duration_seconds_count',
+        method='GET',
+        route=UNMATCHED_ROUTE,
+        status='404',
+    ) == unmatched + 1
+    assert _sample(
+        'rest_pg_http_request_duration_seconds_count',
+        method='GET',
+        route=file_route,
+        status='200',
+    ) == files + 1
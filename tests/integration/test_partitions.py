@@ -0,0 +1,331 @@
+"""Tables partitioning tests."""
+
+
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+from psycopg import AsyncConnection
+from psycopg.sql import Composed
+from pydantic import ValidationError
+
+from app.core.cache import write_generations
+from app.core.models import (
+    ColumnDef,
+    ColumnTypes,
+    PartitionDef,
+    PartitionMethod,
+    PartitionUnit,
+    TableData,
+    TableDef,
+)
+from app.core.partitions import (
+    partition_name,
+    premake_partitions,
+    range_partitions,
+)
+from app.core.queries import listen_tables_query
+from app.core.tables import (
+    DbError,
+    create_table,
+    drop_partition,
+    get_partitions,
+    insert_rows,
+)
+
+EVENTS_COLUMNS = [
+    ColumnDef(name='id', type=ColumnTypes.integer),
+    ColumnDef(name='kind', type=ColumnTypes.text),
+    ColumnDef(name='created', type=ColumnTypes.timestamptz),
+]
+
+
+async def _partitions_names(
+    table_name: str,
+    conn: AsyncConnection[Any],
+) -> list[str]:
+    partitions = await get_partitions(table_name, conn)
+    assert isinstance(partitions, list)
+    return [partition.name for partition in partitions]
+
+
+@pytest.mark.parametrize(('unit', 'expected'), (
+    (PartitionUnit.hour, ['p2026123123', 'p2027010100']),
+    (PartitionUnit.week, ['p20261228', 'p20270104']),
+    (PartitionUnit.month, ['p202612', 'p202701']),
+    (PartitionUnit.year, ['p2026', 'p2027']),
+))
+async def test_range_partitions(
+    unit: PartitionUnit,
+    expected: list[str],
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `range_partitions` aligns partitions to calendar units."""
+    queries = range_partitions(
+        'Events',
+        PartitionDef(
+            method=PartitionMethod.range,
+            column='created',
+            unit=unit,
+            premake=1,
+        ),
+        datetime(2026, 12, 31, 23, 30, tzinfo=timezone.utc),
+    )
+    names = []
+    for query in queries:
+        assert isinstance(query, Composed)
+        names.append(query.as_string(db_conn).split()[5])
+    assert names == ['"Events_{0}"'.format(suffix) for suffix in expected]
+
+
+async def test_create_range_partitioned_table(
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test time range partitions are created ahead."""
+    table_name = await create_table(
+        'Events',
+        TableDef(
+            columns=EVENTS_COLUMNS,
+            partition=PartitionDef(
+                method=PartitionMethod.range,
+                column='created',
+                unit=PartitionUnit.day,
+            ),
+        ),
+        db_conn,
+    )
+    assert isinstance(table_name, str)
+    assert table_name == 'Events'
+
+    today = datetime.now(timezone.utc).strftime('%Y%m%d')
+    names = await _partitions_names(table_name, db_conn)
+    assert len(names) == 4
+    assert names[0] == 'Events_p{0}'.format(today)
+
+    inserted = await insert_rows(
+        table_name,
+        TableData(rows=[{'id': 1, 'created': datetime.now(timezone.utc)}]),
+        db_conn,
+    )
+    assert not isinstance(inserted, DbError)
+
+
+async def test_premake_partitions(db_conn: AsyncConnection[Any]) -> None:
+    """Test integer range partitions follow the greatest key."""
+    partition_def = PartitionDef(
+        method=PartitionMethod.range,
+        column='id',
+        step=100,
+        premake=1,
+    )
+    await create_table(
+        'Events',
+        TableDef(columns=EVENTS_COLUMNS, partition=partition_def),
+        db_conn,
+    )
+    assert await _partitions_names('Events', db_conn) == [
+        'Events_p0',
+        'Events_p100',
+    ]
+
+    await insert_rows('Events', TableData(rows=[{'id': 150}]), db_conn)
+    await premake_partitions('Events', partition_def, db_conn)
+    assert await _partitions_names('Events', db_conn) == [
+        'Events_p0',
+        'Events_p100',
+        'Events_p200',
+    ]
+
+
+@pytest.mark.parametrize(('partition_def', 'expected'), (
+    (
+        PartitionDef(
+            method=PartitionMethod.hash,
+            column='id',
+            partitions=3,
+        ),
+        ['Events_h0', 'Events_h1', 'Events_h2'],
+    ),
+    (
+        PartitionDef(
+            method=PartitionMethod.list_,
+            column='kind',
+            values=[['click', 'view'], ['buy']],
+        ),
+        ['Events_default', 'Events_l0', 'Events_l1'],
+    ),
+))
+async def test_create_partitioned_table(
+    partition_def: PartitionDef,
+    expected: list[str],
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test hash and list partitions are created with the table."""
+    await create_table(
+        'Events',
+        TableDef(columns=EVENTS_COLUMNS, partition=partition_def),
+        db_conn,
+    )
+    assert await _partitions_names('Events', db_conn) == expected
+
+    inserted = await insert_rows(
+        'Events',
+        TableData(rows=[{'id': 1, 'kind': 'other'}, {'id': 2, 'kind': 'buy'}]),
+        db_conn,
+    )
+    assert not isinstance(inserted, DbError)
+
+
+async def test_long_partitions_names(db_conn: AsyncConnection[Any]) -> None:
+    """Test partitions of long table name aren't truncated to one name."""
+    table_name = 'Events' * 10 + 'Log'
+    assert partition_name('Events', 'h0') == 'Events_h0'
+    assert len(partition_name(table_name, 'h0').encode()) == 63
+    assert partition_name(table_name, 'h0') != partition_name(
+        '{0}_'.format(table_name[:-1]),
+        'h0',
+    )
+
+    await create_table(
+        table_name,
+        TableDef(
+            columns=EVENTS_COLUMNS,
+            partition=PartitionDef(
+                method=PartitionMethod.hash,
+                column='id',
+                partitions=3,
+            ),
+        ),
+        db_conn,
+    )
+    assert await _partitions_names(table_name, db_conn) == [
+        partition_name(table_name, 'h{0}'.format(remainder))
+        for remainder in range(3)
+    ]
+
+
+async def test_range_key_beyond_partitions(
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test rows with keys beyond created range partitions are rejected."""
+    await create_table(
+        'Events',
+        TableDef(
+            columns=EVENTS_COLUMNS,
+            partition=PartitionDef(
+                method=PartitionMethod.range,
+                column='id',
+                step=100,
+                premake=1,
+            ),
+        ),
+        db_conn,
+    )
+
+    rejected = await insert_rows(
+        'Events',
+        TableData(rows=[{'id': 200}]),
+        db_conn,
+    )
+    assert isinstance(rejected, DbError)
+    assert await _partitions_names('Events', db_conn) == [
+        'Events_p0',
+        'Events_p100',
+    ]
+
+
+def test_partition_def_validation() -> None:
+    """Test partition key must fit range partitions."""
+    with pytest.raises(ValidationError):
+        TableDef(
+            columns=EVENTS_COLUMNS,
+            partition=PartitionDef(
+                method=PartitionMethod.range,
+                column='kind',
+                step=10,
+            ),
+        )
+    with pytest.raises(ValidationError):
+        PartitionDef(method=PartitionMethod.range, column='id')
+
+
+@pytest.mark.parametrize('detach_only', (False, True))
+@pytest.mark.parametrize('concurrently', (False, True))
+async def test_drop_partition(
+    detach_only: bool,
+    concurrently: bool,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `drop_partition` detaches partition and drops it."""
+    await create_table(
+        'Events',
+        TableDef(
+            columns=EVENTS_COLUMNS,
+            partition=PartitionDef(
+                method=PartitionMethod.range,
+                column='id',
+                step=100,
+                premake=1,
+            ),
+        ),
+        db_conn,
+    )
+
+    assert await drop_partition('Events', 'Missing', db_conn) is None
+
+    notified: set[str] = set()
+    db_conn.add_notify_handler(lambda notify: notified.add(notify.payload))
+    await db_conn.execute(listen_tables_query())
+    generation = write_generations.get('Events')
+    dropped = await drop_partition(
+        'Events',
+        'Events_p0',
+        db_conn,
+        detach_only,
+        concurrently,
+    )
+    assert dropped == 'Events_p0'
+    assert await _partitions_names('Events', db_conn) == ['Events_p100']
+    assert notified == {'Events', 'Events_p0'}
+    assert write_generations.get('Events') == generation + 1
+
+    curr = await db_conn.execute("SELECT to_regclass('\"Events_p0\"')")
+    assert (await curr.fetchone() or [None])[0] == (
+        '"Events_p0"' if detach_only else None
+    )
+
+
+@pytest.mark.parametrize('concurrently', (False, True))
+async def test_drop_partition_failed(
+    concurrently: bool,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test failed drop keeps partition attached, unless detached apart."""
+    await create_table(
+        'Events',
+        TableDef(
+            columns=EVENTS_COLUMNS,
+            partition=PartitionDef(
+                method=PartitionMethod.range,
+                column='id',
+                step=100,
+                premake=1,
+            ),
+        ),
+        db_conn,
+    )
+    await db_conn.execute(
+        'CREATE VIEW "Events View" AS SELECT * FROM "Events_p0"',
+    )
+
+    dropped = await drop_partition(
+        'Events',
+        'Events_p0',
+        db_conn,
+        concurrently=concurrently,
+    )
+    assert isinstance(dropped, DbError)
+    assert ('is detached, but not dropped' in dropped.message) == concurrently
+    assert await _partitions_names('Events', db_conn) == (
+        ['Events_p100'] if concurrently else ['Events_p0', 'Events_p100']
+    )
@@ -0,0 +1,36 @@
+"""Connections pool tests."""
+
+
+from psycopg.conninfo import make_conninfo
+from testcontainers.postgres import PostgresContainer
+
+from app.core.pool import create_pool, pool_stats
+
+
+async def test_pool_stats(container: PostgresContainer) -> None:
+    """Test `pool_stats` reflects checked out connections."""
+    pool = create_pool(
+        make_conninfo(
+            host=container.get_container_host_ip(),
+            port=container.get_exposed_port(container.port_to_expose),
+            user=container.POSTGRES_USER,
+            password=container.POSTGRES_PASSWORD,
+            dbname=container.POSTGRES_DB,
+        ),
+        min_size=1,
+        max_size=2,
+        max_idle=60,
+        max_lifetime=60,
+        timeout=5,
+    )
+    await pool.open(wait=True)
+    async with pool:
+        async with pool.connection() as conn:
+            assert conn.autocommit
+            stats = pool_stats(pool)
+            assert stats.in_use == 1
+            assert stats.max_size == 2
+
+        stats = pool_stats(pool)
+        assert stats.in_use == 0
+        assert stats.requests >= 1
@@ -5,10 +5,24 @@ from typing import Any
 
 import pytest
 from psycopg import AsyncConnection
-from psycopg.sql import Composed
+from psycopg.sql import SQL, Composed
 
-from app.core.models import ColumnDef, ColumnTypes, TableDef
-from app.core.queries import create_table_query, insert_row_query
+from app.core.models import (
+    ColumnDef,
+    ColumnTypes,
+    FilterOperator,
+    RowsFilter,
+    RowsOrder,
+    RowsQuery,
+    TableDef,
+)
+from app.core.queries import (
+    StatementCache,
+    create_table_query,
+    filter_rows_params,
+    filter_rows_query,
+    insert_row_query,
+)
 
 
 @pytest.mark.parametrize(('table_name', 'table_def', 'expected'), (
@@ -76,25 +90,91 @@ async def test_create_table_query(
     assert query.as_string(db_conn) == expected
 
 
-@pytest.mark.parametrize(('table_name', 'column_names', 'expected'), (
+@pytest.mark.parametrize(('table_name', 'column_names', 'rows_count', 'expected'), (
     (
         'My Table',
         ['col 1', 'col 2'],
+        1,
         'INSERT INTO "My Table"\n("col 1", "col 2")\nVALUES (%s, %s)\nRETURNING *;',
     ),
+    (
+        'My Table',
+        ['col 1', 'col 2'],
+        3,
+        'INSERT INTO "My Table"\n("col 1", "col 2")\nVALUES (%s, %s), (%s, %s), (%s, %s)\nRETURNING *;',
+    ),
     (
         'My Table',
         [],
+        1,
         'INSERT INTO "My Table" DEFAULT VALUES RETURNING *;',
     ),
 ))
 async def test_insert_row_query(
     table_name: str,
     column_names: list[str],
+    rows_count: int,
     expected: str,
     db_conn: AsyncConnection[Any],
 ) -> None:
     """Test `insert_row_query` function."""
-    query = insert_row_query(table_name, column_names)
+    query = insert_row_query(table_name, column_names, rows_count)
     assert isinstance(query, Composed)
     assert query.as_string(db_conn).strip() == expected.strip()
+
+
+@pytest.mark.parametrize(('rows_query', 'expected', 'params'), (
+    (RowsQuery(), 'SELECT * FROM "My Table";', []),
+    (
+        RowsQuery(
+            columns=['col 1'],
+            where=[
+                RowsFilter(column='col 1', op=FilterOperator.ge, value=2),
+                RowsFilter(column='col 2', op=FilterOperator.in_, value=['a', 'b']),
+                RowsFilter(column='col 2', op=FilterOperator.is_null, value=False),
+            ],
+            order_by=[
+                RowsOrder(column='col 2', descending=True),
+                RowsOrder(column='col 1'),
+            ],
+            limit=10,
+        ),
+        'SELECT "col 1" FROM "My Table" WHERE "col 1" >= %s AND "col 2" IN (%s, %s) AND "col 2" IS NOT NULL ORDER BY "col 2" DESC, "col 1" LIMIT %s;',
+        [2, 'a', 'b', 10],
+    ),
+))
+async def test_filter_rows_query(
+    rows_query: RowsQuery,
+    expected: str,
+    params: list[Any],
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `filter_rows_query` and `filter_rows_params` functions."""
+    query = filter_rows_query('My Table', rows_query)
+    assert isinstance(query, Composed)
+    assert query.as_string(db_conn) == expected
+    assert filter_rows_params(rows_query) == params
+
+
+def test_statement_cache() -> None:
+    """Test `StatementCache` renders statements once per generation."""
+    cache = StatementCache(max_size=2)
+    first = cache.get(
+        ('a', ('x',), 1),
+        lambda: insert_row_query('a', ['x']),
+    )
+    assert isinstance(first, str)
+    assert 'INSERT INTO "a"' in first
+    assert cache.get(('a', ('x',), 1), lambda: SQL('unused')) is first
+
+    cache.get(('b', ('x',), 1), lambda: insert_row_query('b', ['x']))
+    cache.get(('c', ('x',), 1), lambda: insert_row_query('c', ['x']))
+    assert len(cache) == 2
+
+    cache.invalidate('b')
+    assert len(cache) == 1
+    rebuilt = cache.get(
+        ('a', ('x',), 1),
+        lambda: insert_row_query('a', ['x']),
+    )
+    assert rebuilt != first
@@ -0,0 +1,153 @@
+"""Read replicas routing tests."""
+
+
+from typing import Any, AsyncGenerator
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
+from testcontainers.postgres import PostgresContainer
+
+from app.api_v1.routes.tables import WRITE_LSN_HEADER
+from app.api_v1.routes.tables import router as tables_router
+from app.core.admission import AdmissionControl
+from app.core.pool import Pool, create_pool
+from app.core.replicas import (
+    Replica,
+    ReplicaSet,
+    current_lsn,
+    format_lsn,
+    parse_lsn,
+)
+
+
+def _create_pool(container: PostgresContainer, port: Any) -> Pool:
+    return create_pool(
+        make_conninfo(
+            host=container.get_container_host_ip(),
+            port=port,
+            user=container.POSTGRES_USER,
+            password=container.POSTGRES_PASSWORD,
+            dbname=container.POSTGRES_DB,
+            connect_timeout=1,
+        ),
+        min_size=1,
+        max_size=2,
+        max_idle=60,
+        max_lifetime=60,
+        timeout=5,
+    )
+
+
+@pytest.fixture
+async def replica(
+    container: PostgresContainer,
+) -> AsyncGenerator[Replica, None]:
+    """Create replica of the test database: the database itself."""
+    pool = _create_pool(
+        container,
+        container.get_exposed_port(container.port_to_expose),
+    )
+    await pool.open(wait=True)
+    yield Replica('replica', pool)
+    await pool.close()
+
+
+def test_lsn_format() -> None:
+    """Test WAL positions are parsed and formatted as by Postgres."""
+    assert parse_lsn('16/B374D848') == 0x16B374D848
+    assert format_lsn(0x16B374D848) == '16/B374D848'
+    assert parse_lsn('0/0') == 0
+    assert parse_lsn('16B374D848') is None
+    assert parse_lsn('16/position') is None
+
+
+async def test_replica_check(
+    replica: Replica,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test replica state is updated with its replayed WAL position."""
+    assert ReplicaSet([replica]).choose() is None
+
+    await db_conn.execute('CREATE TABLE written (id int)')
+    lsn = await current_lsn(db_conn)
+    assert isinstance(lsn, int)
+    await replica.check(timeout=5)
+
+    assert replica.lag == 0
+    assert replica.replay_lsn >= lsn
+    assert ReplicaSet([replica]).choose(lsn) is replica
+    assert ReplicaSet([replica]).choose(replica.replay_lsn + 1) is None
+
+
+async def test_unavailable_replica(container: PostgresContainer) -> None:
+    """Test unreachable replica is not chosen."""
+    pool = _create_pool(container, 1)
+    await pool.open(wait=False)
+    replica = Replica('unavailable', pool)
+    replica.lag = 0
+    await replica.check(timeout=0.1)
+    await pool.close()
+
+    assert replica.lag is None
+    assert ReplicaSet([replica]).choose() is None
+
+
+async def test_choose_replica(replica: Replica) -> None:
+    """Test lagging replicas are skipped and the rest take turns."""
+    lagging = Replica('lagging', replica.pool)
+    lagging.lag = 10
+    other = Replica('other', replica.pool)
+    replica.lag = 0
+    other.lag = 1
+    replicas = ReplicaSet([replica, lagging, other], max_lag=5)
+
+    chosen = {replicas.choose().name for _ in range(4)}  # type: ignore[union-attr]
+    assert chosen == {'replica', 'other'}
+
+
+def _routed(server: str) -> float:
+    return REGISTRY.get_sample_value(
+        'rest_pg_reads_routed_total',
+        {'server': server},
+    ) or 0
+
+
+async def test_read_your_writes(replica: Replica) -> None:
+    """Test reads go to replica only if it replayed passed position."""
+    app = FastAPI()
+    app.include_router(tables_router)
+    app.state.pool = replica.pool
+    app.state.replicas = ReplicaSet([replica])
+    app.state.admission = AdmissionControl()
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),  # type: ignore[arg-type]
+        base_url='http://test',
+    ) as client:
+        response = await client.post('/tables/written', json={
+            'columns': [{'name': 'id', 'type': 'integer'}],
+        })
+        lsn = response.headers[WRITE_LSN_HEADER]
+        await replica.check(timeout=5)
+
+        replica_reads = _routed('replica')
+        primary_reads = _routed('primary')
+        for min_lsn in (lsn, 'FFFFFFFF/0'):
+            response = await client.get(
+                '/tables/table_info/written',
+                headers={'X-Min-LSN': min_lsn},
+            )
+            assert response.status_code == 200
+
+        response = await client.get(
+            '/tables/table_info/written',
+            headers={'X-Min-LSN': 'latest'},
+        )
+        assert response.status_code == 400
+
+    assert _routed('replica') == replica_reads + 1
+    assert _routed('primary') == primary_reads + 1
@@ -0,0 +1,199 @@
+"""Rows reading tests."""
+
+
+from typing import Any, AsyncIterator
+
+import pytest
+from psycopg import AsyncConnection
+
+from app.core.models import (
+    ColumnDef,
+    ColumnTypes,
+    FilterOperator,
+    RowsFilter,
+    RowsOrder,
+    RowsQuery,
+    TableData,
+    TableDef,
+)
+from app.core.rows import (
+    RowBatch,
+    explain_rows_query,
+    get_primary_key,
+    query_rows,
+    read_rows,
+)
+from app.core.tables import DbError, create_table, insert_rows
+
+
+async def _collect(
+    batches: AsyncIterator[RowBatch] | None | DbError,
+) -> list[dict[str, Any]]:
+    assert batches is not None
+    assert not isinstance(batches, DbError)
+    return [
+        dict(zip(batch.columns, row))
+        async for batch in batches
+        for row in batch.rows
+    ]
+
+
+@pytest.fixture
+async def filled_table(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> str:
+    """Fill test table with five rows."""
+    await insert_rows(
+        empty_table,
+        TableData(rows=[{'col 2': 'test {0}'.format(i)} for i in range(5)]),
+        db_conn,
+    )
+    return empty_table
+
+
+@pytest.mark.parametrize(('after', 'limit', 'expected_keys'), (
+    (None, None, [1, 2, 3, 4, 5]),
+    (None, 2, [1, 2]),
+    (['2'], None, [3, 4, 5]),
+    (['2'], 2, [3, 4]),
+    (['5'], None, []),
+))
+async def test_read_rows(
+    after: list[str] | None,
+    limit: int | None,
+    expected_keys: list[int],
+    filled_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `read_rows` keyset pagination."""
+    rows = await _collect(await read_rows(
+        filled_table,
+        db_conn,
+        after=after,
+        limit=limit,
+        batch_size=2,
+    ))
+    assert [row['col 1'] for row in rows] == expected_keys
+    assert all(
+        row['col 2'] == 'test {0}'.format(row['col 1'] - 1) for row in rows
+    )
+
+
+async def test_read_rows_errors(
+    filled_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `read_rows` on missing table and bad keyset.
+
+    Keyset values of wrong type fail before any rows are returned.
+    """
+    assert await read_rows('Unexisted', db_conn) is None
+    assert isinstance(
+        await read_rows(filled_table, db_conn, after=['1', '2']),
+        DbError,
+    )
+    assert isinstance(
+        await read_rows(filled_table, db_conn, after=['abc']),
+        DbError,
+    )
+    assert not db_conn.info.transaction_status
+
+
+async def test_read_rows_without_primary_key(
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test tables without primary key are read in storage order."""
+    table = await create_table(
+        'No Key',
+        TableDef(columns=[ColumnDef(name='value', type=ColumnTypes.integer)]),
+        db_conn,
+    )
+    assert isinstance(table, str)
+    await insert_rows(
+        table,
+        TableData(rows=[{'value': 3}, {'value': 1}, {'value': 2}]),
+        db_conn,
+    )
+
+    assert await get_primary_key(table, db_conn) == []
+    rows = await _collect(await read_rows(table, db_conn))
+    assert rows == [{'value': 3}, {'value': 1}, {'value': 2}]
+
+
+async def test_query_rows(
+    filled_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `query_rows` filters, sorts and projects rows."""
+    rows = await _collect(await query_rows(
+        filled_table,
+        RowsQuery(
+            columns=['col 2'],
+            where=[
+                RowsFilter(column='col 1', op=FilterOperator.gt, value=1),
+                RowsFilter(
+                    column='col 2',
+                    op=FilterOperator.in_,
+                    value=['test 1', 'test 3', 'test 4'],
+                ),
+            ],
+            order_by=[RowsOrder(column='col 1', descending=True)],
+            limit=2,
+        ),
+        db_conn,
+        batch_size=1,
+    ))
+    assert rows == [{'col 2': 'test 4'}, {'col 2': 'test 3'}]
+
+
+@pytest.mark.parametrize('rows_query', (
+    RowsQuery(columns=['unknown']),
+    RowsQuery(where=[RowsFilter(column='col 1', value='not a number')]),
+))
+async def test_query_rows_errors(
+    rows_query: RowsQuery,
+    filled_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `query_rows` reports unknown columns and wrong values."""
+    assert await query_rows('Unexisted', rows_query, db_conn) is None
+    assert isinstance(
+        await query_rows(filled_table, rows_query, db_conn),
+        DbError,
+    )
+
+
+async def test_query_rows_altered_table(
+    filled_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `query_rows` sees columns added outside of the service."""
+    assert await _collect(await query_rows(filled_table, RowsQuery(), db_conn))
+    await db_conn.execute(
+        'ALTER TABLE "{0}" ADD COLUMN added integer'.format(filled_table),
+    )
+
+    rows = await _collect(await query_rows(
+        filled_table,
+        RowsQuery(columns=['added'], limit=1),
+        db_conn,
+    ))
+    assert rows == [{'added': None}]
+
+
+@pytest.mark.parametrize('analyze', (False, True))
+async def test_explain_rows_query(
+    analyze: bool,
+    filled_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `explain_rows_query` returns plan using primary key index."""
+    plan = await explain_rows_query(
+        filled_table,
+        RowsQuery(where=[RowsFilter(column='col 1', value=3)]),
+        db_conn,
+        analyze,
+    )
+    assert isinstance(plan, list)
+    assert ('Actual Rows' in plan[0]['Plan']) == analyze
@@ -1,24 +1,38 @@
 """Tables manipulations tests."""
 
 
+from tempfile import TemporaryFile
 from typing import Any, Type
 
+import httpx
 import pytest
+from fastapi import FastAPI
 from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
+from psycopg.pq import Trace
 from psycopg.rows import dict_row
+from testcontainers.postgres import PostgresContainer
 
+from app.api_v1.dependencies import ReadConnection, db_read_connection
+from app.api_v1.routes.tables import router as tables_router
+from app.core.bulk import BulkOptions
 from app.core.models import (
     ColumnDef,
     ColumnTypes,
+    InsertedData,
+    InsertStrategy,
+    RowsCountMethod,
     TableData,
     TableDef,
     TableInfo,
+    TablesInfo,
 )
 from app.core.tables import (
     DbError,
     create_table,
     drop_table,
     get_table_info,
+    get_tables_info,
     insert_rows,
 )
 from tests.integration.conftest import TEST_TABLE_INFO, TEST_TABLE_NAME
@@ -64,7 +78,7 @@ async def test_create_table(
 
     async with db_conn.cursor(row_factory=dict_row) as curr:
         await curr.execute("SELECT * FROM pg_class WHERE relkind = 'r';")
-        records = await curr.fetchmany()
+        records = await curr.fetchall()
         exists = str(created) in {record.get('relname') for record in records}
         assert exists == should_exists
 
@@ -75,14 +89,17 @@ async def test_create_table(
             {'col 1': 3, 'col 2': 'test 0'},
             {'col 1': 4, 'col 2': 'test 1'},
         ]),
-        TableData(rows=[
-            {'col 1': 3, 'col 2': 'test 0'},
-            {'col 1': 4, 'col 2': 'test 1'},
-        ]),
+        InsertedData(
+            strategy=InsertStrategy.values,
+            rows=[
+                {'col 1': 3, 'col 2': 'test 0'},
+                {'col 1': 4, 'col 2': 'test 1'},
+            ],
+        ),
     ),
     (
         TableData(rows=[]),
-        TableData(rows=[]),
+        InsertedData(rows=[]),
     ),
     # Default values in id
     (
@@ -90,15 +107,46 @@ async def test_create_table(
             {'col 2': 'test 0'},
             {'col 2': 'test 1'},
         ]),
+        InsertedData(
+            strategy=InsertStrategy.values,
+            rows=[
+                {'col 1': 1, 'col 2': 'test 0'},
+                {'col 1': 2, 'col 2': 'test 1'},
+            ],
+        ),
+    ),
+    # Different columns sets keep rows order
+    (
         TableData(rows=[
-            {'col 1': 1, 'col 2': 'test 0'},
-            {'col 1': 2, 'col 2': 'test 1'},
+            {'col 2': 'test 0'},
+            {'col 1': 5, 'col 2': 'test 1'},
+            {},
         ]),
+        InsertedData(
+            strategy=InsertStrategy.values,
+            rows=[
+                {'col 1': 1, 'col 2': 'test 0'},
+                {'col 1': 5, 'col 2': 'test 1'},
+                {'col 1': 2, 'col 2': None},
+            ],
+        ),
+    ),
+    # Values are parsed by Postgres if they don't match column type
+    (
+        TableData(rows=[
+            {'col 1': '7', 'col 2': 'test 0'},
+        ]),
+        InsertedData(
+            strategy=InsertStrategy.single,
+            rows=[
+                {'col 1': 7, 'col 2': 'test 0'},
+            ],
+        ),
     ),
 ))
 async def test_insert_rows(
     table_data: TableData,
-    expected: TableData | None | DbError,
+    expected: InsertedData | None | DbError,
     empty_table: str,
     db_conn: AsyncConnection[Any],
 ) -> None:
@@ -107,9 +155,150 @@ async def test_insert_rows(
     assert inserted == expected
 
 
+@pytest.mark.parametrize(('options', 'strategy'), (
+    (BulkOptions(values_threshold=100, copy_threshold=100), InsertStrategy.single),
+    (BulkOptions(copy_threshold=100, values_chunk_size=2), InsertStrategy.values),
+    (BulkOptions(copy_threshold=1), InsertStrategy.copy),
+))
+async def test_insert_rows_strategies(
+    options: BulkOptions,
+    strategy: InsertStrategy,
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test every `insert_rows` strategy writes the same rows."""
+    inserted = await insert_rows(
+        empty_table,
+        TableData(rows=[
+            {'col 2': 'test 0'},
+            {'col 2': 'test 1'},
+            {'col 1': 10, 'col 2': None},
+            {'col 2': 'test 3'},
+            {},
+        ]),
+        db_conn,
+        options,
+    )
+    assert inserted == InsertedData(
+        strategy=strategy,
+        rows=[
+            {'col 1': 1, 'col 2': 'test 0'},
+            {'col 1': 2, 'col 2': 'test 1'},
+            {'col 1': 10, 'col 2': None},
+            {'col 1': 3, 'col 2': 'test 3'},
+            {'col 1': 4, 'col 2': None},
+        ],
+    )
+
+
+async def test_insert_rows_atomic(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `insert_rows` writes nothing if any row fails."""
+    inserted = await insert_rows(
+        empty_table,
+        TableData(rows=[
+            {'col 1': 1, 'col 2': 'test 0'},
+            {'col 1': 1, 'col 2': 'duplicate'},
+        ]),
+        db_conn,
+    )
+    assert isinstance(inserted, DbError)
+
+    table_info = await get_table_info(empty_table, db_conn)
+    assert isinstance(table_info, TableInfo)
+    assert table_info.rows == 0
+
+
+@pytest.mark.parametrize('options', (
+    BulkOptions(values_threshold=100, copy_threshold=100),
+    BulkOptions(copy_threshold=100),
+    BulkOptions(copy_threshold=1),
+))
+async def test_insert_rows_skipped(
+    options: BulkOptions,
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `insert_rows` writes nothing if trigger skips any row."""
+    await db_conn.execute("""
+        CREATE OR REPLACE FUNCTION skip_row() RETURNS trigger AS $$
+        BEGIN
+            IF NEW."col 2" = 'skip' THEN
+                RETURN NULL;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    await db_conn.execute("""
+        CREATE TRIGGER skip_row BEFORE INSERT ON "{0}"
+        FOR EACH ROW EXECUTE FUNCTION skip_row()
+    """.format(empty_table))
+
+    inserted = await insert_rows(
+        empty_table,
+        TableData(rows=[
+            {'col 2': 'test 0'},
+            {'col 2': 'skip'},
+            {'col 2': 'test 2'},
+        ]),
+        db_conn,
+        options,
+    )
+    assert inserted == DbError(message='1 of 3 rows were not inserted')
+
+    table_info = await get_table_info(empty_table, db_conn)
+    assert isinstance(table_info, TableInfo)
+    assert table_info.rows == 0
+
+
+async def test_insert_rows_prepared(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+    container: PostgresContainer,
+) -> None:
+    """Test `insert_rows` prepared statements survive table recreation.
+
+    Table is recreated through another connection, like another pool
+    connection does it.
+    """
+    row = {'col 2': 'test'}
+    inserted = await insert_rows(empty_table, TableData(rows=[row]), db_conn)
+    assert isinstance(inserted, InsertedData)
+
+    curr = await db_conn.execute(
+        'SELECT count(*) FROM pg_prepared_statements '
+        "WHERE statement LIKE '%INSERT INTO \"Test Table\"%'",
+    )
+    assert await curr.fetchone() == (1,)
+
+    async with await AsyncConnection.connect(
+        make_conninfo(
+            host=container.get_container_host_ip(),
+            port=container.get_exposed_port(container.port_to_expose),
+            user=container.POSTGRES_USER,
+            password=container.POSTGRES_PASSWORD,
+            dbname=container.POSTGRES_DB,
+        ),
+        autocommit=True,
+    ) as other_conn:
+        await drop_table(empty_table, other_conn)
+        await create_table(empty_table, TableDef(columns=[
+            ColumnDef(name='col 2', type=ColumnTypes.text),
+            ColumnDef(name='col 3', type=ColumnTypes.integer),
+        ]), other_conn)
+    inserted = await insert_rows(empty_table, TableData(rows=[row]), db_conn)
+    assert inserted == InsertedData(
+        rows=[{'col 2': 'test', 'col 3': None}],
+        strategy=InsertStrategy.single,
+    )
+
+
 @pytest.mark.parametrize(('table_name', 'expected_type'), (
     (TEST_TABLE_NAME, str),
-    ('Unexisted', None),
+    ('Unexisted', type(None)),
 ))
 async def test_drop_table(
     table_name: str,
@@ -123,7 +312,7 @@ async def test_drop_table(
     assert isinstance(dropped, expected_type)
     async with db_conn.cursor(row_factory=dict_row) as curr:
         await curr.execute("SELECT * FROM pg_class WHERE relkind = 'r';")
-        records = await curr.fetchmany()
+        records = await curr.fetchall()
         assert str(dropped) not in {
             record.get('relname') for record in records
         }
@@ -142,3 +331,110 @@ async def test_get_table_info(
     """Test `get_table_info` function."""
     table_info = await get_table_info(table_name, db_conn)
     assert table_info == expected
+
+
+@pytest.mark.parametrize(('rows_method', 'exact_threshold', 'expected_method'), (
+    (RowsCountMethod.exact, 0, RowsCountMethod.exact),
+    (RowsCountMethod.estimate, 0, RowsCountMethod.estimate),
+    (RowsCountMethod.auto, 10, RowsCountMethod.exact),
+    (RowsCountMethod.auto, 1, RowsCountMethod.estimate),
+))
+async def test_get_table_info_rows_method(
+    rows_method: RowsCountMethod,
+    exact_threshold: int,
+    expected_method: RowsCountMethod,
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `get_table_info` rows counting methods."""
+    await insert_rows(
+        empty_table,
+        TableData(rows=[{'col 2': 'test'}] * 3),
+        db_conn,
+    )
+    await db_conn.execute('ANALYZE "Test Table";')
+
+    table_info = await get_table_info(
+        empty_table,
+        db_conn,
+        rows_method,
+        exact_threshold,
+    )
+    assert isinstance(table_info, TableInfo)
+    assert table_info.rows == 3
+    assert table_info.rows_method == expected_method
+
+
+async def test_get_table_info_round_trips(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `get_table_info` takes one round trip once it is prepared."""
+    await get_table_info(empty_table, db_conn)
+
+    with TemporaryFile('w+') as trace:
+        db_conn.pgconn.trace(trace.fileno())
+        db_conn.pgconn.set_trace_flags(Trace.SUPPRESS_TIMESTAMPS)
+        table_info = await get_table_info(empty_table, db_conn)
+        db_conn.pgconn.untrace()
+
+        trace.seek(0)
+        sent = [
+            line.rstrip().split('\t')[2]
+            for line in trace
+            if line.startswith('F\t')
+        ]
+
+    assert table_info == TEST_TABLE_INFO
+    # Every Sync or simple Query message waits for the server response.
+    assert sent.count('Sync') + sent.count('Query') == 1
+
+
+async def test_get_tables_info(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `get_tables_info` finds info of many tables at once."""
+    await create_table('Other', TableDef(columns=[]), db_conn)
+    await insert_rows(
+        empty_table,
+        TableData(rows=[{'col 2': 'test'}] * 3),
+        db_conn,
+    )
+    await db_conn.execute('ANALYZE "Test Table";')
+
+    tables_info = await get_tables_info(
+        ['Unexisted', empty_table, 'Other'],
+        db_conn,
+    )
+    assert isinstance(tables_info, TablesInfo)
+    assert list(tables_info.tables) == [empty_table, 'Other']
+    assert tables_info.missing == ['Unexisted']
+
+    table_info = tables_info.tables[empty_table]
+    assert table_info.columns == TEST_TABLE_INFO.columns
+    assert table_info.rows == 3
+    assert table_info.rows_method == RowsCountMethod.estimate
+    assert tables_info.tables['Other'].columns == []
+
+
+async def test_tables_info_route(db_conn: AsyncConnection[Any]) -> None:
+    """Test tables info route isn't taken for table creation."""
+    app = FastAPI()
+    app.include_router(tables_router)
+    app.dependency_overrides[db_read_connection] = lambda: ReadConnection(
+        conn=db_conn,
+        replica=False,
+    )
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),  # type: ignore[arg-type]
+        base_url='http://test',
+    ) as client:
+        response = await client.post(
+            '/tables/table_info:batch',
+            json={'tables': ['Unexisted']},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {'tables': {}, 'missing': ['Unexisted']}
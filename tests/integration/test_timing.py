@@ -0,0 +1,132 @@
+"""Requests timing tests."""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from psycopg import AsyncConnection
+
+from app.api_v1.encoders import (
+    ENCODERS,
+    NDJSON_MEDIA_TYPE,
+    SERIALIZE_PHASE,
+    encode_timed,
+)
+from app.api_v1.timing import TimedRoute, TimingMiddleware
+from app.core.rows import RowBatch
+from app.core.timing import (
+    TimedCursor,
+    current_timing,
+    record_phase,
+    start_timing,
+    stop_timing,
+)
+
+
+def _make_app(db_conn: AsyncConnection[Any], **options: Any) -> FastAPI:
+    app = FastAPI()
+    app.router.route_class = TimedRoute
+
+    @app.get('/items/{name}')
+    async def item(name: str) -> str:
+        record_phase('db-test', 0.005)
+        async with TimedCursor(db_conn) as cur:
+            await cur.execute('SELECT   %s::text', [name])
+            await cur.execute('SELECT   %s::text', [name])
+        return name
+
+    app.add_middleware(TimingMiddleware, **options)
+    return app
+
+
+async def _get(app: FastAPI, path: str) -> httpx.Response:
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),  # type: ignore[arg-type]
+        base_url='http://test',
+    ) as client:
+        return await client.get(path)
+
+
+async def test_server_timing(db_conn: AsyncConnection[Any]) -> None:
+    """Test phases are returned in header only when enabled."""
+    response = await _get(_make_app(db_conn, server_timing=True), '/items/a')
+    metrics = response.headers['server-timing'].split(', ')
+    assert [metric.split(';')[0] for metric in metrics] == [
+        'parse',
+        'db-test',
+        'serialize',
+        'app',
+    ]
+    assert metrics[1] == 'db-test;dur=5.00'
+
+    response = await _get(_make_app(db_conn), '/items/a')
+    assert 'server-timing' not in response.headers
+    assert current_timing() is None
+
+
+@pytest.mark.parametrize(('profile_rate', 'profiled'), [(0, False), (1, True)])
+async def test_slow_request_log(
+    db_conn: AsyncConnection[Any],
+    caplog: pytest.LogCaptureFixture,
+    profile_rate: float,
+    profiled: bool,
+) -> None:
+    """Test slow requests are logged with phases and statements."""
+    app = _make_app(
+        db_conn,
+        slow_seconds=1e-6,
+        profile_rate=profile_rate,
+    )
+    with caplog.at_level(logging.WARNING, 'app.api_v1.timing'):
+        await _get(app, '/items/a')
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['route'] == '/items/{name}'
+    assert record['status'] == 200
+    assert set(record['phases_ms']) == {
+        'parse',
+        'db-test',
+        'serialize',
+        'app',
+        'response',
+    }
+    assert record['statements'] == ['SELECT %s::text']
+    assert ('profile' in record) == profiled
+
+
+async def test_fast_request_not_logged(
+    db_conn: AsyncConnection[Any],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test requests faster than threshold are not logged."""
+    with caplog.at_level(logging.WARNING, 'app.api_v1.timing'):
+        await _get(_make_app(db_conn, slow_seconds=60), '/items/a')
+
+    assert not caplog.records
+
+
+async def test_encode_timed() -> None:
+    """Test time of fetching batches is not counted as serialisation."""
+    async def batches() -> AsyncIterator[RowBatch]:  # noqa: WPS430
+        for index in range(2):
+            await asyncio.sleep(0.05)
+            yield RowBatch(columns=['a'], rows=[(index,)])
+
+    timing, token = start_timing()
+    try:
+        chunks = [
+            chunk
+            async for chunk in encode_timed(
+                ENCODERS[NDJSON_MEDIA_TYPE],
+                batches(),
+            )
+        ]
+    finally:
+        stop_timing(token)
+
+    assert b''.join(chunks) == b'{"a":0}\n{"a":1}\n'
+    assert 0 < timing.phases[SERIALIZE_PHASE] < 0.05
@@ -0,0 +1,147 @@
+"""Rows merge tests."""
+
+
+from typing import Any
+
+import pytest
+from psycopg import AsyncConnection
+
+from app.core.models import (
+    ColumnDef,
+    ColumnTypes,
+    TableData,
+    TableDef,
+    UpsertResult,
+)
+from app.core.tables import DbError, create_table, insert_rows
+from app.core.upsert import upsert_rows
+
+
+async def _select(table_name: str, conn: AsyncConnection[Any]) -> list[Any]:
+    curr = await conn.execute(
+        'SELECT * FROM "{0}" ORDER BY 1'.format(table_name),
+    )
+    return await curr.fetchall()
+
+
+async def test_upsert_rows(
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `upsert_rows` inserts new rows and updates changed ones."""
+    await insert_rows(
+        empty_table,
+        TableData(rows=[
+            {'col 1': 1, 'col 2': 'test 1'},
+            {'col 1': 2, 'col 2': 'test 2'},
+        ]),
+        db_conn,
+    )
+
+    merged = await upsert_rows(
+        empty_table,
+        TableData(rows=[
+            {'col 1': 1, 'col 2': 'test 1'},
+            {'col 1': 2, 'col 2': 'changed'},
+            {'col 1': 3, 'col 2': 'first'},
+            {'col 1': 3, 'col 2': 'last'},
+            {'col 1': 4},
+        ]),
+        db_conn,
+    )
+
+    assert merged == UpsertResult(inserted=2, updated=1, unchanged=2)
+    assert await _select(empty_table, db_conn) == [
+        (1, 'test 1'),
+        (2, 'changed'),
+        (3, 'last'),
+        (4, None),
+    ]
+
+
+async def test_upsert_rows_unique_key(db_conn: AsyncConnection[Any]) -> None:
+    """Test `upsert_rows` merges rows by columns of unique constraint."""
+    table_name = await create_table(
+        'Users',
+        TableDef(columns=[
+            ColumnDef(name='id', type=ColumnTypes.serial, primary_key=True),
+            ColumnDef(name='email', type=ColumnTypes.text, unique=True),
+            ColumnDef(name='name', type=ColumnTypes.text),
+        ]),
+        db_conn,
+    )
+    assert isinstance(table_name, str)
+
+    for name in ('first', 'second'):
+        merged = await upsert_rows(
+            table_name,
+            TableData(rows=[{'email': 'user@test', 'name': name}]),
+            db_conn,
+            ['email'],
+        )
+        assert isinstance(merged, UpsertResult)
+
+    assert merged == UpsertResult(inserted=0, updated=1, unchanged=0)
+    assert await _select(table_name, db_conn) == [(1, 'user@test', 'second')]
+
+
+async def test_upsert_rows_last_wins(db_conn: AsyncConnection[Any]) -> None:
+    """Test `upsert_rows` merges the last row of key with other columns."""
+    table_name = await create_table(
+        'Profiles',
+        TableDef(columns=[
+            ColumnDef(name='id', type=ColumnTypes.integer, primary_key=True),
+            ColumnDef(name='name', type=ColumnTypes.text),
+            ColumnDef(name='email', type=ColumnTypes.text),
+        ]),
+        db_conn,
+    )
+    assert isinstance(table_name, str)
+
+    merged = await upsert_rows(
+        table_name,
+        TableData(rows=[
+            {'id': 1, 'name': 'first'},
+            {'id': 1, 'name': 'second', 'email': 'user@test'},
+            {'id': 2, 'name': 'other'},
+            {'id': 1, 'name': 'last'},
+        ]),
+        db_conn,
+    )
+
+    assert merged == UpsertResult(inserted=2, updated=0, unchanged=2)
+    assert await _select(table_name, db_conn) == [
+        (1, 'last', None),
+        (2, 'other', None),
+    ]
+
+
+@pytest.mark.parametrize(('rows', 'key_columns'), (
+    ([{'col 2': 'test'}], None),
+    ([{'col 1': 1, 'col 2': 'test'}], ['col 2']),
+))
+async def test_upsert_rows_invalid_key(
+    rows: list[dict[str, Any]],
+    key_columns: list[str] | None,
+    empty_table: str,
+    db_conn: AsyncConnection[Any],
+) -> None:
+    """Test `upsert_rows` fails without key or its unique constraint."""
+    merged = await upsert_rows(
+        empty_table,
+        TableData(rows=rows),
+        db_conn,
+        key_columns,
+    )
+    assert isinstance(merged, DbError)
+    assert await _select(empty_table, db_conn) == []
+
+
+async def test_upsert_rows_unexisted(db_conn: AsyncConnection[Any]) -> None:
+    """Test `upsert_rows` returns None for unexisted table."""
+    merged = await upsert_rows(
+        'Unexisted',
+        TableData(rows=[{'id': 1}]),
+        db_conn,
+    )
+    assert merged is None